@@ -0,0 +1,30 @@
+"""add_invalidated_at_index
+
+Revision ID: 1e9b4d7c3a60
+Revises: 928a2787e159
+Create Date: 2026-10-17 09:48:12.306417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e9b4d7c3a60'
+down_revision: Union[str, Sequence[str], None] = '928a2787e159'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # El refresco incremental de la caché de la blacklist filtra por
+    # invalidated_at en cada proceso; sin índice recorre la tabla completa
+    op.create_index('ix_invalidated_tokens_invalidated_at', 'invalidated_tokens', ['invalidated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invalidated_tokens_invalidated_at', table_name='invalidated_tokens')
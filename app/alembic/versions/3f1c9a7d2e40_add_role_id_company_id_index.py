@@ -0,0 +1,31 @@
+"""add_role_id_company_id_index
+
+Revision ID: 3f1c9a7d2e40
+Revises: 1e9b4d7c3a60
+Create Date: 2026-10-17 10:12:31.482915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2e40'
+down_revision: Union[str, Sequence[str], None] = '1e9b4d7c3a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índice compuesto para resolver permisos por empresa: la PK de user_role
+    # (user_id, role_id) entrega los roles del usuario y este índice permite
+    # descartar los de otras empresas sin leer la tabla role
+    op.create_index('ix_role_id_company_id', 'role', ['id', 'company_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_role_id_company_id', table_name='role')
@@ -0,0 +1,35 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: 5b8e2d4c1a93
+Revises: 3f1c9a7d2e40
+Create Date: 2026-10-17 11:04:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2d4c1a93'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2e40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices de la clave de orden de los listados paginados por cursor:
+    # (a, b) > (:a, :b) ORDER BY a, b LIMIT n se resuelve con un range scan
+    op.create_index('ix_app_user_created_at_id', 'app_user', ['created_at', 'id'], unique=False)
+    op.create_index('ix_company_created_at_id', 'company', ['created_at', 'id'], unique=False)
+    # role no tiene created_at: se pagina por (name, id) dentro de la empresa
+    op.create_index('ix_role_company_id_name_id', 'role', ['company_id', 'name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_role_company_id_name_id', table_name='role')
+    op.drop_index('ix_company_created_at_id', table_name='company')
+    op.drop_index('ix_app_user_created_at_id', table_name='app_user')
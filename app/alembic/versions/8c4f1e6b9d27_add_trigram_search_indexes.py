@@ -0,0 +1,53 @@
+"""add_trigram_search_indexes
+
+Revision ID: 8c4f1e6b9d27
+Revises: 5b8e2d4c1a93
+Create Date: 2026-10-17 11:48:09.660213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f1e6b9d27'
+down_revision: Union[str, Sequence[str], None] = '5b8e2d4c1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (índice, tabla, columna) de la búsqueda por trigramas
+TRIGRAM_INDEXES = [
+    ('ix_app_user_name_trgm', 'app_user', 'name'),
+    ('ix_app_user_email_trgm', 'app_user', 'email'),
+    ('ix_company_name_trgm', 'company', 'name'),
+    ('ix_role_name_trgm', 'role', 'name'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CONCURRENTLY no bloquea escrituras en tablas grandes, pero no puede
+    # correr dentro de la transacción de la migración
+    with op.get_context().autocommit_block():
+        for index_name, table_name, column_name in TRIGRAM_INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                [column_name],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column_name: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in reversed(TRIGRAM_INDEXES):
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""add_company_user_listing_index
+
+Revision ID: a27d5c3e8f14
+Revises: 8c4f1e6b9d27
+Create Date: 2026-10-17 12:21:37.904518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a27d5c3e8f14'
+down_revision: Union[str, Sequence[str], None] = '8c4f1e6b9d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listado de usuarios de una empresa: company_id = :c [AND is_active = :a]
+    # ORDER BY created_at, user_id recorre solo las membresías de esa empresa
+    op.create_index(
+        'ix_company_user_company_id_is_active_created_at',
+        'company_user',
+        ['company_id', 'is_active', 'created_at', 'user_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_user_company_id_is_active_created_at', table_name='company_user')
@@ -0,0 +1,31 @@
+"""clear_email_outbox_content
+
+Revision ID: b7d3e5f9a2c6
+Revises: f3b8d6a1c572
+Create Date: 2026-10-17 18:42:37.206915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e5f9a2c6'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d6a1c572'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('email_outbox', 'html_content', existing_type=sa.Text(), nullable=True)
+    # Los emails ya entregados o descartados conservaban enlaces con tokens
+    op.execute("UPDATE email_outbox SET html_content = NULL WHERE status IN ('sent', 'failed')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE email_outbox SET html_content = '' WHERE html_content IS NULL")
+    op.alter_column('email_outbox', 'html_content', existing_type=sa.Text(), nullable=False)
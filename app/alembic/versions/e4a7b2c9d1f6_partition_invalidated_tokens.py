@@ -0,0 +1,115 @@
+"""partition_invalidated_tokens
+
+Revision ID: e4a7b2c9d1f6
+Revises: c91e4b7a2d58
+Create Date: 2026-10-17 15:10:22.581034
+
+"""
+from datetime import datetime, time, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7b2c9d1f6'
+down_revision: Union[str, Sequence[str], None] = 'c91e4b7a2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Particiones diarias creadas por la migración; después la aplicación las
+# mantiene según BLACKLIST_PARTITION_INTERVAL y BLACKLIST_PARTITIONS_AHEAD
+DAYS_AHEAD = 14
+
+COLUMNS = 'id, token_hash, user_id, company_id, invalidated_at, expires_at, token_type'
+
+INDEXES = [
+    ('ix_invalidated_tokens_company_id', ['company_id'], False),
+    ('ix_invalidated_tokens_expires_at', ['expires_at'], False),
+    ('ix_invalidated_tokens_invalidated_at', ['invalidated_at'], False),
+    ('ix_invalidated_tokens_token_hash', ['token_hash', 'expires_at'], True),
+    ('ix_invalidated_tokens_user_id', ['user_id'], False),
+]
+
+LEGACY_INDEXES = [
+    'ix_invalidated_tokens_company_id',
+    'ix_invalidated_tokens_expires_at',
+    'ix_invalidated_tokens_invalidated_at',
+    'ix_invalidated_tokens_token_hash',
+    'ix_invalidated_tokens_user_id',
+]
+
+
+def _create_table(partitioned: bool) -> None:
+    op.execute(f"""
+        CREATE TABLE invalidated_tokens (
+            id uuid DEFAULT gen_random_uuid() NOT NULL,
+            token_hash varchar(255) NOT NULL,
+            user_id uuid NOT NULL,
+            company_id uuid NULL,
+            invalidated_at timestamptz DEFAULT now() NOT NULL,
+            expires_at timestamptz NOT NULL,
+            token_type varchar(20) NOT NULL,
+            CONSTRAINT pk_invalidated_tokens PRIMARY KEY ({'id, expires_at' if partitioned else 'id'}),
+            CONSTRAINT fk_invalidated_tokens_company_id_company FOREIGN KEY (company_id) REFERENCES company(id),
+            CONSTRAINT fk_invalidated_tokens_user_id_app_user FOREIGN KEY (user_id) REFERENCES app_user(id)
+        ){' PARTITION BY RANGE (expires_at)' if partitioned else ''}
+    """)
+
+
+def _rename_legacy() -> None:
+    """Apartar la tabla actual liberando los nombres de sus índices y su clave primaria"""
+    op.rename_table('invalidated_tokens', 'invalidated_tokens_legacy')
+    for index_name in LEGACY_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {index_name}')
+    op.execute('ALTER TABLE invalidated_tokens_legacy DROP CONSTRAINT pk_invalidated_tokens')
+    op.execute('ALTER TABLE invalidated_tokens_legacy DROP CONSTRAINT fk_invalidated_tokens_company_id_company')
+    op.execute('ALTER TABLE invalidated_tokens_legacy DROP CONSTRAINT fk_invalidated_tokens_user_id_app_user')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_legacy()
+
+    _create_table(partitioned=True)
+    for index_name, columns, unique in INDEXES:
+        op.create_index(index_name, 'invalidated_tokens', columns, unique=unique)
+
+    op.execute('CREATE TABLE invalidated_tokens_default PARTITION OF invalidated_tokens DEFAULT')
+    today = datetime.combine(datetime.now(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+    for offset in range(DAYS_AHEAD + 1):
+        start = today + timedelta(days=offset)
+        end = start + timedelta(days=1)
+        op.execute(
+            f"CREATE TABLE invalidated_tokens_p{start:%Y%m%d} PARTITION OF invalidated_tokens "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+    # Los tokens ya expirados no se copian: no bloquean nada y solo ocupan espacio
+    op.execute(
+        f'INSERT INTO invalidated_tokens ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM invalidated_tokens_legacy WHERE expires_at > now()'
+    )
+    op.drop_table('invalidated_tokens_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_legacy()
+
+    _create_table(partitioned=False)
+    for index_name, columns, unique in INDEXES:
+        if index_name == 'ix_invalidated_tokens_token_hash':
+            columns = ['token_hash']
+        op.create_index(index_name, 'invalidated_tokens', columns, unique=unique)
+
+    # La tabla particionada admite el mismo token_hash con distinta expiración;
+    # el índice único sobre token_hash solo admite uno: se conserva el que más dura
+    op.execute(
+        f'INSERT INTO invalidated_tokens ({COLUMNS}) '
+        f'SELECT DISTINCT ON (token_hash) {COLUMNS} FROM invalidated_tokens_legacy '
+        f'ORDER BY token_hash, expires_at DESC'
+    )
+    # Elimina también todas las particiones
+    op.drop_table('invalidated_tokens_legacy')
@@ -0,0 +1,28 @@
+"""add_sessions_revoked_before_to_company_user
+
+Revision ID: f3b8d6a1c572
+Revises: e4a7b2c9d1f6
+Create Date: 2026-10-17 16:24:08.913527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d6a1c572'
+down_revision: Union[str, Sequence[str], None] = 'e4a7b2c9d1f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('company_user', sa.Column('sessions_revoked_before', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('company_user', 'sessions_revoked_before')
@@ -2,53 +2,141 @@
 Dependencias comunes para la API
 """
 
-from typing import Optional, List
+from typing import Optional, List, Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_request_db, run_db
 from app.models.user import AppUser
-from app.models.permission import Permission
-from app.models.user_role import UserRole
-from app.models.role_permission import RolePermission
+from app.models.company_user import CompanyUser
 from app.services.auth_service import AuthService
-from app.services.user_service import UserService
-from app.services.company_service import CompanyService
-from app.services.role_service import RoleService
+from app.services.async_services import (
+    AsyncAuthService,
+    AsyncUserService,
+    AsyncUserImportService,
+    AsyncCompanyService,
+    AsyncRoleService
+)
+from app.services.security_service import SecurityService
+from app.services.permission_cache import get_permission_cache
+from app.core.config import get_settings
+
+# Obtener configuración
+settings = get_settings()
 
 # Configurar seguridad HTTP Bearer
 security = HTTPBearer()
 
 
-def get_current_user(
+async def get_access_token_payload(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> AppUser:
+    db: Union[Session, AsyncSession] = Depends(get_request_db)
+) -> dict:
     """
-    Obtener usuario actual desde token JWT
+    Obtener el payload verificado del token de acceso
     
     Args:
         credentials: Credenciales del token
         db: Sesión de base de datos
         
     Returns:
-        Usuario actual
+        Payload del token
+        
+    Raises:
+        HTTPException: Si el token es inválido, expiró o está revocado
+    """
+    payload = await run_db(db, lambda session: SecurityService(session).verify_access_token(credentials.credentials))
+    
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return payload
+
+
+class AuthContext:
+    """
+    Contexto de autenticación de un request: payload verificado, usuario y
+    membresía en la empresa del token. Se construye una sola vez por request
+    (FastAPI cachea la dependencia) y lo comparten el resto de dependencias.
+    """
+    
+    def __init__(self, payload: dict, user: AppUser, company_user: CompanyUser):
+        self.payload = payload
+        self.user = user
+        self.company_user = company_user
+        self.company_id = str(company_user.company_id)
+        self.permissions: Optional[List[str]] = None
+
+
+async def get_auth_context(
+    payload: dict = Depends(get_access_token_payload),
+    db: Union[Session, AsyncSession] = Depends(get_request_db)
+) -> AuthContext:
+    """
+    Obtener el contexto de autenticación del request actual
+    
+    Args:
+        payload: Payload verificado del token de acceso
+        db: Sesión de base de datos
+        
+    Returns:
+        Contexto con payload, usuario y membresía
         
     Raises:
-        HTTPException: Si el token es inválido o el usuario no existe
+        HTTPException: Si el token no contiene company_id o el usuario no
+            pertenece activamente a la empresa
     """
-    auth_service = AuthService(db)
-    user = auth_service.get_current_user_from_token(credentials.credentials)
+    if not payload.get("company_id"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token no contiene company_id",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    membership = await run_db(
+        db,
+        lambda session: AuthService(session).get_active_membership(payload.get("user_id"), payload.get("company_id"))
+    )
+    
+    if not membership:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
-    if not user:
+    user, company_user = membership
+    
+    # Revocación por usuario y empresa (logout-all): sin consultas adicionales
+    if SecurityService.issued_before(payload, company_user.sessions_revoked_before):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return user
+    return AuthContext(payload, user, company_user)
+
+
+def get_current_user(
+    auth_context: AuthContext = Depends(get_auth_context)
+) -> AppUser:
+    """
+    Obtener usuario actual desde token JWT
+    
+    Args:
+        auth_context: Contexto de autenticación del request
+        
+    Returns:
+        Usuario actual
+    """
+    return auth_context.user
 
 
 def get_current_active_user(
@@ -76,85 +164,67 @@ def get_current_active_user(
 
 
 def get_current_company_id(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    auth_context: AuthContext = Depends(get_auth_context)
 ) -> str:
     """
     Obtener company_id del usuario actual desde token JWT
     
     Args:
-        credentials: Credenciales del token
-        db: Sesión de base de datos
+        auth_context: Contexto de autenticación del request
         
     Returns:
         company_id del usuario actual
-        
-    Raises:
-        HTTPException: Si el token es inválido o no contiene company_id
     """
-    auth_service = AuthService(db)
-    
-    try:
-        # Crear instancia de SecurityService con la sesión de BD
-        from app.services.security_service import SecurityService
-        security_service = SecurityService(db)
-        
-        # Verificar token (incluye verificación de blacklist)
-        payload = security_service.verify_access_token(credentials.credentials)
-        company_id = payload.get("company_id")
-        
-        if not company_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token no contiene company_id",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        return str(company_id)
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido o expirado",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    return auth_context.company_id
 
 
-def get_user_permissions(
-    current_user: AppUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_permissions(
+    auth_context: AuthContext = Depends(get_auth_context),
+    db: Union[Session, AsyncSession] = Depends(get_request_db)
 ) -> List[str]:
     """
-    Obtener permisos del usuario actual
+    Obtener permisos del usuario actual según settings.security.permission_mode:
+    
+    - token: usa el claim "permissions" firmado en el token
+    - cache: caché por (usuario, empresa) con TTL, invalidada por RoleService
+    - database: se consultan en cada request, limitadas a la empresa del token
+    
+    El resultado queda en el contexto, así que varias dependencias
+    require_permission en la misma ruta no repiten la resolución.
     
     Args:
-        current_user: Usuario actual
+        auth_context: Contexto de autenticación del request
         db: Sesión de base de datos
         
     Returns:
         Lista de nombres de permisos del usuario
     """
-    # Obtener roles del usuario
-    user_roles = (
-        db.query(UserRole)
-        .filter(UserRole.user_id == current_user.id)
-        .all()
-    )
+    if auth_context.permissions is not None:
+        return auth_context.permissions
     
-    # Obtener permisos de todos los roles del usuario
-    permissions = set()
-    for user_role in user_roles:
-        role_permissions = (
-            db.query(Permission)
-            .join(RolePermission, Permission.id == RolePermission.permission_id)
-            .filter(RolePermission.role_id == user_role.role_id)
-            .all()
-        )
+    permission_mode = settings.security.permission_mode
+    user_id = auth_context.user.id
+    company_id = auth_context.company_id
+    
+    if permission_mode == "token":
+        permissions = list(auth_context.payload.get("permissions") or [])
+    elif permission_mode == "cache":
+        permission_cache = get_permission_cache()
         
-        for permission in role_permissions:
-            permissions.add(permission.name)
+        permissions = permission_cache.get(user_id, company_id)
+        if permissions is None:
+            permissions = await run_db(
+                db, lambda session: AuthService(session).get_user_permissions(str(user_id), company_id)
+            )
+            permission_cache.set(user_id, company_id, permissions)
+    else:
+        # Solo los roles de la empresa del token
+        permissions = await run_db(
+            db, lambda session: AuthService(session).get_user_permissions(str(user_id), company_id)
+        )
     
-    return list(permissions)
+    auth_context.permissions = permissions
+    return permissions
 
 
 def require_permission(permission_name: str):
@@ -180,25 +250,25 @@ def require_permission(permission_name: str):
     return permission_dependency
 
 
-# Dependencias de servicios
-def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
-    try:
-        return AuthService(db)
-    except Exception as e:
-        db.rollback()
-        raise e
+# Dependencias de servicios (fachadas async sobre la sesión de la request)
+def get_auth_service(db: Union[Session, AsyncSession] = Depends(get_request_db)) -> AsyncAuthService:
+    return AsyncAuthService(db)
+
+
+def get_user_service(db: Union[Session, AsyncSession] = Depends(get_request_db)) -> AsyncUserService:
+    return AsyncUserService(db)
 
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
-    return UserService(db)
+def get_user_import_service(db: Union[Session, AsyncSession] = Depends(get_request_db)) -> AsyncUserImportService:
+    return AsyncUserImportService(db)
 
 
-def get_company_service(db: Session = Depends(get_db)) -> CompanyService:
-    return CompanyService(db)
+def get_company_service(db: Union[Session, AsyncSession] = Depends(get_request_db)) -> AsyncCompanyService:
+    return AsyncCompanyService(db)
 
 
-def get_role_service(db: Session = Depends(get_db)) -> RoleService:
-    return RoleService(db)
+def get_role_service(db: Union[Session, AsyncSession] = Depends(get_request_db)) -> AsyncRoleService:
+    return AsyncRoleService(db)
 
 
 # Dependencias de permisos específicos
@@ -2,31 +2,53 @@
 Endpoints de administración del sistema
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, get_user_permissions
 from app.models.user import AppUser
 from app.services.cleanup_service import CleanupService
+from app.services.blacklist_cache import get_blacklist_cache
+from app.services.maintenance_scheduler import get_maintenance_scheduler
 
 router = APIRouter()
 
 
 @router.get("/blacklist/stats", summary="Estadísticas de la blacklist")
 async def get_blacklist_stats(
+    count: str = Query("exact", pattern="^(exact|estimated)$", description="exact (una pasada) o estimated (planificador)"),
+    by_company: bool = Query(False, description="Incluir el desglose por empresa (solo exact, requiere system:admin)"),
     current_user: AppUser = Depends(get_current_user),
+    permissions: List[str] = Depends(get_user_permissions),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
-    Obtener estadísticas de la blacklist de tokens
+    Obtener estadísticas de la blacklist de tokens por tipo
+    
+    Args:
+        count: exact cuenta en una sola consulta; estimated usa las
+            estadísticas del planificador, para blacklists muy grandes
+        by_company: Incluir el desglose por empresa; expone los ids y el
+            volumen de revocaciones de todas las empresas, así que solo
+            está disponible con el permiso system:admin
     
     Returns:
         Estadísticas de la blacklist
+    
+    Raises:
+        HTTPException: 403 si se pide el desglose sin system:admin
     """
+    if by_company and "system:admin" not in permissions:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permiso requerido: system:admin"
+        )
+    
     try:
         cleanup_service = CleanupService(db)
-        stats = cleanup_service.get_blacklist_stats()
+        stats = await run_in_threadpool(cleanup_service.get_blacklist_stats, count, by_company)
         
         if not stats:
             raise HTTPException(
@@ -34,6 +56,9 @@ async def get_blacklist_stats(
                 detail="No se pudieron obtener estadísticas"
             )
         
+        blacklist_cache = get_blacklist_cache()
+        stats["cache"] = blacklist_cache.stats() if blacklist_cache else {"enabled": False}
+        
         return stats
         
     except Exception as e:
@@ -43,24 +68,72 @@ async def get_blacklist_stats(
         )
 
 
+@router.get("/blacklist/filter/stats", summary="Estadísticas del filtro de la blacklist")
+async def get_blacklist_filter_stats(
+    current_user: AppUser = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Obtener estadísticas del filtro de Bloom de tokens revocados,
+    incluida la tasa de falsos positivos estimada y observada
+    
+    Returns:
+        Estadísticas del filtro
+    """
+    blacklist_cache = get_blacklist_cache()
+    if blacklist_cache is None:
+        return {"enabled": False, "built": False}
+    
+    return blacklist_cache.filter_stats()
+
+
+@router.get("/maintenance/stats", summary="Estado del mantenimiento programado")
+async def get_maintenance_stats(
+    current_user: AppUser = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Obtener el estado de las tareas de mantenimiento de esta réplica:
+    última ejecución, duración, filas eliminadas y ejecuciones saltadas
+    porque otra réplica tenía el lock
+    
+    Returns:
+        Estadísticas por tarea
+    """
+    return get_maintenance_scheduler().stats()
+
+
 @router.post("/blacklist/cleanup/expired", summary="Limpiar tokens expirados")
 async def cleanup_expired_tokens(
+    batch_size: Optional[int] = Query(None, ge=1, le=50_000, description="Tokens por lote"),
+    time_budget_seconds: Optional[float] = Query(None, gt=0, le=600, description="Tiempo máximo de la limpieza"),
     current_user: AppUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
-    Limpiar tokens expirados de la blacklist
+    Limpiar tokens expirados de la blacklist por lotes.
+    Si se agota el tiempo, completado es False y se puede volver a llamar.
     
+    Args:
+        batch_size: Tokens por lote (por defecto CLEANUP_BATCH_SIZE)
+        time_budget_seconds: Tiempo máximo (por defecto CLEANUP_TIME_BUDGET_SECONDS)
+        
     Returns:
-        Resultado de la limpieza
+        Resultado de la limpieza con el progreso por lotes
     """
     try:
         cleanup_service = CleanupService(db)
-        count = cleanup_service.cleanup_expired_tokens()
+        # Lotes con commit y pausas: fuera del event loop
+        result = await run_in_threadpool(
+            cleanup_service.cleanup_expired_tokens,
+            batch_size=batch_size,
+            time_budget_seconds=time_budget_seconds
+        )
         
         return {
-            "message": "Limpieza completada",
-            "tokens_eliminados": count,
+            "message": "Limpieza completada" if result["completed"] else "Limpieza parcial, quedan tokens por eliminar",
+            "tokens_eliminados": result["deleted"],
+            "lotes": result["batches"],
+            "segundos": result["elapsed_seconds"],
+            "completado": result["completed"],
             "status": "success"
         }
         
@@ -74,6 +147,8 @@ async def cleanup_expired_tokens(
 @router.post("/blacklist/cleanup/old", summary="Limpiar tokens antiguos")
 async def cleanup_old_tokens(
     days: int = 30,
+    batch_size: Optional[int] = Query(None, ge=1, le=50_000, description="Tokens por lote"),
+    time_budget_seconds: Optional[float] = Query(None, gt=0, le=600, description="Tiempo máximo de la limpieza"),
     current_user: AppUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -82,9 +157,11 @@ async def cleanup_old_tokens(
     
     Args:
         days: Número de días para considerar un token como antiguo
+        batch_size: Tokens por lote (por defecto CLEANUP_BATCH_SIZE)
+        time_budget_seconds: Tiempo máximo (por defecto CLEANUP_TIME_BUDGET_SECONDS)
         
     Returns:
-        Resultado de la limpieza
+        Resultado de la limpieza con el progreso por lotes
     """
     try:
         if days < 1:
@@ -94,15 +171,25 @@ async def cleanup_old_tokens(
             )
         
         cleanup_service = CleanupService(db)
-        count = cleanup_service.cleanup_old_tokens(days)
+        result = await run_in_threadpool(
+            cleanup_service.cleanup_old_tokens,
+            days,
+            batch_size=batch_size,
+            time_budget_seconds=time_budget_seconds
+        )
         
         return {
-            "message": "Limpieza completada",
-            "tokens_eliminados": count,
+            "message": "Limpieza completada" if result["completed"] else "Limpieza parcial, quedan tokens por eliminar",
+            "tokens_eliminados": result["deleted"],
+            "lotes": result["batches"],
+            "segundos": result["elapsed_seconds"],
+            "completado": result["completed"],
             "dias_limite": days,
             "status": "success"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
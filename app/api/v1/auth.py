@@ -5,7 +5,7 @@ Rutas de autenticación - Login, logout, refresh token
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_auth_service, get_current_user,get_current_company_id
+from app.api.deps import get_db, get_auth_service, get_current_user,get_current_company_id, get_auth_context, AuthContext
 from app.schemas.auth import (
     LoginRequest, 
     Token, 
@@ -41,7 +41,8 @@ async def login(
     Returns:
         Token con access_token y refresh_token
     """
-    return auth_service.login(login_data)
+    # bcrypt y las consultas corren fuera del event loop
+    return await auth_service.login(login_data)
 
 
 @router.post("/refresh", response_model=Token, summary="Refrescar token")
@@ -57,7 +58,7 @@ async def refresh_token(
     Returns:
         Nuevo token de acceso
     """
-    return auth_service.refresh_token(refresh_data.refresh_token)
+    return await auth_service.refresh_token(refresh_data.refresh_token)
 
 
 @router.post("/logout", response_model=SuccessResponse, summary="Cerrar sesión")
@@ -74,7 +75,7 @@ async def logout(
     Returns:
         Confirmación de logout
     """
-    success = auth_service.logout(logout_data.refresh_token, logout_data.access_token)
+    success = await auth_service.logout(logout_data.refresh_token, logout_data.access_token)
     
     return SuccessResponse(
         message="Sesión cerrada correctamente",
@@ -82,9 +83,35 @@ async def logout(
     )
 
 
+@router.post("/logout-all", response_model=SuccessResponse, summary="Cerrar todas las sesiones")
+async def logout_all(
+    all_companies: bool = False,
+    auth_context: AuthContext = Depends(get_auth_context),
+    auth_service = Depends(get_auth_service)
+):
+    """
+    Cerrar todas las sesiones del usuario actual
+    
+    - **all_companies**: Cerrar también las sesiones en el resto de sus empresas
+    
+    Returns:
+        Confirmación con el número de membresías afectadas
+    """
+    updated = await auth_service.logout_all(
+        str(auth_context.user.id),
+        None if all_companies else auth_context.company_id
+    )
+    
+    return SuccessResponse(
+        message="Todas las sesiones fueron cerradas",
+        data={"memberships": updated}
+    )
+
+
 @router.get("/me", summary="Obtener usuario actual")
 async def get_current_user_info(
-    current_user: AppUser = Depends(get_current_user)
+    auth_context: AuthContext = Depends(get_auth_context),
+    auth_service = Depends(get_auth_service)
 ):
     """
     Obtener información del usuario actual
@@ -92,17 +119,8 @@ async def get_current_user_info(
     Returns:
         Información del usuario autenticado
     """
- 
-    return {
-        "id": str(current_user.id),
-        "company_id": str(current_user.companies[0].company_id),
-        "company_name": current_user.companies[0].company.name,
-        "roles": [user_role.role.name for user_role in current_user.roles], 
-        "email": current_user.email,
-        "name": current_user.name,
-        "is_active": current_user.companies[0].company.is_active,
-        "created_at": current_user.created_at
-    }
+    # Sin relaciones perezosas: con AsyncSession no pueden cargarse fuera de run_sync
+    return await auth_service.get_user_profile(auth_context.user, auth_context.company_id)
 
 
 @router.post("/password-reset", response_model=SuccessResponse, summary="Solicitar reset de contraseña")
@@ -119,7 +137,7 @@ async def request_password_reset(
         Confirmación de solicitud
     """
     try:
-        success = auth_service.request_password_reset(reset_data.email,reset_data.company_name)
+        success = await auth_service.request_password_reset(reset_data.email,reset_data.company_name)
         
         if success:
             return SuccessResponse(
@@ -153,7 +171,7 @@ async def confirm_password_reset(
         Confirmación de cambio de contraseña
     """
     try:
-        success, error_message = auth_service.confirm_password_reset(
+        success, error_message = await auth_service.confirm_password_reset(
             confirm_data.token, 
             confirm_data.new_password
         )
@@ -211,7 +229,7 @@ async def validate_password_reset_token(
         Información del usuario si el token es válido
     """
     try:
-        validation_result = auth_service.validate_password_reset_token(token)
+        validation_result = await auth_service.validate_password_reset_token(token)
         
         if validation_result:
             user_info, expires_at = validation_result
@@ -252,7 +270,7 @@ async def request_email_verification(
         Confirmación de solicitud
     """
     try:
-        success = auth_service.request_email_verification(verification_data.email,company_id)
+        success = await auth_service.request_email_verification(verification_data.email,company_id)
         
         if success:
             return SuccessResponse(
@@ -285,7 +303,7 @@ async def confirm_email_verification(
         Confirmación de verificación
     """
     try:
-        success = auth_service.confirm_email_verification(confirm_data.token)
+        success = await auth_service.confirm_email_verification(confirm_data.token)
         
         if success:
             return SuccessResponse(
@@ -318,13 +336,15 @@ async def encrypt_string(
         String encriptado que puede usarse como contraseña
     """
     try:
-        encrypted_string = auth_service.encrypt_string(encrypt_data.plain_string)
+        encrypted_string = await auth_service.encrypt_string(encrypt_data.plain_string)
         
         return EncryptStringResponse(
             encrypted_string=encrypted_string,
             message="String encriptado correctamente"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
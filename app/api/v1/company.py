@@ -2,8 +2,10 @@
 Rutas de empresas - CRUD y gestión de empresas
 """
 
+import uuid
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import (
@@ -25,6 +27,10 @@ from app.schemas.company import (
 )
 from app.schemas.response import SuccessResponse
 from app.models.user import AppUser
+from app.services.company_service import iter_company_users_export
+
+# Content-Type de cada formato de export
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
 
 router = APIRouter()
 
@@ -44,7 +50,7 @@ async def create_company(
     Returns:
         Empresa creada
     """
-    company = company_service.create_company(company_data)
+    company = await company_service.create_company(company_data)
     return company
 
 
@@ -73,7 +79,7 @@ async def create_company_with_user(
     Returns:
         IDs de la empresa, usuario y rol admin creados
     """
-    result = company_service.create_company_with_user(
+    result = await company_service.create_company_with_user(
         company_name=data.company_name,
         user_name=data.user_name,
         user_email=data.user_email
@@ -83,32 +89,41 @@ async def create_company_with_user(
 
 @router.get("/", response_model=CompanyList, summary="Listar empresas")
 async def get_companies(
-    skip: int = Query(0, ge=0, description="Registros a saltar"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Registros a saltar (usar cursor)"),
     limit: int = Query(10, ge=1, le=100, description="Límite de registros"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated)$", description="Incluir total: exact o estimated"),
     search: Optional[str] = Query(None, description="Término de búsqueda"),
+    search_mode: str = Query("contains", pattern="^(contains|similar)$", description="contains (subcadena) o similar (similitud)"),
     company_service = Depends(get_company_service)
 ):
     """
     Obtener lista de empresas con filtros
     
-    - **skip**: Número de registros a saltar
+    - **skip**: Número de registros a saltar (obsoleto, usar cursor)
     - **limit**: Límite de registros (máximo 100)
+    - **cursor**: Cursor devuelto en next_cursor de la página anterior
+    - **count**: exact (COUNT) o estimated (estadísticas de PostgreSQL) para incluir el total
     - **search**: Término de búsqueda en nombre
+    - **search_mode**: contains (subcadena) o similar (ordenado por similitud, sin cursor)
     
     Returns:
         Lista paginada de empresas
     """
-    companies = company_service.get_companies(skip=skip, limit=limit, search=search)
+    if skip and not cursor:
+        companies = await company_service.get_companies(skip=skip, limit=limit, search=search)
+        return CompanyList(companies=companies, page=(skip // limit) + 1, size=limit)
     
-    # En una implementación real, aquí se calcularía el total
-    total = len(companies)  # Placeholder
+    page = await company_service.get_companies_page(
+        limit=limit, cursor=cursor, search=search, count=count, search_mode=search_mode
+    )
     
     return CompanyList(
-        companies=companies,
-        total=total,
-        page=(skip // limit) + 1,
+        companies=page.items,
+        total=page.total,
         size=limit,
-        pages=(total + limit - 1) // limit
+        pages=(page.total + limit - 1) // limit if page.total is not None else None,
+        next_cursor=page.next_cursor
     )
 
 
@@ -126,7 +141,7 @@ async def get_company(
     Returns:
         Información de la empresa
     """
-    company = company_service.get_company_by_id(company_id)
+    company = await company_service.get_company_by_id(company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -151,7 +166,7 @@ async def update_company(
     Returns:
         Empresa actualizada
     """
-    company = company_service.update_company(company_id, company_data)
+    company = await company_service.update_company(company_id, company_data)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,7 +189,7 @@ async def delete_company(
     Returns:
         Confirmación de eliminación
     """
-    success = company_service.delete_company(company_id)
+    success = await company_service.delete_company(company_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -200,7 +215,7 @@ async def add_user_to_company(
         Confirmación de asignación
     """
     try:
-        company_service.add_user_to_company(company_id, user_id)
+        await company_service.add_user_to_company(company_id, user_id)
         return SuccessResponse(message="Usuario agregado a la empresa correctamente")
     except HTTPException:
         raise
@@ -227,7 +242,7 @@ async def remove_user_from_company(
     Returns:
         Confirmación de remoción
     """
-    success = company_service.remove_user_from_company(company_id, user_id)
+    success = await company_service.remove_user_from_company(company_id, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -239,6 +254,9 @@ async def remove_user_from_company(
 @router.get("/{company_id}/users", summary="Obtener usuarios de empresa")
 async def get_company_users(
     company_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Tamaño de página (sin él se devuelven todos)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    is_active: Optional[bool] = Query(None, description="Filtrar por estado de la membresía"),
     company_service = Depends(get_company_service),
     _: bool = Depends(require_company_read)
 ):
@@ -246,9 +264,43 @@ async def get_company_users(
     Obtener usuarios de una empresa
     
     - **company_id**: ID de la empresa
+    - **limit**: Tamaño de página; para empresas grandes usar paginación o /users/export
+    - **cursor**: Cursor devuelto en next_cursor de la página anterior
+    - **is_active**: Filtrar por estado de la membresía
     
     Returns:
         Lista de usuarios de la empresa
     """
-    users = company_service.get_company_users(company_id)
-    return {"users": users}
+    if limit is None and cursor is None and is_active is None:
+        users = await company_service.get_company_users(company_id)
+        return {"users": users, "next_cursor": None}
+    
+    page = await company_service.get_company_users_page(
+        company_id, limit=limit or 100, cursor=cursor, is_active=is_active
+    )
+    return {"users": page.items, "next_cursor": page.next_cursor}
+
+
+@router.get("/{company_id}/users/export", summary="Exportar usuarios de empresa")
+async def export_company_users(
+    company_id: uuid.UUID,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Formato: ndjson o csv"),
+    _: bool = Depends(require_company_read)
+):
+    """
+    Exportar todos los usuarios de una empresa con sus roles
+    
+    - **company_id**: ID de la empresa
+    - **format**: ndjson (un objeto por línea) o csv (roles separados por |)
+    
+    La respuesta se genera mientras se lee la base de datos, sin cargar la
+    empresa completa en memoria.
+    
+    Returns:
+        Archivo NDJSON o CSV
+    """
+    return StreamingResponse(
+        iter_company_users_export(str(company_id), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="company_{company_id}_users.{format}"'}
+    )
@@ -3,7 +3,7 @@ Rutas de roles y permisos - Gestión de roles y permisos
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session
 
 from app.api.deps import (
@@ -24,7 +24,9 @@ from app.schemas.role import (
     RoleUpdate, 
     RoleList,
     UserRoleCreate,
-    UserRoleRead
+    UserRoleRead,
+    UserRoleBulkRequest,
+    UserRoleBulkResult
 )
 from app.schemas.permission import PermissionRead, PermissionList
 from app.schemas.response import SuccessResponse
@@ -53,16 +55,18 @@ async def create_role(
         Rol creado
     """
     role_data.company_id = company_id
-    role = role_service.create_role(role_data)
+    role = await role_service.create_role(role_data)
     return role
 
 
 @router.get("/", response_model=RoleList, summary="Listar roles")
 async def get_roles(
-    skip: int = Query(0, ge=0, description="Registros a saltar"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Registros a saltar (usar cursor)"),
     limit: int = Query(10, ge=1, le=100, description="Límite de registros"),
-   
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated)$", description="Incluir total: exact o estimated"),
     search: Optional[str] = Query(None, description="Término de búsqueda"),
+    search_mode: str = Query("contains", pattern="^(contains|similar)$", description="contains (subcadena) o similar (similitud)"),
     role_service = Depends(get_role_service),
     company_id: str = Depends(get_current_company_id),
     _: bool = Depends(require_role_read)
@@ -70,47 +74,63 @@ async def get_roles(
     """
     Obtener lista de roles con filtros
     
-    - **skip**: Número de registros a saltar
+    - **skip**: Número de registros a saltar (obsoleto, usar cursor)
     - **limit**: Límite de registros (máximo 100)    
+    - **cursor**: Cursor devuelto en next_cursor de la página anterior
+    - **count**: exact (COUNT) o estimated (estadísticas de PostgreSQL) para incluir el total
     - **search**: Término de búsqueda en nombre
+    - **search_mode**: contains (subcadena) o similar (ordenado por similitud, sin cursor)
     
     Returns:
         Lista paginada de roles
     """
-    roles = role_service.get_roles(
-        skip=skip, 
-        limit=limit, 
-        company_id=company_id, 
-        search=search
-    )
+    if skip and not cursor:
+        roles = await role_service.get_roles(
+            skip=skip, 
+            limit=limit, 
+            company_id=company_id, 
+            search=search
+        )
+        return RoleList(roles=roles, page=(skip // limit) + 1, size=limit)
     
-    # En una implementación real, aquí se calcularía el total
-    total = len(roles)  # Placeholder
+    page = await role_service.get_roles_page(
+        limit=limit,
+        cursor=cursor,
+        company_id=company_id,
+        search=search,
+        count=count,
+        search_mode=search_mode
+    )
     
     return RoleList(
-        roles=roles,
-        total=total,
-        page=(skip // limit) + 1,
+        roles=page.items,
+        total=page.total,
         size=limit,
-        pages=(total + limit - 1) // limit
+        pages=(page.total + limit - 1) // limit if page.total is not None else None,
+        next_cursor=page.next_cursor
     )
 
 
 @router.get("/all_sections_with_permissions", 
 response_model=SuccessResponse, 
-summary="Listar secciones de secciones con permisos")
+summary="Listar secciones de secciones con permisos",
+responses={304: {"description": "El catálogo no cambió desde el ETag indicado"}})
 async def get_all_sections_with_permissions(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     role_service = Depends(get_role_service) ,
     _: bool = Depends(require_role_read)
 ):
     """
     Obtener l Lista de secciones con permisos   
 
+    El catálogo se sirve desde memoria con un ETag; si el cliente envía
+    If-None-Match con el ETag vigente se responde 304 sin cuerpo.
     
     Returns:
         Lista de secciones con permisos
     """
-    seccions= role_service.get_all_sections_with_permissions()
+    seccions, etag = await role_service.get_permission_catalog()
     
     if not seccions:
             raise HTTPException(
@@ -118,9 +138,21 @@ async def get_all_sections_with_permissions(
                 detail="El usuario no tiene asignado este rol"
             )
     
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+    
+    response.headers.update(cache_headers)
     return SuccessResponse(message="Secciones con permisos obtenidas correctamente", data=seccions)
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparar If-None-Match con el ETag (comparación débil, admite lista y '*')"""
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
 @router.get("/{role_id}", response_model=RoleRead, summary="Obtener rol")
 async def get_role(
     role_id: str,
@@ -135,7 +167,7 @@ async def get_role(
     Returns:
         Información del rol
     """
-    role = role_service.get_role_by_id(role_id)
+    role = await role_service.get_role_by_id(role_id)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -160,7 +192,7 @@ async def update_role(
     Returns:
         Rol actualizado
     """
-    role = role_service.update_role(role_id, role_data)
+    role = await role_service.update_role(role_id, role_data)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -183,7 +215,7 @@ async def delete_role(
     Returns:
         Confirmación de eliminación
     """
-    success = role_service.delete_role(role_id)
+    success = await role_service.delete_role(role_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -208,7 +240,7 @@ async def assign_role_to_user(
         Confirmación de asignación
     """
     try:
-        role_service.assign_role_to_user(assignment_data.user_id, assignment_data.role_id)
+        await role_service.assign_role_to_user(assignment_data.user_id, assignment_data.role_id)
         return SuccessResponse(message="Rol asignado correctamente")
     except HTTPException:
         raise
@@ -219,6 +251,50 @@ async def assign_role_to_user(
         )
 
 
+@router.post("/assign/bulk", response_model=UserRoleBulkResult, summary="Asignar roles en lote")
+async def assign_roles_bulk(
+    bulk_data: UserRoleBulkRequest,
+    role_service = Depends(get_role_service),
+    company_id: str = Depends(get_current_company_id),
+    _: bool = Depends(require_role_update)
+):
+    """
+    Asignar roles a usuarios de la empresa actual en una sola operación
+    
+    - **assignments**: Lista de pares {user_id, role_id}, o bien
+    - **role_id** + **user_ids**: Un rol para muchos usuarios
+    
+    Los pares ya asignados se ignoran. Si algún rol no es de la empresa o algún
+    usuario no es miembro, no se asigna ninguno.
+    
+    Returns:
+        Pares recibidos, asignados y sin cambios
+    """
+    return await role_service.assign_roles_bulk(bulk_data.pairs(), company_id)
+
+
+@router.post("/revoke/bulk", response_model=UserRoleBulkResult, summary="Revocar roles en lote")
+async def revoke_roles_bulk(
+    bulk_data: UserRoleBulkRequest,
+    role_service = Depends(get_role_service),
+    company_id: str = Depends(get_current_company_id),
+    _: bool = Depends(require_role_update)
+):
+    """
+    Revocar roles a usuarios de la empresa actual en una sola operación
+    
+    - **assignments**: Lista de pares {user_id, role_id}, o bien
+    - **role_id** + **user_ids**: Un rol para muchos usuarios
+    
+    Los pares que no estaban asignados se ignoran. Si algún rol no es de la
+    empresa, no se revoca ninguno; los roles de ex miembros sí se revocan.
+    
+    Returns:
+        Pares recibidos, revocados y sin cambios
+    """
+    return await role_service.revoke_roles_bulk(bulk_data.pairs(), company_id)
+
+
 @router.delete("/{role_id}/users/{user_id}", response_model=SuccessResponse, summary="Remover rol de usuario")
 async def remove_role_from_user(
     role_id: str,
@@ -235,7 +311,7 @@ async def remove_role_from_user(
     Returns:
         Confirmación de remoción
     """
-    success = role_service.remove_role_from_user(user_id, role_id)
+    success = await role_service.remove_role_from_user(user_id, role_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -258,7 +334,7 @@ async def get_user_roles(
     Returns:
         Lista de roles del usuario
     """
-    roles = role_service.get_user_roles(user_id)
+    roles = await role_service.get_user_roles(user_id)
     return {"roles": roles}
 
 
@@ -280,7 +356,7 @@ async def get_permissions(
     Returns:
         Lista paginada de permisos
     """
-    permissions = role_service.get_all_permissions()
+    permissions = await role_service.get_all_permissions()
     
     # En una implementación real, aquí se calcularía el total
     total = len(permissions)  # Placeholder
@@ -308,5 +384,5 @@ async def get_role_permissions(
     Returns:
         Lista de permisos del rol
     """
-    permissions = role_service.get_role_permissions(role_id)
+    permissions = await role_service.get_role_permissions(role_id)
     return {"permissions": permissions}
@@ -3,13 +3,14 @@ Rutas de usuarios - CRUD y gestión de usuarios
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 
 from app.api.deps import (
     get_current_user,
     get_db, 
     get_user_service, 
+    get_user_import_service,
     get_current_active_user,
     get_current_company_id,
     require_user_read,
@@ -23,8 +24,11 @@ from app.schemas.user import (
     UserUpdate, 
     UserList,
     UserPasswordChange,
-    UserWithRoles
+    UserWithRoles,
+    UserImportResult
 )
+from app.services.user_import_service import get_import_format
+from app.core.config import get_settings
 from app.schemas.response import SuccessResponse
 from app.models.user import AppUser
 
@@ -49,41 +53,91 @@ async def create_user(
     Returns:
         Usuario creado
     """
-    user = user_service.create_user(user_data)
+    user = await user_service.create_user(user_data)
     return user
 
 
+@router.post("/import", response_model=UserImportResult, summary="Importar usuarios en lote")
+async def import_users(
+    request: Request,
+    default_role: Optional[str] = Query(None, description="Rol para las filas sin columna role"),
+    import_service = Depends(get_user_import_service),
+    company_id: str = Depends(get_current_company_id),
+    _: bool = Depends(require_user_create)
+):
+    """
+    Importar usuarios en la empresa actual desde el cuerpo del request
+    
+    - **Content-Type: text/csv**: encabezado name,email,password[,role][,hashed_password]
+    - **Content-Type: application/x-ndjson**: un objeto JSON por línea con los mismos campos
+    - **default_role**: Rol para las filas que no lo indican
+    
+    El archivo se procesa por lotes mientras se recibe; las filas inválidas no
+    detienen la importación y se informan con su número de línea.
+    
+    Returns:
+        Totales de la importación y errores por fila
+    """
+    import_format = get_import_format(request.headers.get("content-type"))
+    
+    return await import_service.import_stream(
+        request.stream(),
+        import_format,
+        company_id,
+        batch_size=get_settings().security.user_import_batch_size,
+        default_role=default_role
+    )
+
+
 @router.get("/", response_model=UserList, summary="Listar usuarios")
 async def get_users(
-    skip: int = Query(0, ge=0, description="Registros a saltar"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Registros a saltar (usar cursor)"),
     limit: int = Query(10, ge=1, le=100, description="Límite de registros"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated)$", description="Incluir total: exact o estimated"),
     search: Optional[str] = Query(None, description="Término de búsqueda"),
+    search_mode: str = Query("contains", pattern="^(contains|similar)$", description="contains (subcadena) o similar (similitud)"),
     is_active: Optional[bool] = Query(None, description="Filtrar por estado activo"),
     user_service = Depends(get_user_service),
+    company_id: str = Depends(get_current_company_id),
     _: bool = Depends(require_user_read)
 ):
     """
-    Obtener lista de usuarios con filtros
+    Obtener lista de usuarios de la empresa actual con filtros
     
-    - **skip**: Número de registros a saltar
+    - **skip**: Número de registros a saltar (obsoleto, usar cursor)
     - **limit**: Límite de registros (máximo 100)
+    - **cursor**: Cursor devuelto en next_cursor de la página anterior
+    - **count**: exact (COUNT) o estimated (estadísticas de PostgreSQL) para incluir el total
     - **search**: Término de búsqueda en email, nombre
-    - **is_active**: Filtrar por estado activo
+    - **search_mode**: contains (subcadena) o similar (ordenado por similitud, sin cursor)
+    - **is_active**: Filtrar por estado activo de la membresía en la empresa
     
     Returns:
         Lista paginada de usuarios
     """
-    users = user_service.get_users(skip=skip, limit=limit, search=search, is_active=is_active)
+    if skip and not cursor:
+        users = await user_service.get_users(
+            skip=skip, limit=limit, search=search, is_active=is_active, company_id=company_id
+        )
+        return UserList(users=users, page=(skip // limit) + 1, size=limit)
     
-    # En una implementación real, aquí se calcularía el total
-    total = len(users)  # Placeholder
+    page = await user_service.get_users_page(
+        limit=limit,
+        cursor=cursor,
+        search=search,
+        is_active=is_active,
+        count=count,
+        search_mode=search_mode,
+        company_id=company_id
+    )
     
     return UserList(
-        users=users,
-        total=total,
-        page=(skip // limit) + 1,
+        users=page.items,
+        total=page.total,
         size=limit,
-        pages=(total + limit - 1) // limit
+        pages=(page.total + limit - 1) // limit if page.total is not None else None,
+        next_cursor=page.next_cursor
     )
 
 
@@ -98,7 +152,7 @@ async def get_my_companies(
     Returns:
         Lista de empresas del usuario
     """
-    companies = user_service.get_user_companies(str(current_user.id))
+    companies = await user_service.get_user_companies(str(current_user.id))
     return {"companies": companies}
 
 
@@ -116,7 +170,7 @@ async def get_user_companies(
     Returns:
         Lista de empresas del usuario
     """
-    companies = user_service.get_user_companies(user_id)
+    companies = await user_service.get_user_companies(user_id)
     return {"companies": companies}
 
 
@@ -135,7 +189,7 @@ async def get_user(
     Returns:
         Usuario encontrado con sus roles en la compañía
     """
-    user_data = user_service.get_user_by_id_with_company_roles(user_id,  company_id)
+    user_data = await user_service.get_user_by_id_with_company_roles(user_id,  company_id)
     if not user_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -163,7 +217,7 @@ async def update_user(
     """
 
 
-    user = user_service.update_user(user_id, user_data,company_id)
+    user = await user_service.update_user(user_id, user_data,company_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -187,7 +241,7 @@ async def delete_user(
     Returns:
         Confirmación de eliminación
     """
-    success = user_service.delete_user(user_id, company_id)
+    success = await user_service.delete_user(user_id, company_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -226,7 +280,7 @@ async def change_password(
             detail="Las contraseñas no coinciden"
         )
     
-    success = user_service.change_password(
+    success = await user_service.change_password(
         user_id, 
         password_data.current_password, 
         password_data.new_password
@@ -257,7 +311,7 @@ async def activate_user(
         Usuario actualizado
     """
 
-    success = user_service.activate_user(user_id, company_id)
+    success = await user_service.activate_user(user_id, company_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -7,6 +7,10 @@ from .logging import setup_logging, get_logger
 from .security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    password_hasher,
+    import_password_hasher,
     validate_password_strength,
     sanitize_input,
     validate_email
@@ -27,6 +31,10 @@ __all__ = [
     # Seguridad
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
+    "password_hasher",
+    "import_password_hasher",
     "validate_password_strength",
     "sanitize_input",
     "validate_email"
@@ -0,0 +1,89 @@
+"""
+Filtro de Bloom para pruebas de pertenencia probabilísticas
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre un bytearray.
+
+    Si contains() retorna False el elemento nunca fue agregado; si retorna True
+    el elemento probablemente fue agregado (con la tasa de falsos positivos
+    configurada mientras no se supere la capacidad).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity < 1:
+            capacity = 1
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate debe estar entre 0 y 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        """Posiciones de bits del elemento (doble hashing de Kirsch-Mitzenmacher)"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, item: str) -> None:
+        """
+        Agregar un elemento al filtro
+
+        Args:
+            item: Elemento a agregar
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains(self, item: str) -> bool:
+        """
+        Verificar si un elemento puede estar en el filtro
+
+        Args:
+            item: Elemento a verificar
+
+        Returns:
+            False si el elemento seguro no está, True si probablemente está
+        """
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains(item)
+
+    def fill_ratio(self) -> float:
+        """Proporción de bits en 1"""
+        return int.from_bytes(self._bits, "big").bit_count() / self.size_bits
+
+    def estimated_false_positive_rate(self) -> float:
+        """Tasa de falsos positivos estimada a partir de los bits ocupados"""
+        return self.fill_ratio() ** self.hash_count
+
+    def stats(self) -> dict:
+        """
+        Obtener estadísticas del filtro
+
+        Returns:
+            Diccionario con estadísticas
+        """
+        return {
+            "capacity": self.capacity,
+            "items": self.count,
+            "size_bits": self.size_bits,
+            "size_bytes": len(self._bits),
+            "hash_functions": self.hash_count,
+            "target_false_positive_rate": self.error_rate,
+            "fill_ratio": round(self.fill_ratio(), 6),
+            "estimated_false_positive_rate": self.estimated_false_positive_rate()
+        }
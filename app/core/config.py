@@ -32,6 +32,16 @@ class DatabaseSettings(BaseSettings):
         alias="DATABASE_MAX_OVERFLOW",
         description="Máximo overflow del pool"
     )
+    async_enabled: bool = Field(
+        default=False,
+        alias="DATABASE_ASYNC_ENABLED",
+        description="Usar AsyncSession (asyncpg) en los endpoints de la API"
+    )
+    async_url: Optional[str] = Field(
+        default=None,
+        alias="DATABASE_ASYNC_URL",
+        description="URL para el engine async; por defecto se deriva de DATABASE_URL con asyncpg"
+    )
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -60,6 +70,144 @@ class SecuritySettings(BaseSettings):
         default=7,
         description="Tiempo de expiración del refresh token en días"
     )
+    blacklist_cache_enabled: bool = Field(
+        default=True,
+        description="Mantener en memoria los hashes de tokens revocados"
+    )
+    blacklist_cache_max_size: int = Field(
+        default=100_000,
+        description="Número máximo de hashes revocados en la caché en memoria"
+    )
+    blacklist_cache_refresh_seconds: int = Field(
+        default=5,
+        description="Intervalo para traer revocaciones nuevas desde invalidated_tokens"
+    )
+    blacklist_filter_enabled: bool = Field(
+        default=True,
+        description="Usar un filtro de Bloom para descartar tokens no revocados sin ir a la BD"
+    )
+    blacklist_filter_capacity: int = Field(
+        default=100_000,
+        description="Capacidad mínima del filtro de Bloom de tokens revocados"
+    )
+    blacklist_filter_error_rate: float = Field(
+        default=0.01,
+        description="Tasa objetivo de falsos positivos del filtro de Bloom"
+    )
+    blacklist_filter_rebuild_seconds: int = Field(
+        default=3600,
+        description="Intervalo de reconstrucción del filtro desde invalidated_tokens"
+    )
+    cleanup_batch_size: int = Field(
+        default=5000,
+        ge=1,
+        description="Tokens eliminados por lote (y por commit) en la limpieza de la blacklist"
+    )
+    cleanup_time_budget_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="Tiempo máximo de una limpieza; al agotarse se detiene entre lotes (0 = sin límite)"
+    )
+    cleanup_batch_pause_seconds: float = Field(
+        default=0.05,
+        ge=0,
+        description="Pausa entre lotes de la limpieza para no saturar la BD"
+    )
+    blacklist_partition_interval: str = Field(
+        default="day",
+        pattern="^(day|week)$",
+        description="Rango de expires_at de cada partición de invalidated_tokens (PostgreSQL)"
+    )
+    blacklist_partitions_ahead: int = Field(
+        default=14,
+        ge=1,
+        description="Particiones futuras que se mantienen creadas; deben cubrir la vida del refresh token"
+    )
+    blacklist_partition_purge_mode: str = Field(
+        default="drop",
+        pattern="^(drop|detach)$",
+        description="Qué hacer con las particiones expiradas: 'drop' las elimina, 'detach' las conserva como tablas sueltas"
+    )
+    maintenance_scheduler_enabled: bool = Field(
+        default=True,
+        description="Ejecutar la limpieza de la blacklist y las particiones desde la aplicación (sin cron externo)"
+    )
+    maintenance_cleanup_expired_seconds: int = Field(
+        default=900,
+        ge=0,
+        description="Intervalo de la limpieza de tokens expirados (0 = deshabilitada)"
+    )
+    maintenance_cleanup_old_seconds: int = Field(
+        default=86400,
+        ge=0,
+        description="Intervalo de la limpieza de tokens antiguos (0 = deshabilitada)"
+    )
+    maintenance_cleanup_old_days: int = Field(
+        default=30,
+        ge=1,
+        description="Antigüedad en días de los tokens que elimina la limpieza de tokens antiguos"
+    )
+    maintenance_partitions_seconds: int = Field(
+        default=3600,
+        ge=0,
+        description="Intervalo de creación por adelantado de particiones de invalidated_tokens (0 = deshabilitada)"
+    )
+    maintenance_email_outbox_seconds: int = Field(
+        default=3600,
+        ge=0,
+        description="Intervalo de la limpieza de emails enviados o fallidos de email_outbox (0 = deshabilitada)"
+    )
+    maintenance_email_outbox_days: int = Field(
+        default=7,
+        ge=1,
+        description="Antigüedad en días de los emails enviados o fallidos que elimina la limpieza de email_outbox"
+    )
+    permission_mode: str = Field(
+        default="database",
+        pattern="^(database|token|cache)$",
+        description=(
+            "Origen de los permisos en require_permission: 'database' (consulta por request), "
+            "'token' (claim firmado, vigente hasta que expire el token) o "
+            "'cache' (caché por usuario/empresa con TTL)"
+        )
+    )
+    permission_cache_ttl_seconds: int = Field(
+        default=60,
+        description="TTL de la caché de permisos; acota la desactualización entre procesos"
+    )
+    permission_cache_max_size: int = Field(
+        default=10_000,
+        description="Número máximo de pares (usuario, empresa) en la caché de permisos"
+    )
+    permission_catalog_ttl_seconds: int = Field(
+        default=300,
+        description=(
+            "Vigencia máxima del catálogo de permisos en memoria; altas y bajas de "
+            "permisos se detectan antes con una consulta de versión"
+        )
+    )
+    password_hash_workers: int = Field(
+        default=4,
+        description="Hilos dedicados a hashear y verificar contraseñas con bcrypt"
+    )
+    password_hash_queue_size: int = Field(
+        default=64,
+        description="Operaciones bcrypt que pueden esperar un hilo libre antes de responder 503"
+    )
+    password_hash_retry_after_seconds: int = Field(
+        default=1,
+        description="Valor de Retry-After cuando la cola de bcrypt está llena"
+    )
+    user_import_batch_size: int = Field(
+        default=500,
+        ge=1,
+        description="Filas por lote (inserción y commit) en la importación masiva de usuarios"
+    )
+    user_import_hash_workers: int = Field(
+        default=4,
+        ge=1,
+        description="Hilos bcrypt de la importación masiva, separados del pool del login"
+    )
 
 
 class EmailSettings(BaseSettings):
@@ -115,6 +263,59 @@ class EmailSettings(BaseSettings):
         alias="EMAIL_VERIFICATION_URL",
         description="URL para confirmar verificación de email"
     )
+    smtp_timeout_seconds: float = Field(
+        default=10.0,
+        alias="SMTP_TIMEOUT_SECONDS",
+        description="Timeout de conexión y envío SMTP"
+    )
+    smtp_pool_size: int = Field(
+        default=2,
+        ge=1,
+        alias="SMTP_POOL_SIZE",
+        description="Conexiones SMTP abiertas que se reutilizan entre envíos"
+    )
+    smtp_idle_seconds: float = Field(
+        default=60.0,
+        alias="SMTP_IDLE_SECONDS",
+        description="Tiempo sin uso tras el que una conexión del pool se verifica con NOOP"
+    )
+    email_dispatcher_enabled: bool = Field(
+        default=True,
+        alias="EMAIL_DISPATCHER_ENABLED",
+        description="Enviar emails en segundo plano; si es False se envían dentro del request"
+    )
+    email_outbox_enabled: bool = Field(
+        default=True,
+        alias="EMAIL_OUTBOX_ENABLED",
+        description="Persistir la cola de emails en email_outbox para sobrevivir reinicios"
+    )
+    email_dispatcher_workers: int = Field(
+        default=2,
+        ge=1,
+        alias="EMAIL_DISPATCHER_WORKERS",
+        description="Envíos simultáneos del dispatcher"
+    )
+    email_max_attempts: int = Field(
+        default=5,
+        ge=1,
+        alias="EMAIL_MAX_ATTEMPTS",
+        description="Intentos de entrega antes de marcar un email como fallido"
+    )
+    email_retry_base_seconds: float = Field(
+        default=2.0,
+        alias="EMAIL_RETRY_BASE_SECONDS",
+        description="Espera antes del primer reintento; se duplica en cada intento"
+    )
+    email_retry_max_seconds: float = Field(
+        default=300.0,
+        alias="EMAIL_RETRY_MAX_SECONDS",
+        description="Espera máxima entre reintentos"
+    )
+    email_outbox_poll_seconds: float = Field(
+        default=30.0,
+        alias="EMAIL_OUTBOX_POLL_SECONDS",
+        description="Intervalo de lectura de email_outbox para reintentos y pendientes de otros procesos"
+    )
     
     # Configuración de Pydantic Settings
     model_config = SettingsConfigDict(
@@ -2,7 +2,11 @@
 Configuración de seguridad para la aplicación
 """
 
-from typing import Optional
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from app.core.config import get_settings
 
@@ -13,9 +17,136 @@ settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class PasswordHasherPool:
+    """
+    Pool acotado de hilos para bcrypt.
+
+    bcrypt libera el GIL mientras calcula, así que unos pocos hilos dedicados
+    sacan el trabajo del event loop y del threadpool general. El semáforo
+    limita las operaciones en curso más las encoladas; si se llena se responde
+    503 con Retry-After en lugar de acumular latencia.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after_seconds: int):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.retry_after_seconds = retry_after_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable, *args, block: bool = False) -> Future:
+        """
+        Encolar una operación bcrypt
+
+        Args:
+            fn: Función a ejecutar
+            *args: Argumentos de la función
+            block: Esperar un lugar en la cola en vez de responder 503
+
+        Returns:
+            Future con el resultado
+
+        Raises:
+            HTTPException: 503 si la cola está llena y block es False
+        """
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación saturado, intente nuevamente",
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash"
+                )
+            self._in_flight += 1
+            executor = self._executor
+
+        try:
+            return executor.submit(self._call, fn, args)
+        except Exception:
+            self._release()
+            raise
+
+    def _call(self, fn: Callable, args: tuple):
+        # El lugar se libera en el hilo del pool antes de publicar el resultado,
+        # así quien espera el Future ya puede volver a encolar sin recibir 503
+        try:
+            return fn(*args)
+        finally:
+            self._release()
+
+    def run(self, fn: Callable, *args):
+        """Ejecutar una operación en el pool y esperar el resultado"""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args):
+        """Ejecutar una operación en el pool sin bloquear el event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def map(self, fn: Callable, items: Iterable) -> List:
+        """
+        Aplicar fn a cada elemento en paralelo, esperando cola si está llena.
+        Pensado para lotes (importaciones); llamar desde un hilo.
+        """
+        futures = [self.submit(fn, item, block=True) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """Detener los hilos del pool (se recrean si se vuelve a usar)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """
+        Obtener estadísticas del pool
+
+        Returns:
+            Diccionario con estadísticas
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected
+            }
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+
+password_hasher = PasswordHasherPool(
+    workers=settings.security.password_hash_workers,
+    queue_size=settings.security.password_hash_queue_size,
+    retry_after_seconds=settings.security.password_hash_retry_after_seconds
+)
+
+# Pool propio de la importación masiva: un lote de miles de hashes no debe
+# llenar la cola del login y provocar 503 a usuarios que inician sesión
+import_password_hasher = PasswordHasherPool(
+    workers=settings.security.user_import_hash_workers,
+    queue_size=settings.security.user_import_hash_workers * 2,
+    retry_after_seconds=settings.security.password_hash_retry_after_seconds
+)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verificar contraseña contra su hash
+    Verificar contraseña contra su hash.
+    Se ejecuta en el pool de bcrypt; llamar desde un hilo, no desde el event loop.
     
     Args:
         plain_password: Contraseña en texto plano
@@ -23,21 +154,61 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         
     Returns:
         True si la contraseña es correcta
+        
+    Raises:
+        HTTPException: 503 si la cola de bcrypt está llena
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.run(pwd_context.verify, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """
-    Generar hash de contraseña
+    Generar hash de contraseña.
+    Se ejecuta en el pool de bcrypt; llamar desde un hilo, no desde el event loop.
     
     Args:
         password: Contraseña en texto plano
         
     Returns:
         Hash de la contraseña
+        
+    Raises:
+        HTTPException: 503 si la cola de bcrypt está llena
+    """
+    return password_hasher.run(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verificar contraseña contra su hash sin bloquear el event loop
+    
+    Args:
+        plain_password: Contraseña en texto plano
+        hashed_password: Hash de la contraseña
+        
+    Returns:
+        True si la contraseña es correcta
+        
+    Raises:
+        HTTPException: 503 si la cola de bcrypt está llena
+    """
+    return await password_hasher.run_async(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Generar hash de contraseña sin bloquear el event loop
+    
+    Args:
+        password: Contraseña en texto plano
+        
+    Returns:
+        Hash de la contraseña
+        
+    Raises:
+        HTTPException: 503 si la cola de bcrypt está llena
     """
-    return pwd_context.hash(password)
+    return await password_hasher.run_async(pwd_context.hash, password)
 
 
 def validate_password_strength(password: str) -> tuple[bool, Optional[str]]:
@@ -0,0 +1,40 @@
+"""
+Escrituras en bloque independientes del motor
+"""
+
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert_ignore_conflicts(db: Session, model, rows: List[Dict[str, Any]], index_elements: Sequence[str]) -> int:
+    """
+    Insertar filas en una sola sentencia descartando las que ya existen
+    (INSERT ... ON CONFLICT DO NOTHING)
+
+    Args:
+        db: Sesión de base de datos
+        model: Modelo destino
+        rows: Valores de cada fila
+        index_elements: Columnas de la restricción única a respetar
+
+    Returns:
+        Filas efectivamente insertadas
+
+    Raises:
+        NotImplementedError: Si el motor no es PostgreSQL ni SQLite
+    """
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(model).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(model).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+    else:
+        # INSERT IGNORE de MySQL también descarta errores que no son de unicidad
+        raise NotImplementedError(f"insert_ignore_conflicts no soporta el motor '{dialect}'")
+
+    return db.execute(statement).rowcount
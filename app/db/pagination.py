@@ -0,0 +1,166 @@
+"""
+Paginación por cursor (keyset) y conteo total opcional
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+
+class KeysetPage:
+    """Página de resultados con el cursor de la siguiente y el total opcional"""
+
+    def __init__(self, items: List[Any], next_cursor: Optional[str], total: Optional[int] = None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Codificar los valores de la clave de orden de una fila como cursor opaco
+
+    Args:
+        values: Valores de las columnas de orden
+
+    Returns:
+        Cursor en base64 url-safe
+    """
+    serialized = [
+        value.isoformat() if isinstance(value, datetime) else str(value) if isinstance(value, uuid.UUID) else value
+        for value in values
+    ]
+    raw = json.dumps(serialized, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """
+    Decodificar un cursor a los valores tipados de las columnas de orden
+
+    Args:
+        cursor: Cursor recibido del cliente
+        columns: Columnas de orden (para convertir cada valor a su tipo)
+
+    Returns:
+        Valores de la clave de orden
+
+    Raises:
+        HTTPException: Si el cursor no es válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cantidad de valores incorrecta")
+
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is uuid.UUID:
+                value = uuid.UUID(value)
+            decoded.append(value)
+        return decoded
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def paginate_keyset(
+    query: Query,
+    order_columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    key_of: Optional[Callable[[Any], Sequence[Any]]] = None
+) -> KeysetPage:
+    """
+    Paginar una consulta por cursor sobre una clave de orden única.
+
+    Usa una comparación de tuplas (a, b) > (:a, :b), que un índice compuesto
+    sobre las mismas columnas resuelve sin recorrer las páginas anteriores.
+
+    Args:
+        query: Consulta ya filtrada, sin ORDER BY ni LIMIT
+        order_columns: Columnas de orden; la última debe ser única (p. ej. id)
+        limit: Tamaño de página
+        cursor: Cursor de la página anterior (None para la primera)
+        key_of: Valores de la clave de orden de una fila, si no son atributos
+            de la fila con el nombre de cada columna (p. ej. columnas de un join)
+
+    Returns:
+        Página con los elementos y el cursor de la siguiente
+    """
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        query = query.filter(tuple_(*order_columns) > tuple_(*values))
+
+    rows = query.order_by(*order_columns).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    items = rows[:limit]
+
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        values = key_of(last) if key_of else [getattr(last, column.key) for column in order_columns]
+        next_cursor = encode_cursor(values)
+
+    return KeysetPage(items, next_cursor)
+
+
+def count_total(db: Session, query: Query, mode: Optional[str], table_name: str, filtered: bool) -> Optional[int]:
+    """
+    Contar el total de resultados de una consulta según el modo pedido
+
+    - None: no se cuenta
+    - exact: COUNT(*) sobre la consulta filtrada
+    - estimated: en PostgreSQL, pg_class.reltuples si no hay filtros o la
+      estimación del planificador (EXPLAIN) si los hay; en otros motores, exact
+
+    Args:
+        db: Sesión de base de datos
+        query: Consulta filtrada, sin paginar
+        mode: None, "exact" o "estimated"
+        table_name: Tabla principal de la consulta (para reltuples)
+        filtered: Si la consulta tiene filtros además de la tabla completa
+
+    Returns:
+        Total (exacto o estimado) o None si no se pidió
+    """
+    if mode is None:
+        return None
+
+    if mode == "estimated" and db.get_bind().dialect.name == "postgresql":
+        if not filtered:
+            reltuples = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+                {"table_name": table_name}
+            ).scalar()
+            # reltuples = -1 si la tabla nunca fue analizada
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples)
+        else:
+            try:
+                statement = query.order_by(None).statement.compile(
+                    dialect=db.get_bind().dialect,
+                    compile_kwargs={"literal_binds": True}
+                )
+                # Savepoint: si EXPLAIN falla la transacción sigue usable para el COUNT
+                with db.begin_nested():
+                    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"])
+            except Exception as e:
+                print(f"⚠️ No se pudo estimar el total, se usa COUNT exacto: {e}")
+
+    return query.order_by(None).count()
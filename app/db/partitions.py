@@ -0,0 +1,183 @@
+"""
+Particiones por rango de expires_at de invalidated_tokens (PostgreSQL)
+
+Cada partición cubre un día o una semana de expiraciones. Se crean por
+adelantado y, cuando todos sus tokens ya expiraron, se eliminan (DROP) o se
+separan de la tabla (DETACH) en una sola operación, sin DELETE fila por fila.
+"""
+
+import re
+from datetime import datetime, time, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PARTITIONED_TABLE = "invalidated_tokens"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+
+# FOR VALUES FROM ('2026-10-17 00:00:00+00') TO ('2026-10-18 00:00:00+00')
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+# (nombre, desde, hasta) de una partición de rango
+Partition = Tuple[str, datetime, datetime]
+
+
+def is_partitioned(db: Session) -> bool:
+    """
+    Indicar si invalidated_tokens es una tabla particionada
+
+    Args:
+        db: Sesión de base de datos
+
+    Returns:
+        True en PostgreSQL con la tabla particionada (relkind = 'p')
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    relkind = db.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": PARTITIONED_TABLE}
+    ).scalar()
+    return relkind == "p"
+
+
+def partition_bounds(moment: datetime, interval: str) -> Tuple[datetime, datetime]:
+    """
+    Rango de la partición que contiene moment
+
+    Args:
+        moment: Fecha de expiración
+        interval: "day" o "week" (las semanas empiezan el lunes)
+
+    Returns:
+        (desde, hasta) en UTC, hasta excluido
+    """
+    moment = moment.astimezone(timezone.utc)
+    start = datetime.combine(moment.date(), time.min, tzinfo=timezone.utc)
+    if interval == "week":
+        start -= timedelta(days=start.weekday())
+        return start, start + timedelta(weeks=1)
+    return start, start + timedelta(days=1)
+
+
+def partition_name(start: datetime) -> str:
+    """Nombre de la partición que empieza en start"""
+    return f"{PARTITIONED_TABLE}_p{start:%Y%m%d}"
+
+
+def list_partitions(db: Session) -> List[Partition]:
+    """
+    Particiones de rango de invalidated_tokens (sin la partición por defecto)
+
+    Args:
+        db: Sesión de base de datos
+
+    Returns:
+        Particiones ordenadas por inicio del rango
+    """
+    rows = db.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table_name)"
+        ),
+        {"table_name": PARTITIONED_TABLE}
+    ).all()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_PATTERN.search(bound or "")
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(db: Session, periods_ahead: int, interval: str, now: Optional[datetime] = None) -> List[str]:
+    """
+    Crear las particiones que falten desde el periodo actual hasta periods_ahead
+    periodos adelante.
+
+    Las filas que ya estuvieran en la partición por defecto para ese rango se
+    mueven a la nueva partición antes de adjuntarla.
+
+    Args:
+        db: Sesión de base de datos
+        periods_ahead: Periodos futuros que deben existir
+        interval: "day" o "week"
+        now: Fecha de referencia (por defecto, ahora)
+
+    Returns:
+        Nombres de las particiones creadas
+    """
+    existing = {name for name, _, _ in list_partitions(db)}
+    start, _ = partition_bounds(now or datetime.now(timezone.utc), interval)
+
+    created = []
+    for _ in range(periods_ahead + 1):
+        start, end = partition_bounds(start, interval)
+        name = partition_name(start)
+        if name not in existing:
+            try:
+                with db.begin_nested():
+                    _create_partition(db, name, start, end)
+                created.append(name)
+            except Exception as e:
+                # Rango solapado con una partición de otro intervalo: se deja como está
+                print(f"⚠️ No se pudo crear la partición {name}: {e}")
+        start = end
+
+    db.commit()
+    return created
+
+
+def purge_expired_partitions(db: Session, mode: str = "drop", now: Optional[datetime] = None) -> List[str]:
+    """
+    Eliminar (drop) o separar (detach) las particiones cuyo rango ya expiró por completo
+
+    Args:
+        db: Sesión de base de datos
+        mode: "drop" elimina la partición; "detach" la deja como tabla independiente
+        now: Fecha de referencia (por defecto, ahora)
+
+    Returns:
+        Nombres de las particiones purgadas
+    """
+    now = now or datetime.now(timezone.utc)
+    purged = []
+    for name, _, end in list_partitions(db):
+        if end > now:
+            continue
+        db.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION "{name}"'))
+        if mode == "drop":
+            db.execute(text(f'DROP TABLE "{name}"'))
+        db.commit()
+        purged.append(name)
+    return purged
+
+
+def _create_partition(db: Session, name: str, start: datetime, end: datetime) -> None:
+    """Crear la tabla, mover las filas del rango desde la partición por defecto y adjuntarla"""
+    bounds = {"start": start, "end": end}
+    db.execute(text(
+        f'CREATE TABLE "{name}" (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    ))
+    db.execute(
+        text(
+            f'WITH moved AS ('
+            f'DELETE FROM {DEFAULT_PARTITION} WHERE expires_at >= :start AND expires_at < :end RETURNING *'
+            f') INSERT INTO "{name}" SELECT * FROM moved'
+        ),
+        bounds
+    )
+    db.execute(text(
+        f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION \"{name}\" "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def _parse_bound(value: str) -> datetime:
+    """Convertir un límite de pg_get_expr ('2026-10-17 00:00:00+00') a datetime"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
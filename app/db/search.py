@@ -0,0 +1,72 @@
+"""
+Búsqueda de texto sobre columnas con índices trigram (pg_trgm)
+"""
+
+from typing import Optional, Sequence
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Query, Session
+
+from app.db.pagination import KeysetPage
+
+
+def _escape_like(term: str) -> str:
+    """Escapar los comodines de LIKE para buscar el término literal"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def uses_similarity(db: Session, mode: str) -> bool:
+    """El modo similar solo existe en PostgreSQL; en otros motores se usa contains"""
+    return mode == "similar" and db.get_bind().dialect.name == "postgresql"
+
+
+def search_filter(db: Session, columns: Sequence, term: str, mode: str = "contains"):
+    """
+    Condición de búsqueda del término sobre las columnas.
+
+    - contains: ILIKE '%term%'. En PostgreSQL el índice GIN gin_trgm_ops lo
+      resuelve para términos de 3 o más caracteres.
+    - similar: operador % de pg_trgm (similitud sobre pg_trgm.similarity_threshold),
+      tolerante a errores de tipeo y también indexado.
+
+    Args:
+        db: Sesión de base de datos (para conocer el motor)
+        columns: Columnas de texto donde buscar
+        term: Término de búsqueda
+        mode: contains o similar
+
+    Returns:
+        Expresión para query.filter()
+    """
+    if uses_similarity(db, mode):
+        return or_(*[column.op("%")(term) for column in columns])
+
+    pattern = f"%{_escape_like(term)}%"
+    return or_(*[column.ilike(pattern, escape="\\") for column in columns])
+
+
+def similarity_rank(columns: Sequence, term: str):
+    """Mayor similitud del término entre las columnas (para ORDER BY)"""
+    scores = [func.similarity(column, term) for column in columns]
+    return scores[0] if len(scores) == 1 else func.greatest(*scores)
+
+
+def ranked_page(query: Query, columns: Sequence, term: str, tie_breaker, limit: int) -> KeysetPage:
+    """
+    Primera página de resultados ordenados por similitud descendente.
+
+    El orden por similitud depende del término, así que no hay cursor: la
+    búsqueda por similitud devuelve los mejores limit resultados.
+
+    Args:
+        query: Consulta ya filtrada con search_filter(mode="similar")
+        columns: Columnas de texto buscadas
+        term: Término de búsqueda
+        tie_breaker: Columna única para desempatar (p. ej. id)
+        limit: Cantidad de resultados
+
+    Returns:
+        Página sin next_cursor
+    """
+    items = query.order_by(similarity_rank(columns, term).desc(), tie_breaker).limit(limit).all()
+    return KeysetPage(items, None)
@@ -2,7 +2,12 @@
 Configuración de sesiones de base de datos SQLAlchemy
 """
 
+from typing import AsyncIterator, Callable, Optional, TypeVar, Union
+
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
@@ -45,6 +50,84 @@ def get_db() -> Session:
         db.close()
 
 
+def get_async_database_url() -> str:
+    """
+    URL del engine async: DATABASE_ASYNC_URL o DATABASE_URL con el driver asyncpg
+    """
+    if settings.database.async_url:
+        return settings.database.async_url
+    return make_url(settings.database.url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+# Engine y sesiones async (solo si están habilitados; requieren asyncpg)
+async_engine = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.database.async_enabled:
+    async_engine = create_async_engine(
+        get_async_database_url(),
+        echo=settings.database.echo,
+        pool_size=settings.database.pool_size,
+        max_overflow=settings.database.max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+    )
+    
+    # expire_on_commit=False: los objetos devueltos por los servicios se
+    # serializan fuera de la sesión y no pueden recargarse de forma perezosa
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency para obtener una sesión async de base de datos.
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("DATABASE_ASYNC_ENABLED no está activo")
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+
+# Dependency de sesión para la API según la configuración
+get_request_db = get_async_db if settings.database.async_enabled else get_db
+
+T = TypeVar("T")
+
+
+async def run_db(db: Union[Session, AsyncSession], fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Ejecutar código ORM síncrono sin bloquear el event loop.
+    
+    Con AsyncSession se usa run_sync (la función recibe una Session ligada a la
+    conexión asyncpg); con Session síncrona se ejecuta en el threadpool.
+    
+    Args:
+        db: Sesión de la request
+        fn: Función que recibe una Session como primer argumento
+        
+    Returns:
+        Resultado de la función
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def dispose_async_engine() -> None:
+    """Cerrar las conexiones del engine async"""
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 def create_tables():
     """Crear todas las tablas en la base de datos"""
     Base.metadata.create_all(bind=engine)
@@ -12,10 +12,13 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 import uvicorn
 
 from app.core.config import get_settings
-from app.db.session import engine
+from app.db.session import engine, dispose_async_engine
 # from app.db.init_db import init_db_first_time  # Comentado temporalmente
 from app.api import register_routes
 from app.schemas.response import ErrorResponse, SuccessResponse, HealthCheckResponse
+from app.services.maintenance_scheduler import get_maintenance_scheduler
+from app.core.security import password_hasher, import_password_hasher
+from app.services.email_service import get_email_dispatcher, get_smtp_pool
 
 # Obtener configuración
 settings = get_settings()
@@ -35,10 +38,29 @@ async def lifespan(app: FastAPI):
     #     print("✅ Base de datos inicializada correctamente")
     # except Exception as e:
     #     print(f"⚠️ Error al inicializar base de datos: {e}")
+    
+    # Mantenimiento periódico: particiones y limpieza de invalidated_tokens
+    # (una réplica por tarea) y reconstrucción de la caché de blacklist.
+    # Las particiones y la caché se preparan antes de aceptar requests.
+    maintenance_scheduler = get_maintenance_scheduler()
+    await maintenance_scheduler.start()
+    
+    # Envío de emails en segundo plano; retoma los pendientes de email_outbox
+    email_dispatcher = get_email_dispatcher()
+    if settings.email.email_dispatcher_enabled:
+        await email_dispatcher.start()
+    
     print("✅ Aplicación iniciada correctamente")
     
     yield
     
+    await maintenance_scheduler.stop()
+    await email_dispatcher.stop()
+    get_smtp_pool().close()
+    password_hasher.shutdown()
+    import_password_hasher.shutdown()
+    await dispose_async_engine()
+    
     # Evento de cierre
     print("🛑 Cerrando aplicación base_auth_backend...")
 
@@ -74,7 +96,8 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             detail=exc.detail,
             error_code=f"HTTP_{exc.status_code}",
             timestamp=datetime.utcnow().isoformat()
-        ).dict()
+        ).dict(),
+        headers=getattr(exc, "headers", None)
     )
 
 
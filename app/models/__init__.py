@@ -12,6 +12,7 @@ from .user_role import UserRole
 from .role_permission import RolePermission
 from .user_identity import UserIdentity
 from .invalidated_token import InvalidatedToken
+from .email_outbox import EmailOutbox
 
 __all__ = [
     "Base",
@@ -23,5 +24,6 @@ __all__ = [
     "UserRole",
     "RolePermission",
     "UserIdentity",
-    "InvalidatedToken"
+    "InvalidatedToken",
+    "EmailOutbox"
 ]
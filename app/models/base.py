@@ -6,7 +6,7 @@ from datetime import datetime
 from sqlalchemy import Column, String, DateTime, Boolean
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, DDL, event
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
@@ -21,6 +21,13 @@ convention = {
 
 metadata = MetaData(naming_convention=convention)
 
+# Los índices de búsqueda (gin_trgm_ops) requieren la extensión pg_trgm
+event.listen(
+    metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
 # Base declarativa con metadatos personalizados
 Base = declarative_base(metadata=metadata)
 
@@ -27,6 +27,10 @@ class Company(BaseModel):
     # Índices
     __table_args__ = (
         Index("ix_company_name", "name"),
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_company_created_at_id", "created_at", "id"),
+        # Búsqueda por subcadena y similitud (pg_trgm)
+        Index("ix_company_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
     )
     
     def __repr__(self) -> str:
@@ -26,6 +26,8 @@ class CompanyUser(Base):
     is_active = Column(Boolean, nullable=False, default=True)
     is_verified = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Los tokens emitidos hasta este momento quedan revocados (logout-all)
+    sessions_revoked_before = Column(DateTime(timezone=True), nullable=True)
     
     # Relaciones
     user = relationship("AppUser", back_populates="companies")
@@ -35,6 +37,8 @@ class CompanyUser(Base):
     __table_args__ = (
         Index("ix_company_user_user_id", "user_id"),
         Index("ix_company_user_company_id", "company_id"),
+        # Listado de usuarios por empresa: filtro por estado y orden por fecha de ingreso
+        Index("ix_company_user_company_id_is_active_created_at", "company_id", "is_active", "created_at", "user_id"),
     )
     
     def __repr__(self) -> str:
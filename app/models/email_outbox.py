@@ -0,0 +1,40 @@
+"""
+Modelo EmailOutbox - Cola persistente de emails salientes
+"""
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from .base import BaseModel
+
+
+class EmailOutbox(BaseModel):
+    """
+    Email pendiente de envío.
+    El EmailDispatcher lo entrega en segundo plano y reintenta con backoff;
+    los pendientes se retoman al reiniciar la aplicación.
+    """
+    
+    __tablename__ = "email_outbox"
+    
+    to_email = Column(Text, nullable=False)
+    subject = Column(Text, nullable=False)
+    # Se borra al enviarse o fallar: los emails de reset y verificación
+    # contienen enlaces con tokens que no deben quedar guardados
+    html_content = Column(Text, nullable=True)
+    
+    # Estado de entrega: "pending", "sent" o "failed" (agotó los reintentos)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Índices
+    __table_args__ = (
+        # Recuperación al iniciar: status = 'pending' ORDER BY next_attempt_at
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<EmailOutbox(id={self.id}, to_email='{self.to_email}', status='{self.status}')>"
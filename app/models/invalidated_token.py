@@ -2,7 +2,9 @@
 Modelo para tokens invalidados (blacklist)
 """
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+import uuid
+
+from sqlalchemy import Column, DDL, String, DateTime, ForeignKey, Index, Text, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -10,17 +12,44 @@ from app.models.base import Base
 
 
 class InvalidatedToken(Base):
-    """Modelo para almacenar tokens invalidados"""
-    
+    """
+    Modelo para almacenar tokens invalidados.
+
+    En PostgreSQL la tabla está particionada por rango de expires_at (ver
+    app/db/partitions.py): las particiones vencidas se eliminan completas en
+    lugar de borrar fila por fila. Por eso expires_at forma parte de la clave
+    primaria y de la unicidad de token_hash.
+    """
+
     __tablename__ = "invalidated_tokens"
-    
-    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
-    token_hash = Column(String(255), nullable=False, index=True, unique=True)
+
+    # Generado también en Python: con la clave primaria compuesta (id, expires_at)
+    # SQLite no lo completa solo
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=func.gen_random_uuid())
+    token_hash = Column(String(255), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("app_user.id"), nullable=False, index=True)
     company_id = Column(UUID(as_uuid=True), ForeignKey("company.id"), nullable=True, index=True)  # Nullable para tokens de reset de contraseña
-    invalidated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    invalidated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, index=True)
     token_type = Column(String(20), nullable=False, default="access")  # "access", "refresh", o "password_reset"
-    
+
+    __table_args__ = (
+        # Un token tiene una sola expiración: (token_hash, expires_at) sigue siendo único por token
+        Index("ix_invalidated_tokens_token_hash", "token_hash", "expires_at", unique=True),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
+
     def __repr__(self):
-        return f"<InvalidatedToken(id={self.id}, user_id={self.user_id}, expires_at={self.expires_at})>" 
\ No newline at end of file
+        return f"<InvalidatedToken(id={self.id}, user_id={self.user_id}, expires_at={self.expires_at})>"
+
+
+# Partición por defecto: recibe las filas fuera de los rangos creados, para que
+# una inserción nunca falle por falta de partición
+event.listen(
+    InvalidatedToken.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS invalidated_tokens_default "
+        "PARTITION OF invalidated_tokens DEFAULT"
+    ).execute_if(dialect="postgresql")
+)
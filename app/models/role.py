@@ -48,6 +48,12 @@ class Role(RoleBase):
     __table_args__ = (
         Index("ix_role_name", "name"),
         Index("ix_role_company_id", "company_id"),
+        # Resolución de permisos: user_role (PK user_id, role_id) -> role filtrado por empresa
+        Index("ix_role_id_company_id", "id", "company_id"),
+        # Paginación por cursor dentro de una empresa: ORDER BY name, id
+        Index("ix_role_company_id_name_id", "company_id", "name", "id"),
+        # Búsqueda por subcadena y similitud (pg_trgm)
+        Index("ix_role_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
     )
     
     def __repr__(self) -> str:
@@ -34,6 +34,11 @@ class AppUser(BaseModel):
     # Índices
     __table_args__ = (
         Index("ix_app_user_email", "email"),
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_app_user_created_at_id", "created_at", "id"),
+        # Búsqueda por subcadena y similitud (pg_trgm)
+        Index("ix_app_user_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_app_user_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
     )
     
     def __repr__(self) -> str:
@@ -35,10 +35,11 @@ class CompanyList(BaseSchema):
     """Esquema para lista de empresas"""
     
     companies: List[CompanyRead] = Field(..., description="Lista de empresas")
-    total: int = Field(..., description="Total de empresas")
-    page: int = Field(..., description="Página actual")
+    total: Optional[int] = Field(None, description="Total de empresas (solo si se pidió count)")
+    page: Optional[int] = Field(None, description="Página actual (solo con skip)")
     size: int = Field(..., description="Tamaño de página")
-    pages: int = Field(..., description="Total de páginas")
+    pages: Optional[int] = Field(None, description="Total de páginas (solo si se pidió count)")
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente; null en la última")
 
 
 class CompanyUserRead(BaseSchema):
@@ -2,9 +2,9 @@
 Esquemas para roles y permisos
 """
 
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import uuid
-from pydantic import Field
+from pydantic import Field, model_validator
 from .permission import PermissionRead
 
 from .base import BaseSchema
@@ -50,10 +50,11 @@ class RoleList(BaseSchema):
     """Esquema para lista de roles"""
     
     roles: List[RoleRead] = Field(..., description="Lista de roles")
-    total: int = Field(..., description="Total de roles")
-    page: int = Field(..., description="Página actual")
+    total: Optional[int] = Field(None, description="Total de roles (solo si se pidió count)")
+    page: Optional[int] = Field(None, description="Página actual (solo con skip)")
     size: int = Field(..., description="Tamaño de página")
-    pages: int = Field(..., description="Total de páginas")
+    pages: Optional[int] = Field(None, description="Total de páginas (solo si se pidió count)")
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente; null en la última")
 
 
 class UserRoleCreate(BaseSchema):
@@ -63,6 +64,45 @@ class UserRoleCreate(BaseSchema):
     role_id: uuid.UUID = Field(..., description="ID del rol")
 
 
+class UserRoleBulkRequest(BaseSchema):
+    """
+    Esquema para asignar o revocar roles en lote: una lista de pares
+    (assignments) o un rol para muchos usuarios (role_id + user_ids)
+    """
+    
+    assignments: Optional[List[UserRoleCreate]] = Field(
+        None, min_length=1, max_length=5000, description="Pares usuario-rol"
+    )
+    role_id: Optional[uuid.UUID] = Field(None, description="Rol a asignar o revocar a todos los user_ids")
+    user_ids: Optional[List[uuid.UUID]] = Field(
+        None, min_length=1, max_length=5000, description="Usuarios del rol role_id"
+    )
+    
+    @model_validator(mode="after")
+    def check_shape(self):
+        if self.assignments and (self.role_id or self.user_ids):
+            raise ValueError("Envíe assignments o role_id con user_ids, no ambos")
+        if not self.assignments and not (self.role_id and self.user_ids):
+            raise ValueError("Envíe assignments o role_id con user_ids")
+        return self
+    
+    def pairs(self) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+        """Pares (user_id, role_id) sin repetir"""
+        if self.assignments:
+            pairs = [(item.user_id, item.role_id) for item in self.assignments]
+        else:
+            pairs = [(user_id, self.role_id) for user_id in self.user_ids]
+        return list(dict.fromkeys(pairs))
+
+
+class UserRoleBulkResult(BaseSchema):
+    """Resultado de una asignación o revocación de roles en lote"""
+    
+    requested: int = Field(..., description="Pares distintos recibidos")
+    affected: int = Field(..., description="Pares asignados o revocados")
+    unchanged: int = Field(..., description="Pares que ya estaban (asignar) o no estaban (revocar)")
+
+
 class UserRoleRead(BaseSchema):
     """Esquema para leer asignación de rol a usuario"""
     
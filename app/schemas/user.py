@@ -3,7 +3,7 @@ Esquemas para la entidad User
 """
 
 from typing import Optional, List
-from pydantic import Field, EmailStr
+from pydantic import ConfigDict, Field, EmailStr, model_validator
 
 from .base import BaseSchema, BaseResponse
 
@@ -54,10 +54,11 @@ class UserList(BaseSchema):
     """Esquema para lista de usuarios"""
     
     users: List[UserRead] = Field(..., description="Lista de usuarios")
-    total: int = Field(..., description="Total de usuarios")
-    page: int = Field(..., description="Página actual")
+    total: Optional[int] = Field(None, description="Total de usuarios (solo si se pidió count)")
+    page: Optional[int] = Field(None, description="Página actual (solo con skip)")
     size: int = Field(..., description="Tamaño de página")
-    pages: int = Field(..., description="Total de páginas")
+    pages: Optional[int] = Field(None, description="Total de páginas (solo si se pidió count)")
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente; null en la última")
 
 
 class UserLogin(BaseSchema):
@@ -73,4 +74,44 @@ class UserPasswordChange(BaseSchema):
     
     current_password: str = Field(..., description="Contraseña actual")
     new_password: str = Field(..., min_length=8, description="Nueva contraseña")
-    confirm_password: str = Field(..., description="Confirmar nueva contraseña") 
\ No newline at end of file
+    confirm_password: str = Field(..., description="Confirmar nueva contraseña") 
+
+
+class UserImportRow(BaseSchema):
+    """Fila de la importación masiva de usuarios (CSV o NDJSON)"""
+    
+    # Columnas desconocidas del archivo se ignoran en vez de rechazar la fila
+    model_config = ConfigDict(extra="ignore")
+    
+    name: str = Field(..., min_length=1, description="Nombre del usuario")
+    email: EmailStr = Field(..., description="Email del usuario")
+    password: Optional[str] = Field(None, min_length=5, description="Contraseña en texto plano")
+    hashed_password: Optional[str] = Field(
+        None,
+        pattern=r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$",
+        description="Hash bcrypt ya calculado (migraciones desde otro sistema)"
+    )
+    role: Optional[str] = Field(None, description="Rol en la compañía; si falta se usa default_role")
+    
+    @model_validator(mode="after")
+    def check_password(self):
+        if not self.password and not self.hashed_password:
+            raise ValueError("Se requiere password o hashed_password")
+        return self
+
+
+class UserImportError(BaseSchema):
+    """Error de una fila de la importación"""
+    
+    line: int = Field(..., description="Línea del archivo (1 = primera línea)")
+    email: Optional[str] = Field(None, description="Email de la fila, si se pudo leer")
+    detail: str = Field(..., description="Motivo del rechazo")
+
+
+class UserImportResult(BaseSchema):
+    """Resultado de la importación masiva de usuarios"""
+    
+    total: int = Field(0, description="Filas procesadas")
+    created: int = Field(0, description="Usuarios nuevos creados")
+    failed: int = Field(0, description="Filas rechazadas")
+    errors: List[UserImportError] = Field(default_factory=list, description="Detalle de las filas rechazadas")
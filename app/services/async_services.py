@@ -0,0 +1,172 @@
+"""
+Fachadas async de los servicios para los endpoints de la API.
+
+Los servicios de negocio siguen siendo síncronos; estas fachadas los ejecutan
+sin bloquear el event loop:
+
+- Con DATABASE_ASYNC_ENABLED la sesión es una AsyncSession y cada llamada se
+  ejecuta con run_sync sobre la conexión asyncpg.
+- Sin él la sesión es la Session síncrona de siempre y la llamada va al
+  threadpool.
+"""
+
+from typing import Any, AsyncIterator, Optional, Union
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.security import verify_password_async
+from app.db.session import engine, run_db
+from app.schemas.auth import LoginRequest, Token
+from app.schemas.user import UserImportResult
+from app.services.auth_service import AuthService
+from app.services.company_service import CompanyService
+from app.services.role_service import RoleService
+from app.services.user_import_service import UserImportService, read_import_batches
+from app.services.user_service import UserService
+
+
+class AsyncServiceFacade:
+    """
+    Expone los métodos públicos de service_class como corutinas.
+
+    Los métodos de threaded_methods hacen trabajo de CPU (bcrypt) o de red
+    (SMTP) que no debe correr dentro de run_sync, porque run_sync ejecuta en el
+    hilo del event loop. En modo async se ejecutan en el threadpool con una
+    Session síncrona propia.
+    """
+
+    service_class: type = None
+    threaded_methods: frozenset = frozenset()
+
+    def __init__(self, db: Union[Session, AsyncSession]):
+        self.db = db
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not callable(getattr(self.service_class, name, None)):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self._call(name, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    async def _call(self, name: str, *args, **kwargs) -> Any:
+        if isinstance(self.db, AsyncSession) and name in self.threaded_methods:
+            return await run_in_threadpool(self._call_with_own_session, name, args, kwargs)
+
+        return await run_db(self.db, lambda session: getattr(self.service_class(session), name)(*args, **kwargs))
+
+    def _call_with_own_session(self, name: str, args: tuple, kwargs: dict) -> Any:
+        db = Session(bind=engine, autoflush=False, expire_on_commit=False)
+        try:
+            return getattr(self.service_class(db), name)(*args, **kwargs)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class AsyncAuthService(AsyncServiceFacade):
+    """Fachada async de AuthService"""
+
+    service_class = AuthService
+    threaded_methods = frozenset({
+        "confirm_password_reset",
+        "encrypt_string",
+        "request_password_reset",
+        "request_email_verification",
+    })
+
+    async def login(self, login_data: LoginRequest) -> Token:
+        """
+        Autenticar usuario y crear tokens con una sola consulta; bcrypt corre
+        en su pool sin ocupar el event loop ni la conexión de BD
+
+        Args:
+            login_data: Datos de login
+
+        Returns:
+            Token con access_token y refresh_token
+
+        Raises:
+            HTTPException: Si las credenciales son incorrectas
+        """
+        candidate = await run_db(
+            self.db,
+            lambda session: AuthService(session).get_login_candidate(login_data.email, login_data.company_name)
+        )
+
+        if not candidate or not await verify_password_async(login_data.password, candidate[0].hashed_password):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales incorrectas",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        user, company_id, company_name, permissions = candidate
+        return await run_db(
+            self.db,
+            lambda session: AuthService(session).create_tokens(user, company_id, company_name, permissions)
+        )
+
+
+class AsyncUserService(AsyncServiceFacade):
+    """Fachada async de UserService"""
+
+    service_class = UserService
+    threaded_methods = frozenset({"create_user", "change_password"})
+
+
+class AsyncUserImportService(AsyncServiceFacade):
+    """Fachada async de UserImportService"""
+
+    service_class = UserImportService
+    threaded_methods = frozenset({"import_batch"})
+
+    async def import_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        import_format: str,
+        company_id: str,
+        batch_size: int,
+        default_role: Optional[str] = None
+    ) -> UserImportResult:
+        """
+        Importar usuarios leyendo el cuerpo del request por lotes; cada lote se
+        valida, hashea e inserta antes de leer el siguiente
+
+        Args:
+            chunks: Partes del cuerpo (request.stream())
+            import_format: "csv" o "ndjson"
+            company_id: ID de la compañía destino
+            batch_size: Filas por lote
+            default_role: Rol para las filas sin columna role
+
+        Returns:
+            Resultado acumulado de todos los lotes
+        """
+        result = UserImportResult()
+        async for batch in read_import_batches(chunks, import_format, batch_size):
+            partial = await self.import_batch(company_id, batch, default_role)
+            result.total += partial.total
+            result.created += partial.created
+            result.failed += partial.failed
+            result.errors.extend(partial.errors)
+        return result
+
+
+class AsyncRoleService(AsyncServiceFacade):
+    """Fachada async de RoleService"""
+
+    service_class = RoleService
+
+
+class AsyncCompanyService(AsyncServiceFacade):
+    """Fachada async de CompanyService"""
+
+    service_class = CompanyService
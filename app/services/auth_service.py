@@ -2,8 +2,10 @@
 Servicio de autenticación - Login, logout y gestión de tokens
 """
 
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from sqlalchemy import and_, update
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
 
@@ -20,6 +22,8 @@ from app.core.config import get_settings
 from sqlalchemy.dialects import postgresql
 from app.models.invalidated_token import InvalidatedToken
 from app.services.email_service import EmailService
+from app.services.blacklist_cache import get_blacklist_cache
+from app.db.bulk import insert_ignore_conflicts
 from app.core.security import validate_password_strength, get_password_hash, verify_password
 
 # Obtener configuración
@@ -44,31 +48,56 @@ class AuthService:
         Returns:
             Tupla (Usuario, company_id) si la autenticación es exitosa, None si no
         """
-        user = self.db.query(AppUser).filter(AppUser.email == email).first()
-        
-        if not user:
-            return None
-
-        company = self.db.query(Company).filter(Company.name == company_name).first()
-        if not company:
+        candidate = self.get_login_candidate(email, company_name)
+        if not candidate:
             return None
-
-        # Verificar que existe la relación usuario-empresa y está activa
-        company_user = (
-            self.db.query(CompanyUser)
-            .filter(CompanyUser.user_id == user.id)
-            .filter(CompanyUser.company_id == company.id)           
-            .first()
-        )
         
-        if not company_user.is_active :
-            return None
+        user, company_id, _, _ = candidate
         
         # Verificar la contraseña recibida contra el hash almacenado
         if not verify_password(password, user.hashed_password):
             return None  
         
-        return user, str(company.id)
+        return user, company_id
+    
+    def get_login_candidate(self, email: str, company_name: str) -> Optional[tuple[AppUser, str, str, List[str]]]:
+        """
+        Buscar en una sola consulta el usuario, su membresía activa en la empresa,
+        la empresa y los permisos de sus roles en ella. No verifica la contraseña.
+        
+        Args:
+            email: Email del usuario
+            company_name: Nombre de la empresa
+            
+        Returns:
+            Tupla (Usuario, company_id, company_name, permisos) si existe la
+            membresía activa, None si no
+        """
+        # Una fila por permiso (o una sola fila con permiso NULL si no tiene roles
+        # en la empresa); los roles de otras empresas quedan fuera del LEFT JOIN
+        rows = (
+            self.db.query(AppUser, Company.id, Company.name, Permission.name)
+            .join(CompanyUser, CompanyUser.user_id == AppUser.id)
+            .join(Company, Company.id == CompanyUser.company_id)
+            .outerjoin(UserRole, UserRole.user_id == AppUser.id)
+            .outerjoin(Role, and_(Role.id == UserRole.role_id, Role.company_id == Company.id))
+            .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+            .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+            .filter(AppUser.email == email)
+            .filter(Company.name == company_name)
+            .filter(CompanyUser.is_active == True)
+            .all()
+        )
+        
+        if not rows:
+            return None
+        
+        user, company_id, company_name, _ = rows[0]
+        permissions = list(dict.fromkeys(
+            permission_name for _, _, _, permission_name in rows if permission_name is not None
+        ))
+        
+        return user, str(company_id), company_name, permissions
     
     def get_user_permissions(self, user_id: str, company_id: str) -> List[str]:
         """
@@ -81,47 +110,49 @@ class AuthService:
         Returns:
             Lista de nombres de permisos
         """
-        # Obtener roles del usuario para la empresa específica
-        user_roles = (
-            self.db.query(UserRole)
-            .join(Role, UserRole.role_id == Role.id)
-            .filter(UserRole.user_id == user_id)
-            .filter(Role.company_id == company_id)  # Filtrar por empresa
+        # Una sola consulta: permisos distintos de todos los roles del usuario en la empresa
+        permissions = (
+            self.db.query(Permission.name)
+            .join(RolePermission, Permission.id == RolePermission.permission_id)
+            .join(Role, Role.id == RolePermission.role_id)
+            .join(UserRole, UserRole.role_id == Role.id)
+            .filter(UserRole.user_id == uuid.UUID(str(user_id)))
+            .filter(Role.company_id == uuid.UUID(str(company_id)))  # Filtrar por empresa
+            .distinct()
             .all()
         )
         
-        # Obtener permisos de todos los roles del usuario
-        permissions = set()
-        for user_role in user_roles:
-            role_permissions = (
-                self.db.query(Permission)
-                .join(RolePermission, Permission.id == RolePermission.permission_id)
-                .filter(RolePermission.role_id == user_role.role_id)
-                .all()
-            )
-            
-            for permission in role_permissions:
-                permissions.add(permission.name)
-        
-        return list(permissions)
+        return [permission_name for (permission_name,) in permissions]
     
-    def create_tokens(self, user: AppUser, company_id: str) -> Token:
+    def create_tokens(
+        self,
+        user: AppUser,
+        company_id: str,
+        company_name: Optional[str] = None,
+        permissions: Optional[List[str]] = None,
+        session_id: Optional[str] = None
+    ) -> Token:
         """
         Crear tokens de acceso y refresco para un usuario
         
         Args:
             user: Usuario para el cual crear tokens
             company_id: ID de la empresa
+            company_name: Nombre de la empresa (se consulta si no se indica)
+            permissions: Permisos del usuario en la empresa (se consultan si no se indican)
+            session_id: Sesión (claim sid) a la que pertenecen; un login abre una nueva
             
         Returns:
             Token con access_token y refresh_token
         """
         # Obtener permisos del usuario
-        permissions = self.get_user_permissions(str(user.id), company_id)
+        if permissions is None:
+            permissions = self.get_user_permissions(str(user.id), company_id)
         
         # Obtener información de la empresa
-        from app.models.company import Company
-        company = self.db.query(Company).filter(Company.id == company_id).first()
+        if company_name is None:
+            company = self.db.query(Company.name).filter(Company.id == uuid.UUID(str(company_id))).first()
+            company_name = company.name if company else None
         
         # Datos para el token
         token_data = {
@@ -130,7 +161,8 @@ class AuthService:
             "name": user.name,
             "permissions": permissions,
             "company_id": company_id,
-            "company_name": company.name if company else None
+            "company_name": company_name,
+            "sid": session_id or SecurityService.new_session_id()
         }
         
         # Crear tokens
@@ -157,17 +189,18 @@ class AuthService:
         Raises:
             HTTPException: Si las credenciales son incorrectas
         """
-        result = self.authenticate_user(login_data.email, login_data.password, login_data.company_name)
+        # Una consulta: usuario, membresía, empresa y permisos
+        candidate = self.get_login_candidate(login_data.email, login_data.company_name)
         
-        if not result:
+        if not candidate or not verify_password(login_data.password, candidate[0].hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        user, company_id = result
-        return self.create_tokens(user, company_id)
+        user, company_id, company_name, permissions = candidate
+        return self.create_tokens(user, company_id, company_name, permissions)
     
     def refresh_token(self, refresh_token: str) -> Token:
         """
@@ -197,16 +230,27 @@ class AuthService:
                     detail="Token de refresco inválido"
                 )
             
-            company_user = self.db.query(CompanyUser).filter(CompanyUser.user_id == user_id).filter(CompanyUser.company_id == company_id).first()
+            # Los IDs del payload son strings; las columnas, UUID
+            user_uuid = uuid.UUID(str(user_id))
+            company_uuid = uuid.UUID(str(company_id))
+            company_user = self.db.query(CompanyUser).filter(CompanyUser.user_id == user_uuid).filter(CompanyUser.company_id == company_uuid).first()
             # Obtener usuario
-            user = self.db.query(AppUser).filter(AppUser.id == user_id).first()
-            if not user or not company_user.is_active:
+            user = self.db.query(AppUser).filter(AppUser.id == user_uuid).first()
+            if not user or not company_user or not company_user.is_active:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Usuario no encontrado o inactivo"
                 )
             
-            return self.create_tokens(user, company_id)
+            # Sesiones cerradas con logout-all después de emitir este token
+            if SecurityService.issued_before(payload, company_user.sessions_revoked_before):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token de refresco inválido"
+                )
+            
+            # Los tokens renovados siguen en la misma sesión
+            return self.create_tokens(user, company_id, session_id=payload.get("sid"))
             
         except Exception:
             raise HTTPException(
@@ -230,25 +274,107 @@ class AuthService:
             
             # Verificar token (incluye verificación de blacklist)
             payload = security_service.verify_access_token(token)
-            user_id = payload.get("user_id")
-            company_id = payload.get("company_id")
-            company_name = payload.get("company_name")
-            
-            if not user_id:
+            if not payload:
                 return None
             
-            # Obtener usuario
-            user = self.db.query(AppUser).filter(AppUser.id == user_id).first()
-            company_user = self.db.query(CompanyUser).filter(CompanyUser.user_id == user_id).filter(CompanyUser.company_id == company_id).first()
-
-            if not company_user or not company_user.is_active:
+            return self.get_current_user_from_payload(payload)
+            
+        except Exception as e:
+            print(f"Error en get_current_user_from_token: {e}")
+            return None
+    
+    def get_current_user_from_payload(self, payload: dict) -> Optional[AppUser]:
+        """
+        Obtener usuario actual desde el payload ya verificado de un token de acceso
+        
+        Args:
+            payload: Payload del token de acceso
+            
+        Returns:
+            Usuario si pertenece activamente a la empresa del token, None si no
+        """
+        try:
+            membership = self.get_active_membership(payload.get("user_id"), payload.get("company_id"))
+            if not membership:
                 return None
             
+            user, _ = membership
             return user
             
         except Exception as e:
-            print(f"Error en get_current_user_from_token: {e}")
+            print(f"Error en get_current_user_from_payload: {e}")
+            return None
+    
+    def get_active_membership(self, user_id: Optional[str], company_id: Optional[str]) -> Optional[Tuple[AppUser, CompanyUser]]:
+        """
+        Obtener usuario y membresía activa en la empresa con una sola consulta
+        
+        Args:
+            user_id: ID del usuario
+            company_id: ID de la empresa
+            
+        Returns:
+            Tupla (usuario, company_user) o None si no existe o está inactiva
+        """
+        if not user_id or not company_id:
+            return None
+        
+        try:
+            user_uuid = uuid.UUID(str(user_id))
+            company_uuid = uuid.UUID(str(company_id))
+        except ValueError:
             return None
+        
+        membership = (
+            self.db.query(AppUser, CompanyUser)
+            .join(CompanyUser, CompanyUser.user_id == AppUser.id)
+            .filter(AppUser.id == user_uuid)
+            .filter(CompanyUser.company_id == company_uuid)
+            .filter(CompanyUser.is_active == True)
+            .first()
+        )
+        
+        if not membership:
+            return None
+        
+        return membership[0], membership[1]
+    
+    def get_user_profile(self, user: AppUser, company_id: str) -> dict:
+        """
+        Obtener el perfil del usuario autenticado en la empresa del token
+        
+        Args:
+            user: Usuario actual
+            company_id: ID de la empresa del token
+            
+        Returns:
+            Diccionario con datos del usuario, la empresa y sus roles
+        """
+        company_uuid = uuid.UUID(str(company_id))
+        company = (
+            self.db.query(Company.id, Company.name, Company.is_active)
+            .filter(Company.id == company_uuid)
+            .first()
+        )
+        # Solo los roles de la empresa del token
+        role_names = (
+            self.db.query(Role.name)
+            .join(UserRole, UserRole.role_id == Role.id)
+            .filter(UserRole.user_id == user.id)
+            .filter(Role.company_id == company_uuid)
+            .all()
+        )
+        
+        return {
+            "id": str(user.id),
+            "company_id": str(company.id) if company else company_id,
+            "company_name": company.name if company else None,
+            "roles": [role_name for (role_name,) in role_names],
+            "email": user.email,
+            "name": user.name,
+            "is_active": company.is_active if company else False,
+            "created_at": user.created_at
+        }
     
     def logout(self, refresh_token: str, access_token: str = None) -> bool:
         """
@@ -275,51 +401,45 @@ class AuthService:
             
             if not user_id or not company_id:
                 return False
-            
-            # Invalidar el refresh token
-            refresh_token_hash = security_service.hash_token(refresh_token)
-            
-            # Calcular expiración del refresh token
-            refresh_expires_at = datetime.fromtimestamp(payload.get("exp"), tz=timezone.utc)
-            
-            # Agregar refresh token a la blacklist
-            blacklisted_refresh = InvalidatedToken(
-                token_hash=refresh_token_hash,
-                user_id=user_id,
-                company_id=company_id,
-                expires_at=refresh_expires_at,
-                token_type="refresh"
-            )
-            
-            self.db.add(blacklisted_refresh)
-            
-            # Si se proporciona un access token, invalidarlo también
+            user_id = uuid.UUID(str(user_id))
+            company_id = uuid.UUID(str(company_id))
+            
+            session_id = payload.get("sid")
+            if session_id:
+                # Una sola fila revoca la sesión completa: este refresh, los
+                # renovados a partir de él y todos sus access tokens. Dura lo
+                # que el refresh más largo que la sesión pudo haber emitido
+                revoked_tokens = [InvalidatedToken(
+                    token_hash=security_service.session_revocation_key(session_id),
+                    user_id=user_id,
+                    company_id=company_id,
+                    expires_at=self._session_revocation_expiry(),
+                    token_type="session"
+                )]
+            else:
+                # Tokens emitidos antes del claim sid: se invalidan por su hash
+                refresh_expires_at = datetime.fromtimestamp(payload.get("exp"), tz=timezone.utc)
+                revoked_tokens = [InvalidatedToken(
+                    token_hash=security_service.hash_token(refresh_token),
+                    user_id=user_id,
+                    company_id=company_id,
+                    expires_at=refresh_expires_at,
+                    token_type="refresh"
+                )]
+            
+            # Si se proporciona un access token de otra sesión, invalidarlo también
             if access_token:
                 try:
-                    # Verificar que el access token es válido
                     access_payload = security_service.verify_access_token(access_token)
-                    if access_payload:
-                        # Generar hash del access token
-                        access_token_hash = security_service.hash_token(access_token)
-                        
-                        # Calcular expiración del access token
-                        access_expires_at = datetime.fromtimestamp(access_payload.get("exp"), tz=timezone.utc)
-                        
-                        # Agregar access token a la blacklist
-                        blacklisted_access = InvalidatedToken(
-                            token_hash=access_token_hash,
-                            user_id=user_id,
-                            company_id=company_id,
-                            expires_at=access_expires_at,
-                            token_type="access"
-                        )
-                        
-                        self.db.add(blacklisted_access)
+                    if access_payload and (not session_id or access_payload.get("sid") != session_id):
+                        revoked_tokens.append(self._access_token_revocation(security_service, access_token, access_payload))
                         print(f"✅ Access token invalidado durante logout")
                 except Exception as e:
                     print(f"⚠️ No se pudo invalidar access token: {e}")
             
+            self._add_revocations(revoked_tokens)
             self.db.commit()
+            self._remember_revoked_tokens(*revoked_tokens)
             
             return True
             
@@ -353,23 +473,12 @@ class AuthService:
             if not user_id or not company_id:
                 return False
             
-            # Generar hash del token
-            token_hash = security_service.hash_token(access_token)
-            
-            # Calcular expiración del token
-            expires_at = datetime.fromtimestamp(payload.get("exp"), tz=timezone.utc)
-            
             # Agregar token a la blacklist
-            blacklisted_token = InvalidatedToken(
-                token_hash=token_hash,
-                user_id=user_id,
-                company_id=company_id,
-                expires_at=expires_at,
-                token_type="access"
-            )
+            blacklisted_token = self._access_token_revocation(security_service, access_token, payload)
             
-            self.db.add(blacklisted_token)
+            self._add_revocations([blacklisted_token])
             self.db.commit()
+            self._remember_revoked_tokens(blacklisted_token)
             
             return True
             
@@ -378,29 +487,124 @@ class AuthService:
             print(f"Error invalidando access token: {e}")
             return False
     
-    def _invalidate_user_access_tokens(self, user_id: str, company_id: str):
+    def _add_revocations(self, tokens: List[InvalidatedToken]) -> int:
         """
-        Invalidar todos los tokens de acceso de un usuario para una empresa específica
-        Este método es opcional y más agresivo - invalida tokens incluso si no se han usado
+        Registrar filas de blacklist con INSERT ... ON CONFLICT DO NOTHING.
+        
+        La tabla particionada solo puede exigir unicidad de (token_hash,
+        expires_at); cada clave tiene una expiración fija (exp del token, o el
+        fin del día para las sesiones), así que dos logouts concurrentes de la
+        misma sesión o token chocan en el índice y queda una sola fila. Si
+        aun así quedara un duplicado (p. ej. logouts a ambos lados de la
+        medianoche UTC), las búsquedas solo preguntan si existe alguna fila.
         
         Args:
-            user_id: ID del usuario
-            company_id: ID de la empresa
-        """
-        try:
-            # Buscar tokens de acceso que aún no han expirado
-            current_time = datetime.now(timezone.utc)
+            tokens: Filas de InvalidatedToken a registrar (sin agregar a la sesión)
             
-            # Nota: Esta implementación es conceptual ya que no tenemos un registro
-            # de todos los tokens emitidos. En una implementación real, podrías:
-            # 1. Mantener un registro de tokens emitidos
-            # 2. Usar un sistema de rotación de claves secretas
-            # 3. Implementar un mecanismo de "family tokens"
+        Returns:
+            Filas insertadas (pendientes de commit)
+        """
+        return insert_ignore_conflicts(
+            self.db,
+            InvalidatedToken,
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "token_hash": token.token_hash,
+                    "user_id": token.user_id,
+                    "company_id": token.company_id,
+                    "expires_at": token.expires_at,
+                    "token_type": token.token_type,
+                }
+                for token in tokens
+            ],
+            index_elements=["token_hash", "expires_at"]
+        )
+    
+    @staticmethod
+    def _session_revocation_expiry() -> datetime:
+        """
+        Expiración de la fila que revoca una sesión: REFRESH_TOKEN_EXPIRE_DAYS
+        desde ahora, redondeada al siguiente inicio de día UTC para que los
+        logouts concurrentes de una sesión generen la misma clave
+        
+        Returns:
+            Fecha de expiración en UTC
+        """
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.security.refresh_token_expire_days)
+        return datetime.combine(expires_at.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    
+    @staticmethod
+    def _remember_revoked_tokens(*tokens: InvalidatedToken) -> None:
+        """
+        Registrar en la caché en memoria tokens ya confirmados en la blacklist
+        
+        Args:
+            tokens: Filas de InvalidatedToken confirmadas
+        """
+        cache = get_blacklist_cache()
+        if cache is None:
+            return
+        
+        for token in tokens:
+            if token is not None:
+                cache.add(token.token_hash, token.expires_at)
+    
+    @staticmethod
+    def _access_token_revocation(security_service: SecurityService, access_token: str, payload: dict) -> InvalidatedToken:
+        """
+        Fila de blacklist de un access token: por su jti o, en tokens emitidos
+        antes de ese claim, por el hash del token
+        
+        Args:
+            security_service: Servicio de seguridad
+            access_token: Token de acceso
+            payload: Payload verificado del token
             
-            pass
+        Returns:
+            InvalidatedToken sin agregar a la sesión
+        """
+        jti = payload.get("jti")
+        return InvalidatedToken(
+            token_hash=security_service.token_revocation_key(jti) if jti else security_service.hash_token(access_token),
+            user_id=uuid.UUID(str(payload.get("user_id"))),
+            company_id=uuid.UUID(str(payload.get("company_id"))),
+            expires_at=datetime.fromtimestamp(payload.get("exp"), tz=timezone.utc),
+            token_type="access"
+        )
+    
+    def logout_all(self, user_id: str, company_id: Optional[str] = None) -> int:
+        """
+        Cerrar todas las sesiones de un usuario en una empresa (o en todas).
+        Una sola escritura: los tokens emitidos hasta ahora quedan revocados
+        por CompanyUser.sessions_revoked_before, sin registrar cada token.
+        
+        Args:
+            user_id: ID del usuario
+            company_id: ID de la empresa (None para todas sus empresas)
             
+        Returns:
+            Número de membresías actualizadas
+        """
+        statement = (
+            update(CompanyUser)
+            .where(CompanyUser.user_id == uuid.UUID(str(user_id)))
+            .values(sessions_revoked_before=datetime.now(timezone.utc))
+        )
+        if company_id:
+            statement = statement.where(CompanyUser.company_id == uuid.UUID(str(company_id)))
+        
+        try:
+            updated = self.db.execute(statement).rowcount
+            self.db.commit()
+            return updated
         except Exception as e:
-            print(f"Error invalidando tokens de acceso: {e}")
+            self.db.rollback()
+            print(f"Error cerrando todas las sesiones: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="No se pudieron cerrar las sesiones"
+            )
     
     def request_password_reset(self, email: str,company_name: str ) -> bool:
         """
@@ -493,13 +697,17 @@ class AuthService:
             user.hashed_password = hashed_password
             
             # Invalidar el token después de usarlo exitosamente
-            self._invalidate_password_reset_token(token, str(user.id))
+            blacklisted_token = self._invalidate_password_reset_token(token, str(user.id))
             
             self.db.commit()
+            self._remember_revoked_tokens(blacklisted_token)
             
             print(f"✅ Contraseña actualizada para {email}")
             return True, None
             
+        except HTTPException:
+            self.db.rollback()
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error en confirm_password_reset: {e}")
@@ -553,13 +761,16 @@ class AuthService:
             print(f"Error en validate_password_reset_token: {e}")
             return None
     
-    def _invalidate_password_reset_token(self, token: str, user_id: str):
+    def _invalidate_password_reset_token(self, token: str, user_id: str) -> Optional[InvalidatedToken]:
         """
         Invalidar token de reset de contraseña después de uso exitoso
         
         Args:
             token: Token a invalidar
             user_id: ID del usuario
+            
+        Returns:
+            Fila agregada a la blacklist (pendiente de commit), None si falló
         """
         try:
             # Generar hash del token para almacenarlo en la blacklist
@@ -589,8 +800,11 @@ class AuthService:
             self.db.add(blacklisted_token)
             print(f"✅ Token de reset invalidado para usuario {user_id}")
             
+            return blacklisted_token
+            
         except Exception as e:
             print(f"Error invalidando token de reset: {e}")
+            return None
     
     def request_email_verification(self, email: str,company_id: str) -> bool:
         """
@@ -698,6 +912,8 @@ class AuthService:
             encrypted_string = get_password_hash(plain_string)
             return encrypted_string
             
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error encriptando string: {e}")
             raise HTTPException(
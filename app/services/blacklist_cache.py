@@ -0,0 +1,351 @@
+"""
+Caché en memoria de la blacklist de tokens revocados
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.bloom_filter import BloomFilter
+from app.core.config import get_settings
+from app.models.invalidated_token import InvalidatedToken
+
+# Obtener configuración
+settings = get_settings()
+
+# Margen de solapamiento al refrescar: invalidated_at toma la hora de inicio de la
+# transacción, así que una fila puede confirmarse después de nuestra marca de agua
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Convertir un datetime (con o sin zona horaria) a epoch UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TokenBlacklistCache:
+    """
+    Índice en memoria de los tokens revocados, con dos estructuras opcionales:
+
+    - Un filtro de Bloom que responde "seguro no revocado" sin ir a la BD.
+    - Un conjunto acotado de hashes que expiran con el token, que responde
+      "revocado" y, mientras esté completo, también "no revocado".
+
+    Ambas se construyen desde invalidated_tokens al iniciar (warm) y se
+    refrescan de forma incremental usando invalidated_at.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        refresh_seconds: int,
+        store_hashes: bool = True,
+        use_filter: bool = True,
+        filter_capacity: int = 100_000,
+        filter_error_rate: float = 0.01
+    ):
+        self.max_size = max_size
+        self.refresh_seconds = refresh_seconds
+        self.store_hashes = store_hashes
+        self.use_filter = use_filter
+        self.filter_capacity = filter_capacity
+        self.filter_error_rate = filter_error_rate
+        self._entries: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._filter: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._warmed = False
+        self._complete = True
+        self._watermark: Optional[datetime] = None
+        self._last_refresh = 0.0
+        self._last_rebuild: Optional[datetime] = None
+        self._hits = 0
+        self._misses = 0
+        self._fallbacks = 0
+        self._filter_negatives = 0
+        self._filter_positives = 0
+        self._filter_false_positives = 0
+
+    def lookup(self, token_hash: str) -> Optional[bool]:
+        """
+        Consultar un hash en la caché
+
+        Args:
+            token_hash: Hash del token
+
+        Returns:
+            True si está revocado, False si la caché garantiza que no lo está,
+            None si la caché no puede responder y hay que ir a la base de datos
+        """
+        now = time.time()
+        with self._lock:
+            if self._warmed and self._filter is not None:
+                if not self._filter.contains(token_hash):
+                    self._filter_negatives += 1
+                    return False
+                self._filter_positives += 1
+
+            expires_at = self._entries.get(token_hash)
+            if expires_at is not None and expires_at > now:
+                self._hits += 1
+                return True
+
+            if self._warmed and self.store_hashes and self._complete:
+                self._misses += 1
+                if self._filter is not None:
+                    self._filter_false_positives += 1
+                return False
+
+            self._fallbacks += 1
+            return None
+
+    def record_database_result(self, token_hash: str, is_revoked: bool) -> None:
+        """
+        Registrar la respuesta de la BD para una consulta que la caché no resolvió.
+        Permite medir la tasa real de falsos positivos del filtro.
+
+        Args:
+            token_hash: Hash del token consultado
+            is_revoked: Resultado de la búsqueda en invalidated_tokens
+        """
+        with self._lock:
+            if not self._warmed or self._filter is None:
+                return
+            if not is_revoked:
+                self._filter_false_positives += 1
+
+    def add(self, token_hash: str, expires_at: datetime) -> None:
+        """
+        Registrar un token revocado
+
+        Args:
+            token_hash: Hash del token
+            expires_at: Expiración del token (la entrada se descarta después)
+        """
+        expires_ts = _to_timestamp(expires_at)
+        if expires_ts <= time.time():
+            return
+        with self._lock:
+            self._insert(token_hash, expires_ts)
+
+    def warm(self, db: Session) -> int:
+        """
+        Reconstruir la caché y el filtro con todas las revocaciones vigentes.
+        También elimina del filtro los tokens ya expirados.
+
+        Args:
+            db: Sesión de base de datos
+
+        Returns:
+            Número de hashes cargados
+        """
+        current_time = datetime.now(timezone.utc)
+        rows = (
+            db.query(InvalidatedToken.token_hash, InvalidatedToken.expires_at, InvalidatedToken.invalidated_at)
+            .filter(InvalidatedToken.expires_at > current_time)
+            .all()
+        )
+
+        new_filter = None
+        if self.use_filter:
+            new_filter = BloomFilter(
+                capacity=max(self.filter_capacity, 2 * len(rows)),
+                error_rate=self.filter_error_rate
+            )
+
+        with self._lock:
+            self._entries.clear()
+            self._expiry_heap.clear()
+            self._filter = new_filter
+            self._complete = True
+            self._filter_negatives = 0
+            self._filter_positives = 0
+            self._filter_false_positives = 0
+            self._load_rows(rows)
+            self._watermark = max((row.invalidated_at for row in rows), default=current_time)
+            self._warmed = True
+            self._last_refresh = time.monotonic()
+            self._last_rebuild = current_time
+
+        return len(rows)
+
+    def refresh(self, db: Session) -> int:
+        """
+        Traer las revocaciones registradas desde el último refresco
+
+        Args:
+            db: Sesión de base de datos
+
+        Returns:
+            Número de filas leídas
+        """
+        since = self._watermark - REFRESH_OVERLAP
+        rows = (
+            db.query(InvalidatedToken.token_hash, InvalidatedToken.expires_at, InvalidatedToken.invalidated_at)
+            .filter(
+                InvalidatedToken.invalidated_at > since,
+                # Solo revocaciones vigentes: recorre únicamente las particiones no vencidas
+                InvalidatedToken.expires_at > datetime.now(timezone.utc)
+            )
+            .all()
+        )
+
+        with self._lock:
+            self._load_rows(rows)
+            if rows:
+                self._watermark = max(self._watermark, max(row.invalidated_at for row in rows))
+            self._last_refresh = time.monotonic()
+
+        return len(rows)
+
+    def refresh_if_stale(self, db: Session) -> None:
+        """
+        Precargar o refrescar la caché si ha pasado el intervalo configurado.
+        Si otro hilo ya está refrescando, no se espera.
+
+        Args:
+            db: Sesión de base de datos
+        """
+        if self._warmed and time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return
+
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        try:
+            if not self._warmed:
+                self.warm(db)
+            else:
+                self.refresh(db)
+        except Exception as e:
+            # Sin datos frescos la caché no puede garantizar fallos de búsqueda
+            with self._lock:
+                self._warmed = False
+            print(f"⚠️ No se pudo refrescar la caché de la blacklist: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def clear(self) -> None:
+        """Vaciar la caché y forzar una nueva precarga"""
+        with self._lock:
+            self._entries.clear()
+            self._expiry_heap.clear()
+            self._filter = None
+            self._warmed = False
+            self._complete = True
+            self._watermark = None
+
+    def stats(self) -> dict:
+        """
+        Obtener estadísticas de la caché
+
+        Returns:
+            Diccionario con estadísticas
+        """
+        with self._lock:
+            return {
+                "enabled": self.store_hashes,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "warmed": self._warmed,
+                "complete": self._complete,
+                "hits": self._hits,
+                "misses": self._misses,
+                "fallbacks": self._fallbacks,
+                "watermark": self._watermark.isoformat() if self._watermark else None
+            }
+
+    def filter_stats(self) -> dict:
+        """
+        Obtener estadísticas del filtro de Bloom, incluida la tasa de falsos
+        positivos observada desde la última reconstrucción
+
+        Returns:
+            Diccionario con estadísticas
+        """
+        with self._lock:
+            if self._filter is None:
+                return {"enabled": self.use_filter, "built": False}
+
+            # Falsos positivos / (falsos positivos + negativos verdaderos)
+            non_revoked_checks = self._filter_false_positives + self._filter_negatives
+            observed_rate = (
+                self._filter_false_positives / non_revoked_checks if non_revoked_checks else 0.0
+            )
+
+            return {
+                "enabled": True,
+                "built": True,
+                **self._filter.stats(),
+                "negatives": self._filter_negatives,
+                "possible_hits": self._filter_positives,
+                "false_positives": self._filter_false_positives,
+                "observed_false_positive_rate": observed_rate,
+                "last_rebuild": self._last_rebuild.isoformat() if self._last_rebuild else None
+            }
+
+    def _load_rows(self, rows) -> None:
+        """Insertar filas (token_hash, expires_at, ...) ya leídas; requiere el lock"""
+        now = time.time()
+        for row in rows:
+            expires_ts = _to_timestamp(row.expires_at)
+            if expires_ts > now:
+                self._insert(row.token_hash, expires_ts)
+
+    def _insert(self, token_hash: str, expires_ts: float) -> None:
+        """Insertar una entrada respetando el tamaño máximo; requiere el lock"""
+        if self._filter is not None:
+            self._filter.add(token_hash)
+
+        if not self.store_hashes:
+            return
+
+        self._entries[token_hash] = expires_ts
+        heapq.heappush(self._expiry_heap, (expires_ts, token_hash))
+
+        if len(self._entries) <= self.max_size:
+            return
+
+        self._purge_expired()
+
+        while len(self._entries) > self.max_size and self._expiry_heap:
+            expires_ts, evicted = heapq.heappop(self._expiry_heap)
+            if self._entries.get(evicted) == expires_ts:
+                del self._entries[evicted]
+                # Se descartó una revocación vigente: los fallos ya no son concluyentes
+                self._complete = False
+
+    def _purge_expired(self) -> None:
+        """Eliminar entradas ya expiradas; requiere el lock"""
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_ts, token_hash = heapq.heappop(self._expiry_heap)
+            if self._entries.get(token_hash) == expires_ts:
+                del self._entries[token_hash]
+
+
+@lru_cache
+def get_blacklist_cache() -> Optional[TokenBlacklistCache]:
+    """
+    Obtiene la caché de blacklist del proceso.
+    Retorna None si tanto la caché como el filtro están deshabilitados.
+    """
+    security = settings.security
+    if not security.blacklist_cache_enabled and not security.blacklist_filter_enabled:
+        return None
+    return TokenBlacklistCache(
+        max_size=security.blacklist_cache_max_size,
+        refresh_seconds=security.blacklist_cache_refresh_seconds,
+        store_hashes=security.blacklist_cache_enabled,
+        use_filter=security.blacklist_filter_enabled,
+        filter_capacity=security.blacklist_filter_capacity,
+        filter_error_rate=security.blacklist_filter_error_rate
+    )
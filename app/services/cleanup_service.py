@@ -2,11 +2,37 @@
 Servicio de limpieza - Limpieza automática de tokens expirados
 """
 
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import delete, func, select
 
+from app.core.config import get_settings
+from app.db import partitions
+from app.db.pagination import count_total
+from app.models.email_outbox import EmailOutbox
 from app.models.invalidated_token import InvalidatedToken
+from app.services.blacklist_cache import get_blacklist_cache
+
+# Obtener configuración
+settings = get_settings()
+
+# Progreso de una limpieza: (lotes completados, tokens eliminados hasta ahora)
+CleanupProgress = Callable[[int, int], None]
+
+# Tipos de token que se registran en invalidated_tokens
+TOKEN_TYPES = ("access", "refresh", "password_reset", "session")
+
+
+def _empty_counts() -> Dict[str, int]:
+    return {"total": 0, "expired": 0, "active": 0}
+
+
+def _add_counts(counts: Dict[str, int], total: int, expired: int) -> None:
+    counts["total"] += total
+    counts["expired"] += expired
+    counts["active"] += total - expired
 
 
 class CleanupService:
@@ -15,126 +41,350 @@ class CleanupService:
     def __init__(self, db: Session):
         self.db = db
     
-    def cleanup_expired_tokens(self) -> int:
+    def cleanup_expired_tokens(
+        self,
+        batch_size: Optional[int] = None,
+        time_budget_seconds: Optional[float] = None,
+        pause_seconds: Optional[float] = None,
+        progress: Optional[CleanupProgress] = None
+    ) -> Dict[str, Any]:
         """
-        Limpiar tokens expirados de la blacklist
+        Limpiar tokens expirados de la blacklist por lotes
         
-        Returns:
-            Número de tokens eliminados
-        """
-        try:
-            current_time = datetime.now(timezone.utc)
-            
-            # Buscar y eliminar tokens expirados
-            expired_tokens = (
-                self.db.query(InvalidatedToken)
-                .filter(InvalidatedToken.expires_at < current_time)
-                .all()
-            )
-            
-            count = len(expired_tokens)
-            
-            if count > 0:
-                for token in expired_tokens:
-                    self.db.delete(token)
-                
-                self.db.commit()
-                print(f"🧹 Limpieza completada: {count} tokens expirados eliminados")
-            else:
-                print("🧹 No hay tokens expirados para limpiar")
+        Args:
+            batch_size: Tokens por lote (por defecto CLEANUP_BATCH_SIZE)
+            time_budget_seconds: Tiempo máximo, 0 sin límite (por defecto CLEANUP_TIME_BUDGET_SECONDS)
+            pause_seconds: Pausa entre lotes (por defecto CLEANUP_BATCH_PAUSE_SECONDS)
+            progress: Función llamada tras cada lote con (lotes, eliminados)
             
-            return count
+        Con invalidated_tokens particionada, primero se purgan completas las
+        particiones expiradas; los lotes solo recorren lo que queda (la
+        partición en curso y la partición por defecto).
+        
+        Returns:
+            Resultado con deleted, batches, elapsed_seconds, completed
+            (False si se agotó el tiempo y quedan tokens por eliminar) y
+            partitions_purged
             
-        except Exception as e:
-            self.db.rollback()
-            print(f"❌ Error durante la limpieza: {e}")
-            return 0
+        Raises:
+            Exception: Si falla un lote (los anteriores quedan confirmados)
+        """
+        current_time = datetime.now(timezone.utc)
+        purged = self.purge_expired_partitions(current_time)
+        
+        result = self._delete_in_batches(
+            InvalidatedToken.expires_at < current_time,
+            batch_size, time_budget_seconds, pause_seconds, progress
+        )
+        result["partitions_purged"] = purged
+        
+        if purged:
+            print(f"🧹 Particiones expiradas purgadas ({settings.security.blacklist_partition_purge_mode}): {', '.join(purged)}")
+        if result["deleted"] > 0 or purged:
+            print(f"🧹 Limpieza completada: {result['deleted']} tokens expirados eliminados en {result['batches']} lotes")
+            self.rebuild_blacklist_filter()
+        else:
+            print("🧹 No hay tokens expirados para limpiar")
+        
+        return result
     
-    def get_blacklist_stats(self) -> dict:
+    def get_blacklist_stats(self, mode: str = "exact", by_company: bool = False) -> dict:
         """
-        Obtener estadísticas de la blacklist
+        Obtener estadísticas de la blacklist por tipo de token
+        
+        - exact: una sola consulta con COUNT(*) FILTER (WHERE expires_at < now)
+          agrupada por token_type (y por company_id si by_company)
+        - estimated: estimaciones del planificador (EXPLAIN) sin recorrer la
+          tabla; en motores distintos de PostgreSQL equivale a exact
         
+        Args:
+            mode: "exact" o "estimated"
+            by_company: Incluir el desglose por empresa (solo en modo exact)
+            
         Returns:
-            Diccionario con estadísticas
+            Diccionario con estadísticas, vacío si hubo un error
         """
         try:
             current_time = datetime.now(timezone.utc)
             
-            # Total de tokens en blacklist
-            total_tokens = self.db.query(InvalidatedToken).count()
-            
-            # Tokens expirados
-            expired_tokens = (
-                self.db.query(InvalidatedToken)
-                .filter(InvalidatedToken.expires_at < current_time)
-                .count()
-            )
-            
-            # Tokens activos (no expirados)
-            active_tokens = total_tokens - expired_tokens
-            
-            # Tokens por tipo
-            access_tokens = (
-                self.db.query(InvalidatedToken)
-                .filter(InvalidatedToken.token_type == "access")
-                .count()
-            )
-            
-            refresh_tokens = (
-                self.db.query(InvalidatedToken)
-                .filter(InvalidatedToken.token_type == "refresh")
-                .count()
-            )
+            if mode == "estimated":
+                by_type = self._estimate_counts_by_type(current_time)
+                companies = None
+            else:
+                by_type, companies = self._count_by_type(current_time, by_company)
             
-            return {
-                "total_tokens": total_tokens,
-                "expired_tokens": expired_tokens,
-                "active_tokens": active_tokens,
-                "access_tokens": access_tokens,
-                "refresh_tokens": refresh_tokens,
+            stats = {
+                "mode": mode,
+                "total_tokens": sum(counts["total"] for counts in by_type.values()),
+                "expired_tokens": sum(counts["expired"] for counts in by_type.values()),
+                "active_tokens": sum(counts["active"] for counts in by_type.values()),
+                "access_tokens": by_type["access"]["total"],
+                "refresh_tokens": by_type["refresh"]["total"],
+                "password_reset_tokens": by_type["password_reset"]["total"],
+                "session_tokens": by_type["session"]["total"],
+                "by_type": by_type,
                 "last_updated": current_time.isoformat()
             }
+            if companies is not None:
+                stats["companies"] = companies
+            return stats
             
         except Exception as e:
+            self.db.rollback()
             print(f"❌ Error obteniendo estadísticas: {e}")
             return {}
     
-    def cleanup_old_tokens(self, days_old: int = 30) -> int:
+    def _count_by_type(self, current_time: datetime, by_company: bool):
+        """Conteo exacto por tipo (y empresa) en una sola pasada"""
+        group_columns = [InvalidatedToken.token_type]
+        if by_company:
+            group_columns.insert(0, InvalidatedToken.company_id)
+        
+        rows = (
+            self.db.query(
+                *group_columns,
+                func.count().label("total"),
+                func.count().filter(InvalidatedToken.expires_at < current_time).label("expired")
+            )
+            .group_by(*group_columns)
+            .all()
+        )
+        
+        by_type = {token_type: _empty_counts() for token_type in TOKEN_TYPES}
+        companies: Dict[Any, Dict[str, Any]] = {}
+        for row in rows:
+            _add_counts(by_type.setdefault(row.token_type, _empty_counts()), row.total, row.expired)
+            if by_company:
+                # company_id es NULL en los tokens de reset de contraseña
+                company_key = str(row.company_id) if row.company_id else None
+                company = companies.setdefault(company_key, {
+                    "company_id": company_key,
+                    **_empty_counts(),
+                    "by_type": {}
+                })
+                _add_counts(company, row.total, row.expired)
+                _add_counts(company["by_type"].setdefault(row.token_type, _empty_counts()), row.total, row.expired)
+        
+        company_list = sorted(companies.values(), key=lambda company: -company["total"]) if by_company else None
+        return by_type, company_list
+    
+    def _estimate_counts_by_type(self, current_time: datetime) -> Dict[str, Dict[str, int]]:
+        """Estimación por tipo con EXPLAIN: no lee filas, también sobre la tabla particionada"""
+        by_type = {}
+        for token_type in TOKEN_TYPES:
+            query = self.db.query(InvalidatedToken.id).filter(InvalidatedToken.token_type == token_type)
+            total = count_total(self.db, query, "estimated", InvalidatedToken.__tablename__, filtered=True)
+            expired = count_total(
+                self.db,
+                query.filter(InvalidatedToken.expires_at < current_time),
+                "estimated",
+                InvalidatedToken.__tablename__,
+                filtered=True
+            )
+            expired = min(expired, total)
+            by_type[token_type] = {"total": total, "expired": expired, "active": total - expired}
+        return by_type
+    
+    def cleanup_old_tokens(
+        self,
+        days_old: int = 30,
+        batch_size: Optional[int] = None,
+        time_budget_seconds: Optional[float] = None,
+        pause_seconds: Optional[float] = None,
+        progress: Optional[CleanupProgress] = None
+    ) -> Dict[str, Any]:
         """
-        Limpiar tokens antiguos (más de X días)
+        Limpiar tokens antiguos (más de X días) por lotes
         
         Args:
             days_old: Número de días para considerar un token como antiguo
+            batch_size: Tokens por lote (por defecto CLEANUP_BATCH_SIZE)
+            time_budget_seconds: Tiempo máximo, 0 sin límite (por defecto CLEANUP_TIME_BUDGET_SECONDS)
+            pause_seconds: Pausa entre lotes (por defecto CLEANUP_BATCH_PAUSE_SECONDS)
+            progress: Función llamada tras cada lote con (lotes, eliminados)
             
         Returns:
-            Número de tokens eliminados
+            Resultado con deleted, batches, elapsed_seconds y completed
+            
+        Raises:
+            Exception: Si falla un lote (los anteriores quedan confirmados)
+        """
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
+        result = self._delete_in_batches(
+            InvalidatedToken.invalidated_at < cutoff_date,
+            batch_size, time_budget_seconds, pause_seconds, progress
+        )
+        
+        if result["deleted"] > 0:
+            print(f"🧹 Limpieza de tokens antiguos completada: {result['deleted']} tokens eliminados en {result['batches']} lotes")
+            self.rebuild_blacklist_filter()
+        else:
+            print(f"🧹 No hay tokens más antiguos que {days_old} días")
+        
+        return result
+    
+    def _delete_in_batches(
+        self,
+        condition,
+        batch_size: Optional[int],
+        time_budget_seconds: Optional[float],
+        pause_seconds: Optional[float],
+        progress: Optional[CleanupProgress]
+    ) -> Dict[str, Any]:
         """
+        Eliminar los tokens que cumplen condition con
+        DELETE ... WHERE id IN (SELECT id ... ORDER BY expires_at LIMIT n),
+        un commit por lote, hasta que no queden o se agote el tiempo.
+        
+        Cada lote es una transacción corta: no retiene locks ni carga filas en
+        el ORM, y el recorrido por expires_at usa su índice.
+        
+        Raises:
+            Exception: El error de la base de datos, tras deshacer el lote en curso
+        """
+        batch_size = batch_size or settings.security.cleanup_batch_size
+        if time_budget_seconds is None:
+            time_budget_seconds = settings.security.cleanup_time_budget_seconds
+        if pause_seconds is None:
+            pause_seconds = settings.security.cleanup_batch_pause_seconds
+        
+        start = time.monotonic()
+        deleted = 0
+        batches = 0
+        completed = False
+        
         try:
-            from datetime import timedelta
-            
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
-            
-            # Buscar tokens más antiguos que la fecha límite
-            old_tokens = (
-                self.db.query(InvalidatedToken)
-                .filter(InvalidatedToken.invalidated_at < cutoff_date)
-                .all()
-            )
-            
-            count = len(old_tokens)
-            
-            if count > 0:
-                for token in old_tokens:
-                    self.db.delete(token)
-                
+            while True:
+                batch_ids = (
+                    select(InvalidatedToken.id)
+                    .where(condition)
+                    .order_by(InvalidatedToken.expires_at)
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+                removed = self.db.execute(
+                    delete(InvalidatedToken)
+                    .where(InvalidatedToken.id.in_(batch_ids))
+                    .execution_options(synchronize_session=False)
+                ).rowcount
                 self.db.commit()
-                print(f"🧹 Limpieza de tokens antiguos completada: {count} tokens eliminados")
-            else:
-                print(f"🧹 No hay tokens más antiguos que {days_old} días")
+                
+                if removed:
+                    batches += 1
+                    deleted += removed
+                    if progress:
+                        progress(batches, deleted)
+                
+                if removed < batch_size:
+                    completed = True
+                    break
+                if time_budget_seconds and time.monotonic() - start >= time_budget_seconds:
+                    print(f"⏱️ Limpieza detenida por tiempo tras {batches} lotes; quedan tokens por eliminar")
+                    break
+                if pause_seconds:
+                    time.sleep(pause_seconds)
+        except Exception as e:
+            # Los lotes anteriores ya se confirmaron; el error se propaga para
+            # que el endpoint responda 500 y el programador lo registre
+            self.db.rollback()
+            print(f"❌ Error durante la limpieza tras {deleted} tokens eliminados: {e}")
+            raise
+        
+        return {
+            "deleted": deleted,
+            "batches": batches,
+            "elapsed_seconds": round(time.monotonic() - start, 3),
+            "completed": completed
+        }
+    
+    def cleanup_email_outbox(self, days_old: int = 7) -> Dict[str, Any]:
+        """
+        Eliminar de email_outbox los emails enviados o fallidos con más de
+        days_old días; los pendientes se conservan hasta entregarse o fallar
+        
+        Args:
+            days_old: Antigüedad en días de los emails a eliminar
             
-            return count
+        Returns:
+            Resultado con deleted
+        """
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
+        deleted = self.db.execute(
+            delete(EmailOutbox)
+            .where(EmailOutbox.status.in_(("sent", "failed")), EmailOutbox.created_at < cutoff_date)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        
+        if deleted:
+            print(f"🧹 Limpieza de email_outbox completada: {deleted} emails eliminados")
+        
+        return {"deleted": deleted}
+    
+    def maintain_partitions(self) -> List[str]:
+        """
+        Crear por adelantado las particiones de invalidated_tokens
+        (BLACKLIST_PARTITIONS_AHEAD periodos de BLACKLIST_PARTITION_INTERVAL)
+        
+        Returns:
+            Particiones creadas; vacío si la tabla no está particionada
+        """
+        try:
+            if not partitions.is_partitioned(self.db):
+                return []
+            created = partitions.ensure_partitions(
+                self.db,
+                settings.security.blacklist_partitions_ahead,
+                settings.security.blacklist_partition_interval
+            )
+            if created:
+                print(f"🗂️ Particiones de invalidated_tokens creadas: {', '.join(created)}")
+            return created
+        except Exception as e:
+            self.db.rollback()
+            print(f"❌ Error creando particiones de invalidated_tokens: {e}")
+            return []
+    
+    def purge_expired_partitions(self, current_time: Optional[datetime] = None) -> List[str]:
+        """
+        Purgar las particiones de invalidated_tokens cuyo rango ya expiró
+        
+        Args:
+            current_time: Fecha de referencia (por defecto, ahora)
             
+        Returns:
+            Particiones purgadas; vacío si la tabla no está particionada
+        """
+        try:
+            if not partitions.is_partitioned(self.db):
+                return []
+            return partitions.purge_expired_partitions(
+                self.db,
+                settings.security.blacklist_partition_purge_mode,
+                current_time
+            )
         except Exception as e:
             self.db.rollback()
-            print(f"❌ Error durante la limpieza de tokens antiguos: {e}")
-            return 0 
\ No newline at end of file
+            print(f"❌ Error purgando particiones de invalidated_tokens: {e}")
+            return []
+    
+    def rebuild_blacklist_filter(self) -> int:
+        """
+        Reconstruir el filtro de Bloom y la caché de la blacklist desde la tabla.
+        Los filtros de Bloom no permiten borrar, así que esta es la forma de
+        descartar los tokens que ya expiraron o se eliminaron.
+        
+        Returns:
+            Número de tokens revocados cargados, -1 si la caché está deshabilitada
+        """
+        cache = get_blacklist_cache()
+        if cache is None:
+            return -1
+        
+        try:
+            loaded = cache.warm(self.db)
+            print(f"🔁 Filtro de blacklist reconstruido: {loaded} tokens revocados")
+            return loaded
+        except Exception as e:
+            print(f"❌ Error reconstruyendo el filtro de blacklist: {e}")
+            return -1
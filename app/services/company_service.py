@@ -2,9 +2,13 @@
 Servicio de empresas - CRUD y lógica de negocio
 """
 
-from typing import Optional, List, Dict, Any
+import csv
+import io
+import json
+import uuid
+from typing import Optional, List, Dict, Any, Iterator
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, text
+from sqlalchemy import and_, distinct, func, or_, text
 from fastapi import HTTPException, status
 
 from app.models.company import Company
@@ -13,11 +17,20 @@ from app.models.user import AppUser
 from app.models.user_role import UserRole
 from app.models.role import Role
 from app.schemas.company import CompanyCreate, CompanyUpdate, CompanyRead
+from app.db.pagination import KeysetPage, count_total, paginate_keyset
+from app.db.search import ranked_page, search_filter, uses_similarity
+from app.db.session import SessionLocal
+
+# Columnas del export de usuarios de una empresa (CSV)
+COMPANY_USER_EXPORT_COLUMNS = ["user_id", "user_name", "user_email", "joined_at", "is_active", "is_verified", "roles"]
 
 
 class CompanyService:
     """Servicio para operaciones con empresas"""
     
+    # Columnas del parámetro search (con índice trigram)
+    SEARCH_COLUMNS = (Company.name,)
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -85,13 +98,51 @@ class CompanyService:
         Returns:
             Lista de empresas
         """
+        query = self._companies_query(search)
+        
+        return query.order_by(Company.created_at, Company.id).offset(skip).limit(limit).all()
+    
+    def get_companies_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        count: Optional[str] = None,
+        search_mode: str = "contains"
+    ) -> KeysetPage:
+        """
+        Obtener una página de empresas por cursor, ordenada por (created_at, id).
+        Con search_mode="similar" devuelve las más parecidas al término, sin cursor.
+        
+        Args:
+            limit: Tamaño de página
+            cursor: Cursor devuelto por la página anterior
+            search: Término de búsqueda
+            count: None, "exact" o "estimated" para incluir el total
+            search_mode: contains (subcadena) o similar (similitud trigram)
+            
+        Returns:
+            Página con empresas, cursor siguiente y total opcional
+        """
+        query = self._companies_query(search, search_mode)
+        
+        if search and uses_similarity(self.db, search_mode):
+            page = ranked_page(query, self.SEARCH_COLUMNS, search, Company.id, limit)
+        else:
+            page = paginate_keyset(query, [Company.created_at, Company.id], limit, cursor)
+        page.total = count_total(self.db, query, count, Company.__tablename__, filtered=bool(search))
+        
+        return page
+    
+    def _companies_query(self, search: Optional[str] = None, search_mode: str = "contains"):
+        """Consulta de empresas con los filtros del listado aplicados"""
         query = self.db.query(Company)
         
         # Aplicar filtros
         if search:
-            query = query.filter(Company.name.ilike(f"%{search}%"))
+            query = query.filter(search_filter(self.db, self.SEARCH_COLUMNS, search, search_mode))
         
-        return query.offset(skip).limit(limit).all()
+        return query
     
     def update_company(self, company_id: str, company_data: CompanyUpdate) -> Optional[Company]:
         """
@@ -241,46 +292,110 @@ class CompanyService:
         Returns:
             Lista de usuarios de la empresa con sus roles
         """
-        # Consulta con joins para obtener usuarios y sus roles en la empresa
-        users_with_roles = (
-            self.db.query(CompanyUser, AppUser, UserRole, Role)
-            .filter(CompanyUser.company_id == company_id)
-            #.filter(CompanyUser.is_active == True)
-            .join(AppUser, CompanyUser.user_id == AppUser.id)
-            .outerjoin(UserRole, UserRole.user_id == AppUser.id)
-            .outerjoin(Role, 
-                      (Role.id == UserRole.role_id) & 
-                      (Role.company_id == company_id))
-            .all()
-        )
+        query = self._company_users_query(company_id).order_by(CompanyUser.created_at, CompanyUser.user_id)
+        
+        return [self._company_user_row(row) for row in query.all()]
+    
+    def get_company_users_page(
+        self,
+        company_id: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> KeysetPage:
+        """
+        Obtener una página de usuarios de una empresa con sus roles,
+        ordenada por fecha de ingreso (joined_at, user_id)
         
-        # Agrupar por usuario para manejar múltiples roles
-        users_dict = {}
-        for cu, user, user_role, role in users_with_roles:
-            user_id = str(cu.user_id)
+        Args:
+            company_id: ID de la empresa
+            limit: Tamaño de página
+            cursor: Cursor devuelto por la página anterior
+            is_active: Filtrar por estado de la membresía
             
-            if user_id not in users_dict:
-                users_dict[user_id] = {
-                    "user_id": cu.user_id,
-                    "user_name": user.name,
-                    "user_email": user.email,
-                    "joined_at": cu.created_at,
-                    "is_active": cu.is_active,
-                    "is_verified": cu.is_verified,
-                    "roles": []
-                }
+        Returns:
+            Página con los usuarios y el cursor siguiente
+        """
+        page = paginate_keyset(
+            self._company_users_query(company_id, is_active),
+            [CompanyUser.created_at, CompanyUser.user_id],
+            limit,
+            cursor,
+            key_of=lambda row: (row.joined_at, row.user_id)
+        )
+        page.items = [self._company_user_row(row) for row in page.items]
+        
+        return page
+    
+    def stream_company_users(self, company_id: str, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Recorrer los usuarios de una empresa con un cursor del lado del servidor;
+        la memoria no crece con el tamaño de la empresa
+        
+        Args:
+            company_id: ID de la empresa
+            batch_size: Filas pedidas a la base de datos por vez
             
-            # Agregar rol si existe
-            if role and role.name:
-                users_dict[user_id]["roles"].append(role.name)
+        Returns:
+            Iterador de usuarios con sus roles
+        """
+        query = (
+            self._company_users_query(company_id)
+            .order_by(CompanyUser.created_at, CompanyUser.user_id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for row in query:
+            yield self._company_user_row(row)
+    
+    def _company_users_query(self, company_id: str, is_active: Optional[bool] = None):
+        """
+        Una fila por miembro con sus roles de la empresa agregados en SQL
+        (array_agg en PostgreSQL, group_concat en otros motores)
+        """
+        company_uuid = uuid.UUID(str(company_id))
+        if self.db.get_bind().dialect.name == "postgresql":
+            roles = func.array_agg(distinct(Role.name)).filter(Role.name.isnot(None))
+        else:
+            roles = func.group_concat(distinct(Role.name))
+        
+        query = (
+            self.db.query(
+                CompanyUser.user_id.label("user_id"),
+                AppUser.name.label("user_name"),
+                AppUser.email.label("user_email"),
+                CompanyUser.created_at.label("joined_at"),
+                CompanyUser.is_active.label("is_active"),
+                CompanyUser.is_verified.label("is_verified"),
+                roles.label("roles")
+            )
+            .join(AppUser, CompanyUser.user_id == AppUser.id)
+            .outerjoin(UserRole, UserRole.user_id == AppUser.id)
+            .outerjoin(Role, and_(Role.id == UserRole.role_id, Role.company_id == company_uuid))
+            .filter(CompanyUser.company_id == company_uuid)
+            .group_by(CompanyUser.user_id, CompanyUser.company_id, AppUser.id)
+        )
         
-        # Convertir a lista y eliminar duplicados en roles
-        result = []
-        for user_data in users_dict.values():
-            user_data["roles"] = list(set(user_data["roles"]))  # Eliminar duplicados
-            result.append(user_data)
+        if is_active is not None:
+            query = query.filter(CompanyUser.is_active == is_active)
         
-        return result
+        return query
+    
+    @staticmethod
+    def _company_user_row(row) -> Dict[str, Any]:
+        """Convertir una fila agregada al diccionario de la respuesta"""
+        roles = row.roles or []
+        if isinstance(roles, str):
+            roles = roles.split(",")
+        
+        return {
+            "user_id": row.user_id,
+            "user_name": row.user_name,
+            "user_email": row.user_email,
+            "joined_at": row.joined_at,
+            "is_active": row.is_active,
+            "is_verified": row.is_verified,
+            "roles": list(roles)
+        }
     
     def create_company_with_user(self, company_name: str, user_name: str, user_email: str) -> Dict[str, Any]:
         """
@@ -359,3 +474,41 @@ class CompanyService:
                 detail=f"Error al crear empresa con usuario: {error_message}"
             )
 
+
+def iter_company_users_export(company_id: str, export_format: str) -> Iterator[str]:
+    """
+    Generar el export de usuarios de una empresa línea por línea.
+
+    Usa su propia sesión: el cuerpo de un StreamingResponse se envía después
+    de que FastAPI cierra las dependencias del request. La sesión se cierra al
+    terminar o si el cliente corta la descarga.
+
+    Args:
+        company_id: ID de la empresa
+        export_format: "ndjson" o "csv"
+
+    Returns:
+        Iterador de líneas de texto terminadas en salto de línea
+    """
+    db = SessionLocal()
+    try:
+        rows = CompanyService(db).stream_company_users(company_id)
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(COMPANY_USER_EXPORT_COLUMNS)
+            for row in rows:
+                writer.writerow([
+                    "|".join(row[column]) if column == "roles" else row[column]
+                    for column in COMPANY_USER_EXPORT_COLUMNS
+                ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+        else:
+            for row in rows:
+                yield json.dumps(row, default=str) + "\n"
+    finally:
+        db.close()
@@ -0,0 +1,296 @@
+"""
+Envío de emails en segundo plano: cola asyncio en memoria con una cola
+persistente opcional (tabla email_outbox) para sobrevivir reinicios
+"""
+
+import abc
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.email_outbox import EmailOutbox
+
+# Mientras un email está en la cola en memoria de un proceso, los demás no lo
+# leen de email_outbox hasta que pase este tiempo sin que se marque enviado
+OUTBOX_LEASE_SECONDS = 300
+
+# Emails leídos de email_outbox en cada lectura periódica
+OUTBOX_POLL_BATCH = 100
+
+
+class OutboxMessage:
+    """Email en la cola del dispatcher"""
+
+    def __init__(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        id: Optional[object] = None,
+        attempts: int = 0
+    ):
+        self.to_email = to_email
+        self.subject = subject
+        self.html_content = html_content
+        # None si el email no está persistido en email_outbox
+        self.id = id
+        self.attempts = attempts
+
+
+class EmailOutboxStore(abc.ABC):
+    """
+    Cola persistente de emails.
+    Todas las operaciones son síncronas; el dispatcher las ejecuta fuera del event loop.
+    """
+
+    @abc.abstractmethod
+    def add(self, message: OutboxMessage, lease_seconds: float) -> None:
+        """Persistir un email nuevo y asignar message.id"""
+
+    @abc.abstractmethod
+    def claim_due(self, limit: int, lease_seconds: float) -> List[OutboxMessage]:
+        """Tomar los emails pendientes cuyo próximo intento ya venció"""
+
+    @abc.abstractmethod
+    def mark_sent(self, message: OutboxMessage) -> None:
+        """Marcar un email como enviado"""
+
+    @abc.abstractmethod
+    def mark_retry(self, message: OutboxMessage, error: str, delay_seconds: float) -> None:
+        """Registrar un intento fallido y programar el siguiente"""
+
+    @abc.abstractmethod
+    def mark_failed(self, message: OutboxMessage, error: str) -> None:
+        """Marcar un email como fallido tras agotar los intentos"""
+
+
+class SqlEmailOutbox(EmailOutboxStore):
+    """Cola persistente sobre la tabla email_outbox, con una sesión propia por operación"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def add(self, message: OutboxMessage, lease_seconds: float) -> None:
+        db = self.session_factory()
+        try:
+            row = EmailOutbox(
+                to_email=message.to_email,
+                subject=message.subject,
+                html_content=message.html_content,
+                next_attempt_at=_now() + timedelta(seconds=lease_seconds)
+            )
+            db.add(row)
+            db.commit()
+            message.id = row.id
+        finally:
+            db.close()
+
+    def claim_due(self, limit: int, lease_seconds: float) -> List[OutboxMessage]:
+        db = self.session_factory()
+        try:
+            now = _now()
+            query = (
+                db.query(EmailOutbox)
+                .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(limit)
+            )
+            # Varios procesos leen la misma tabla: cada fila la toma uno solo
+            if db.get_bind().dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+
+            rows = query.all()
+            messages = [
+                OutboxMessage(row.to_email, row.subject, row.html_content, id=row.id, attempts=row.attempts)
+                for row in rows
+            ]
+            for row in rows:
+                row.next_attempt_at = now + timedelta(seconds=lease_seconds)
+            db.commit()
+            return messages
+        finally:
+            db.close()
+
+    def mark_sent(self, message: OutboxMessage) -> None:
+        # Sin el HTML: ya no se necesita y contiene el enlace con el token
+        self._update(message, {
+            "status": "sent",
+            "attempts": message.attempts,
+            "sent_at": _now(),
+            "last_error": None,
+            "html_content": None,
+        })
+
+    def mark_retry(self, message: OutboxMessage, error: str, delay_seconds: float) -> None:
+        self._update(message, {
+            "attempts": message.attempts,
+            "last_error": error,
+            "next_attempt_at": _now() + timedelta(seconds=delay_seconds),
+        })
+
+    def mark_failed(self, message: OutboxMessage, error: str) -> None:
+        self._update(message, {"status": "failed", "attempts": message.attempts, "last_error": error, "html_content": None})
+
+    def _update(self, message: OutboxMessage, values: Dict[str, object]) -> None:
+        db = self.session_factory()
+        try:
+            db.query(EmailOutbox).filter(EmailOutbox.id == message.id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class EmailDispatcher:
+    """
+    Envía emails en segundo plano con reintentos y backoff exponencial.
+
+    enqueue() puede llamarse desde cualquier hilo (los servicios síncronos corren
+    en el threadpool). Los workers envían con el transporte fuera del event loop.
+    Con un store, los reintentos se programan en email_outbox y se retoman en la
+    lectura periódica, también tras un reinicio; sin store, se reprograman en memoria.
+    """
+
+    def __init__(
+        self,
+        transport: Callable[[OutboxMessage], None],
+        store: Optional[EmailOutboxStore] = None,
+        workers: int = 2,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 2.0,
+        retry_max_seconds: float = 300.0,
+        poll_seconds: float = 30.0
+    ):
+        self.transport = transport
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_seconds = poll_seconds
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stats = {"enqueued": 0, "sent": 0, "retried": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Contadores del proceso y emails en la cola en memoria"""
+        return {**self._stats, "queued": self._queue.qsize() if self._queue else 0}
+
+    async def start(self) -> None:
+        """Iniciar los workers y, con store, la lectura periódica de email_outbox"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.store is not None:
+            self._tasks.append(asyncio.create_task(self._poll()))
+        print(f"📧 Dispatcher de email iniciado ({self.workers} workers)")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Detener el dispatcher esperando hasta timeout a que se vacíe la cola.
+        Los emails persistidos que no se enviaron se retoman al reiniciar.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Dispatcher de email detenido con {self._queue.qsize()} emails en cola")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, to_email: str, subject: str, html_content: str) -> None:
+        """
+        Encolar un email sin esperar su envío. Seguro desde cualquier hilo.
+
+        Args:
+            to_email: Email del destinatario
+            subject: Asunto del email
+            html_content: Contenido HTML del email
+
+        Raises:
+            RuntimeError: Si el dispatcher no está iniciado
+        """
+        if not self.running:
+            raise RuntimeError("El dispatcher de email no está iniciado")
+
+        message = OutboxMessage(to_email, subject, html_content)
+        if self.store is not None:
+            try:
+                self.store.add(message, OUTBOX_LEASE_SECONDS)
+            except Exception as e:
+                # Sin persistencia el email igual se envía, pero no sobrevive un reinicio
+                print(f"⚠️ No se pudo persistir el email en email_outbox: {e}")
+
+        self._stats["enqueued"] += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    def retry_delay(self, attempts: int) -> float:
+        """Espera antes del siguiente intento tras attempts intentos fallidos"""
+        return min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+
+    async def _worker(self) -> None:
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(message)
+            except Exception as e:
+                print(f"⚠️ Error en el dispatcher de email: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, message: OutboxMessage) -> None:
+        message.attempts += 1
+        persisted = self.store is not None and message.id is not None
+        try:
+            await asyncio.to_thread(self.transport, message)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            if message.attempts >= self.max_attempts:
+                self._stats["failed"] += 1
+                print(f"❌ Email a {message.to_email} descartado tras {message.attempts} intentos: {error}")
+                if persisted:
+                    await asyncio.to_thread(self.store.mark_failed, message, error)
+                return
+
+            delay = self.retry_delay(message.attempts)
+            self._stats["retried"] += 1
+            print(f"⚠️ Error enviando email a {message.to_email}, reintento en {delay:.1f}s: {error}")
+            if persisted:
+                await asyncio.to_thread(self.store.mark_retry, message, error, delay)
+            else:
+                self._loop.call_later(delay, self._queue.put_nowait, message)
+            return
+
+        self._stats["sent"] += 1
+        if persisted:
+            await asyncio.to_thread(self.store.mark_sent, message)
+
+    async def _poll(self) -> None:
+        """Retomar pendientes de email_outbox: reintentos vencidos y emails de procesos caídos"""
+        while True:
+            try:
+                messages = await asyncio.to_thread(self.store.claim_due, OUTBOX_POLL_BATCH, OUTBOX_LEASE_SECONDS)
+                for message in messages:
+                    self._queue.put_nowait(message)
+            except Exception as e:
+                print(f"⚠️ Error leyendo email_outbox: {e}")
+            await asyncio.sleep(self.poll_seconds)
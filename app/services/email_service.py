@@ -2,18 +2,166 @@
 Servicio de email - Envío de emails para verificación y reset de contraseña
 """
 
+import queue
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 from fastapi import HTTPException, status
 
 from app.core.config import get_settings
+from app.services.email_dispatcher import EmailDispatcher, OutboxMessage, SqlEmailOutbox
 
 # Obtener configuración
 settings = get_settings()
 
 
+class SmtpConnectionPool:
+    """
+    Conexiones SMTP reutilizables entre envíos.
+    Abrir una conexión cuesta TCP + STARTTLS + LOGIN; el pool las mantiene
+    abiertas y verifica con NOOP las que estuvieron inactivas más de idle_seconds.
+    """
+    
+    def __init__(
+        self,
+        server: str,
+        port: int,
+        use_tls: bool,
+        username: Optional[str],
+        password: Optional[str],
+        timeout: float,
+        max_size: int,
+        idle_seconds: float
+    ):
+        self.server = server
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        # LIFO: se reutiliza la conexión usada más recientemente
+        self._idle: "queue.LifoQueue[Tuple[smtplib.SMTP, float]]" = queue.LifoQueue()
+    
+    def connect(self) -> smtplib.SMTP:
+        """Abrir una conexión nueva, con STARTTLS y login si están configurados"""
+        connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password)
+        except Exception:
+            self._discard(connection)
+            raise
+        return connection
+    
+    def send(self, message: MIMEMultipart) -> None:
+        """
+        Enviar un mensaje con una conexión del pool
+        
+        Args:
+            message: Mensaje MIME a enviar
+            
+        Raises:
+            smtplib.SMTPException, OSError: Si el envío falla
+        """
+        connection = self._acquire()
+        try:
+            connection.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la conexión reutilizada: un intento con una nueva
+            self._discard(connection)
+            connection = self.connect()
+            try:
+                connection.send_message(message)
+            except Exception:
+                self._discard(connection)
+                raise
+        except Exception:
+            self._discard(connection)
+            raise
+        self._release(connection)
+    
+    def close(self) -> None:
+        """Cerrar las conexiones inactivas del pool"""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+    
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                connection, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self.connect()
+            if time.monotonic() - last_used <= self.idle_seconds:
+                return connection
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(connection)
+    
+    def _release(self, connection: smtplib.SMTP) -> None:
+        if self._idle.qsize() >= self.max_size:
+            self._discard(connection)
+        else:
+            self._idle.put((connection, time.monotonic()))
+    
+    @staticmethod
+    def _discard(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+
+@lru_cache()
+def get_smtp_pool() -> SmtpConnectionPool:
+    """Obtener el pool de conexiones SMTP (singleton)"""
+    return SmtpConnectionPool(
+        server=settings.email.smtp_server,
+        port=settings.email.smtp_port,
+        use_tls=settings.email.smtp_use_tls,
+        username=settings.email.smtp_username,
+        password=settings.email.smtp_password,
+        timeout=settings.email.smtp_timeout_seconds,
+        max_size=settings.email.smtp_pool_size,
+        idle_seconds=settings.email.smtp_idle_seconds
+    )
+
+
+def send_outbox_message(message: OutboxMessage) -> None:
+    """Transporte del dispatcher: enviar un email de la cola con el pool SMTP"""
+    email_service = EmailService()
+    get_smtp_pool().send(
+        email_service._create_message(message.to_email, message.subject, message.html_content)
+    )
+
+
+@lru_cache()
+def get_email_dispatcher() -> EmailDispatcher:
+    """Obtener el dispatcher de emails en segundo plano (singleton)"""
+    return EmailDispatcher(
+        transport=send_outbox_message,
+        store=SqlEmailOutbox() if settings.email.email_outbox_enabled else None,
+        workers=settings.email.email_dispatcher_workers,
+        max_attempts=settings.email.email_max_attempts,
+        retry_base_seconds=settings.email.email_retry_base_seconds,
+        retry_max_seconds=settings.email.email_retry_max_seconds,
+        poll_seconds=settings.email.email_outbox_poll_seconds
+    )
+
+
 class EmailService:
     """Servicio para envío de emails"""
     
@@ -52,7 +200,7 @@ class EmailService:
     
     def _send_email(self, message: MIMEMultipart) -> bool:
         """
-        Enviar email usando SMTP
+        Enviar email usando SMTP, con una conexión del pool
         
         Args:
             message: Mensaje MIME a enviar
@@ -61,26 +209,32 @@ class EmailService:
             True si se envió correctamente
         """
         try:
-            # Crear conexión SMTP
-            if self.smtp_use_tls:
-                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-                server.starttls()
-            else:
-                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            
-            # Autenticación
-            server.login(self.smtp_username, self.smtp_password)
-            
-            # Enviar email
-            server.send_message(message)
-            server.quit()
-            
+            get_smtp_pool().send(message)
             return True
             
         except Exception as e:
             print(f"Error enviando email: {e}")
             return False
     
+    def _deliver(self, to_email: str, subject: str, html_content: str) -> bool:
+        """
+        Encolar el email en el dispatcher si está iniciado; si no, enviarlo ahora
+        
+        Args:
+            to_email: Email del destinatario
+            subject: Asunto del email
+            html_content: Contenido HTML del email
+            
+        Returns:
+            True si se encoló o se envió correctamente
+        """
+        dispatcher = get_email_dispatcher()
+        if dispatcher.running:
+            dispatcher.enqueue(to_email, subject, html_content)
+            return True
+        
+        return self._send_email(self._create_message(to_email, subject, html_content))
+    
     def _get_password_reset_template(self, token: str, user_name: str) -> str:
         """
         Generar template HTML para reset de contraseña
@@ -267,13 +421,12 @@ class EmailService:
             user_name: Nombre del usuario
             
         Returns:
-            True si se envió correctamente
+            True si se encoló o se envió correctamente
         """
         subject = "🔐 Reset de Contraseña - Base Auth Backend"
         html_content = self._get_password_reset_template(token, user_name)
         
-        message = self._create_message(email, subject, html_content)
-        return self._send_email(message)
+        return self._deliver(email, subject, html_content)
     
     def send_verification_email(self, email: str, token: str, user_name: str) -> bool:
         """
@@ -285,13 +438,12 @@ class EmailService:
             user_name: Nombre del usuario
             
         Returns:
-            True si se envió correctamente
+            True si se encoló o se envió correctamente
         """
         subject = "✅ Verifica tu Email - Base Auth Backend"
         html_content = self._get_email_verification_template(token, user_name)
         
-        message = self._create_message(email, subject, html_content)
-        return self._send_email(message)
+        return self._deliver(email, subject, html_content)
     
     def test_connection(self) -> bool:
         """
@@ -301,13 +453,7 @@ class EmailService:
             True si la conexión es exitosa
         """
         try:
-            if self.smtp_use_tls:
-                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-                server.starttls()
-            else:
-                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            
-            server.login(self.smtp_username, self.smtp_password)
+            server = get_smtp_pool().connect()
             server.quit()
             return True
             
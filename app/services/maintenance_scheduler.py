@@ -0,0 +1,231 @@
+"""
+Tareas periódicas de mantenimiento ejecutadas desde el lifespan de la aplicación
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal, engine
+from app.services.cleanup_service import CleanupService
+
+# Obtener configuración
+settings = get_settings()
+
+
+def advisory_lock_key(name: str) -> int:
+    """Clave bigint estable de pg_advisory_lock para una tarea"""
+    digest = hashlib.sha256(f"maintenance:{name}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+class MaintenanceJob:
+    """
+    Tarea periódica.
+
+    Las tareas exclusivas corren en una sola réplica a la vez: toman un
+    advisory lock de PostgreSQL y, si otra réplica lo tiene, se saltan esa
+    ejecución. Las no exclusivas (p. ej. la caché en memoria de cada proceso)
+    corren en todas.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval_seconds: float,
+        run: Callable[[Session], int],
+        exclusive: bool = True,
+        run_on_start: bool = False
+    ):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.run = run
+        self.exclusive = exclusive
+        self.run_on_start = run_on_start
+
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.last_rows: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "exclusive": self.exclusive,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_rows": self.last_rows,
+            "last_error": self.last_error,
+        }
+
+
+class MaintenanceScheduler:
+    """
+    Ejecuta cada MaintenanceJob en su intervalo, fuera del event loop.
+    El siguiente intervalo se cuenta desde el fin de la ejecución anterior,
+    así una tarea lenta nunca se solapa consigo misma.
+    """
+
+    def __init__(
+        self,
+        jobs: List[MaintenanceJob],
+        session_factory: Callable[[], Session] = SessionLocal,
+        lock_engine: Optional[Engine] = engine
+    ):
+        self.jobs = jobs
+        self.session_factory = session_factory
+        self.lock_engine = lock_engine
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Ejecutar las tareas run_on_start y programar todas las tareas"""
+        if self.running:
+            return
+        for job in self.jobs:
+            if job.run_on_start:
+                try:
+                    await asyncio.to_thread(self.run_job, job)
+                except Exception as e:
+                    print(f"⚠️ No se pudo ejecutar la tarea de mantenimiento {job.name} al iniciar: {e}")
+        self._tasks = [asyncio.create_task(self._loop(job)) for job in self.jobs]
+        print(f"🗓️ Mantenimiento programado: {', '.join(job.name for job in self.jobs) or 'sin tareas'}")
+
+    async def stop(self) -> None:
+        """Cancelar las tareas programadas (una ejecución en curso termina en su hilo)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado y última ejecución de cada tarea"""
+        return {
+            "running": self.running,
+            "jobs": {job.name: job.stats() for job in self.jobs},
+        }
+
+    def run_job(self, job: MaintenanceJob) -> bool:
+        """
+        Ejecutar una tarea ahora, tomando su advisory lock si es exclusiva
+
+        Args:
+            job: Tarea a ejecutar
+
+        Returns:
+            True si se ejecutó, False si otra réplica tenía el lock
+        """
+        lock_connection = None
+        try:
+            if job.exclusive and self.lock_engine is not None and self.lock_engine.dialect.name == "postgresql":
+                # Conexión propia en autocommit: el lock de sesión sobrevive a los
+                # commits por lote de la tarea y no deja una transacción abierta
+                lock_connection = self.lock_engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+                acquired = lock_connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": advisory_lock_key(job.name)}
+                ).scalar()
+                if not acquired:
+                    job.skipped += 1
+                    return False
+
+            job.last_started_at = datetime.now(timezone.utc)
+            start = time.monotonic()
+            db = self.session_factory()
+            try:
+                job.last_rows = job.run(db)
+                job.last_error = None
+            except Exception as e:
+                db.rollback()
+                job.failures += 1
+                job.last_error = str(e)
+                print(f"⚠️ Error en la tarea de mantenimiento {job.name}: {e}")
+            finally:
+                db.close()
+                job.last_duration_seconds = round(time.monotonic() - start, 3)
+                job.runs += 1
+            return True
+        finally:
+            if lock_connection is not None:
+                try:
+                    lock_connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"), {"key": advisory_lock_key(job.name)}
+                    )
+                finally:
+                    lock_connection.close()
+
+    async def _loop(self, job: MaintenanceJob) -> None:
+        while True:
+            await asyncio.sleep(job.interval_seconds)
+            try:
+                await asyncio.to_thread(self.run_job, job)
+            except Exception as e:
+                print(f"⚠️ No se pudo ejecutar la tarea de mantenimiento {job.name}: {e}")
+
+
+def _cleanup_expired(db: Session) -> int:
+    result = CleanupService(db).cleanup_expired_tokens()
+    return result["deleted"]
+
+
+def _cleanup_old(db: Session) -> int:
+    result = CleanupService(db).cleanup_old_tokens(settings.security.maintenance_cleanup_old_days)
+    return result["deleted"]
+
+
+def _maintain_partitions(db: Session) -> int:
+    return len(CleanupService(db).maintain_partitions())
+
+
+def _cleanup_email_outbox(db: Session) -> int:
+    result = CleanupService(db).cleanup_email_outbox(settings.security.maintenance_email_outbox_days)
+    return result["deleted"]
+
+
+def _rebuild_blacklist_filter(db: Session) -> int:
+    return CleanupService(db).rebuild_blacklist_filter()
+
+
+@lru_cache()
+def get_maintenance_scheduler() -> MaintenanceScheduler:
+    """
+    Obtener el programador de mantenimiento (singleton).
+    Un intervalo 0 deshabilita la tarea; con MAINTENANCE_SCHEDULER_ENABLED=false
+    solo se mantiene la reconstrucción de la caché de cada proceso.
+    """
+    security = settings.security
+    jobs = [
+        # Antes que la limpieza: las inserciones necesitan las particiones futuras
+        MaintenanceJob("blacklist_partitions", security.maintenance_partitions_seconds, _maintain_partitions, run_on_start=True),
+        MaintenanceJob("cleanup_expired_tokens", security.maintenance_cleanup_expired_seconds, _cleanup_expired),
+        MaintenanceJob("cleanup_old_tokens", security.maintenance_cleanup_old_seconds, _cleanup_old),
+        MaintenanceJob("cleanup_email_outbox", security.maintenance_email_outbox_seconds, _cleanup_email_outbox),
+        # Caché en memoria de cada proceso: corre en todas las réplicas
+        MaintenanceJob(
+            "blacklist_filter_rebuild",
+            security.blacklist_filter_rebuild_seconds,
+            _rebuild_blacklist_filter,
+            exclusive=False,
+            run_on_start=True
+        ),
+    ]
+    return MaintenanceScheduler([
+        job for job in jobs
+        if job.interval_seconds > 0 and (security.maintenance_scheduler_enabled or not job.exclusive)
+    ])
@@ -0,0 +1,152 @@
+"""
+Caché en memoria de permisos por (usuario, empresa)
+"""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+# Obtener configuración
+settings = get_settings()
+
+
+class PermissionCache:
+    """
+    Caché con TTL de los permisos resueltos para un usuario en una empresa.
+
+    Las invalidaciones son locales al proceso; en despliegues con varios
+    workers el TTL acota cuánto tarda en verse un cambio del grafo de roles.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(user_id, company_id) -> Tuple[str, str]:
+        return str(user_id), str(company_id)
+
+    def get(self, user_id, company_id) -> Optional[List[str]]:
+        """
+        Obtener permisos cacheados
+
+        Args:
+            user_id: ID del usuario
+            company_id: ID de la empresa
+
+        Returns:
+            Lista de permisos, None si no hay entrada vigente
+        """
+        key = self._key(user_id, company_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._misses += 1
+                return None
+            self._hits += 1
+            return list(entry[1])
+
+    def set(self, user_id, company_id, permissions: List[str]) -> None:
+        """
+        Guardar permisos resueltos
+
+        Args:
+            user_id: ID del usuario
+            company_id: ID de la empresa
+            permissions: Lista de nombres de permisos
+        """
+        key = self._key(user_id, company_id)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, list(permissions))
+            if len(self._entries) > self.max_size:
+                self._evict()
+
+    def invalidate_user(self, user_id, company_id=None) -> None:
+        """
+        Invalidar los permisos de un usuario
+
+        Args:
+            user_id: ID del usuario
+            company_id: ID de la empresa (None para todas)
+        """
+        user_key = str(user_id)
+        with self._lock:
+            if company_id is not None:
+                self._entries.pop(self._key(user_id, company_id), None)
+                return
+            for key in [key for key in self._entries if key[0] == user_key]:
+                del self._entries[key]
+
+    def invalidate_users(self, user_ids, company_id) -> None:
+        """
+        Invalidar los permisos de varios usuarios en una empresa con una sola
+        toma del lock (operaciones en lote)
+
+        Args:
+            user_ids: IDs de los usuarios
+            company_id: ID de la empresa
+        """
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(self._key(user_id, company_id), None)
+
+    def invalidate_company(self, company_id) -> None:
+        """
+        Invalidar los permisos de todos los usuarios de una empresa
+
+        Args:
+            company_id: ID de la empresa
+        """
+        company_key = str(company_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == company_key]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Vaciar la caché"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Obtener estadísticas de la caché
+
+        Returns:
+            Diccionario con estadísticas
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+    def _evict(self) -> None:
+        """Descartar entradas expiradas y, si no basta, las más antiguas; requiere el lock"""
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_size:
+            del self._entries[next(iter(self._entries))]
+
+
+@lru_cache
+def get_permission_cache() -> PermissionCache:
+    """
+    Obtiene la caché de permisos del proceso.
+    """
+    return PermissionCache(
+        ttl_seconds=settings.security.permission_cache_ttl_seconds,
+        max_size=settings.security.permission_cache_max_size
+    )
@@ -0,0 +1,148 @@
+"""
+Catálogo en memoria de permisos agrupados por sección, con ETag
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.permission import Permission
+
+# Obtener configuración
+settings = get_settings()
+
+
+def build_sections(permissions: List[Tuple]) -> Dict[str, List[dict]]:
+    """
+    Agrupar permisos "categoria:accion" por categoría, ordenados
+
+    Args:
+        permissions: Filas (id, name) de permisos
+
+    Returns:
+        Diccionario categoría -> lista de {"id", "name"} ordenada por acción
+    """
+    sections_dict = defaultdict(list)
+
+    for permission_id, name in permissions:
+        if ":" in name:
+            category, action = name.split(":", 1)
+        else:
+            category, action = name, name  # fallback
+
+        sections_dict[category].append({
+            "id": str(permission_id),
+            "name": action
+        })
+
+    # ordenar categorías y acciones dentro de cada categoría
+    return {
+        category: sorted(section_permissions, key=lambda x: (x["name"], x["id"]))
+        for category, section_permissions in sorted(sections_dict.items())
+    }
+
+
+class PermissionCatalog:
+    """
+    Catálogo de permisos agrupado, construido una vez y servido desde memoria.
+
+    El ETag es un hash del contenido, así que se mantiene entre reconstrucciones
+    si el catálogo no cambió. Cada lectura compara una versión barata de la
+    tabla (cantidad de filas, mayor nombre y suma de longitudes): un permiso
+    agregado o eliminado desde cualquier proceso (p. ej. el script
+    insert_permissions) se ve en la siguiente lectura. Los cambios que no
+    alteran esa versión, como renombrar conservando la longitud, se ven al
+    vencer el TTL.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._sections: Optional[Dict[str, List[dict]]] = None
+        self._etag: Optional[str] = None
+        self._version: Optional[Tuple] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._builds = 0
+
+    def get(self, db: Session) -> Tuple[Dict[str, List[dict]], str]:
+        """
+        Obtener el catálogo y su ETag, reconstruyéndolo si venció
+
+        Args:
+            db: Sesión de base de datos
+
+        Returns:
+            Tupla (secciones, etag)
+        """
+        version = self._table_version(db)
+        with self._lock:
+            if (
+                self._sections is not None
+                and version == self._version
+                and time.monotonic() < self._expires_at
+            ):
+                return self._sections, self._etag
+
+        rows = db.query(Permission.id, Permission.name).all()
+        sections = build_sections(rows)
+        payload = json.dumps(sections, sort_keys=True, separators=(",", ":"))
+        etag = '"' + hashlib.sha256(payload.encode()).hexdigest()[:32] + '"'
+
+        with self._lock:
+            self._sections = sections
+            self._etag = etag
+            self._version = version
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            self._builds += 1
+
+        return sections, etag
+
+    def invalidate(self) -> None:
+        """Forzar la reconstrucción en la próxima lectura"""
+        with self._lock:
+            self._sections = None
+            self._etag = None
+            self._version = None
+            self._expires_at = 0.0
+
+    @staticmethod
+    def _table_version(db: Session) -> Tuple:
+        """Versión de la tabla permission en una consulta agregada sobre una tabla pequeña"""
+        return tuple(
+            db.query(
+                func.count(Permission.id),
+                func.max(Permission.name),
+                func.sum(func.length(Permission.name))
+            ).one()
+        )
+
+    def stats(self) -> dict:
+        """
+        Obtener estadísticas del catálogo
+
+        Returns:
+            Diccionario con estadísticas
+        """
+        with self._lock:
+            return {
+                "built": self._sections is not None,
+                "etag": self._etag,
+                "ttl_seconds": self.ttl_seconds,
+                "builds": self._builds
+            }
+
+
+@lru_cache
+def get_permission_catalog() -> PermissionCatalog:
+    """
+    Obtiene el catálogo de permisos del proceso.
+    """
+    return PermissionCatalog(ttl_seconds=settings.security.permission_catalog_ttl_seconds)
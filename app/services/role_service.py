@@ -2,23 +2,31 @@
 Servicio de roles - Gestión de roles y permisos
 """
 
-from typing import Optional, List, Dict, Any, Union
+import uuid
+from typing import Optional, List, Dict, Any, Tuple, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import and_, or_, delete, tuple_
 from fastapi import HTTPException, status
 
 from app.models.role import Role
 from app.models.permission import Permission
 from app.models.user_role import UserRole
 from app.models.role_permission import RolePermission
-from app.schemas.role import RoleCreate, RoleUpdate, RoleRead
+from app.schemas.role import RoleCreate, RoleUpdate, RoleRead, UserRoleBulkResult
+from app.schemas.permission import PermissionRead
 from app.models.user import AppUser
+from app.models.company_user import CompanyUser
+from app.services.permission_cache import get_permission_cache
+from app.services.permission_catalog import get_permission_catalog
+from app.db.pagination import KeysetPage, count_total, paginate_keyset
+from app.db.search import ranked_page, search_filter, uses_similarity
+from app.db.bulk import insert_ignore_conflicts
 from collections import defaultdict
 
 
 class RoleWithPermissions:
     """Clase auxiliar para roles con permisos cargados"""
-    def __init__(self, role: Role, permissions: List[Permission]):
+    def __init__(self, role: Role, permissions: List[Union[Permission, PermissionRead]]):
         self.id = role.id  # Mantener como UUID
         self.name = role.name
         self.company_id = role.company_id  # Mantener como UUID
@@ -26,9 +34,25 @@ class RoleWithPermissions:
         self.permissions = permissions
 
 
+# IDs listados en los errores de las operaciones en lote (hasta 5000 pares)
+MAX_IDS_IN_ERROR = 10
+
+
+def _format_ids(ids) -> str:
+    """Listar los primeros MAX_IDS_IN_ERROR IDs e indicar cuántos más hay"""
+    ordered = sorted(map(str, ids))
+    listed = ", ".join(ordered[:MAX_IDS_IN_ERROR])
+    if len(ordered) > MAX_IDS_IN_ERROR:
+        listed += f" y {len(ordered) - MAX_IDS_IN_ERROR} más"
+    return listed
+
+
 class RoleService:
     """Servicio para operaciones con roles y permisos"""
     
+    # Columnas del parámetro search (con índice trigram)
+    SEARCH_COLUMNS = (Role.name,)
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -68,28 +92,18 @@ class RoleService:
         self.db.flush()  # Para obtener el ID
         
         # Asignar permisos si se proporcionan
-        if role_data.permissions:
-            for permission_id in role_data.permissions:
-                role_permission = RolePermission(
-                    role_id=role.id,
-                    permission_id=permission_id
-                )
-                self.db.add(role_permission)
-        
+        permissions = self._get_permissions_by_ids(role_data.permissions or [])
+        self.db.add_all([
+            RolePermission(role_id=role.id, permission_id=permission.id)
+            for permission in permissions
+        ])
+        
+        # La respuesta se arma antes del commit con los datos ya cargados,
+        # así no hay que volver a leer el rol ni sus permisos
+        result = self._snapshot(role, permissions)
         self.db.commit()
-        self.db.refresh(role)
         
-        # Cargar los permisos reales para la respuesta
-        permissions_query = (
-            self.db.query(Permission)
-            .join(RolePermission, Permission.id == RolePermission.permission_id)
-            .filter(RolePermission.role_id == role.id)
-            .all()
-        )
-        
-        # Crear un objeto de respuesta que incluya los permisos
-        # Usar la clase auxiliar para evitar problemas con SQLAlchemy
-        return RoleWithPermissions(role, permissions_query)
+        return result
     
     def get_role_by_id(self, role_id: str) -> Optional[RoleWithPermissions]:
         """
@@ -101,19 +115,19 @@ class RoleService:
         Returns:
             Rol con permisos si existe, None si no
         """
-        role = self.db.query(Role).filter(Role.id == role_id).first()
-        if not role:
-            return None
-            
-        # Cargar permisos del rol
-        permissions_query = (
-            self.db.query(Permission)
-            .join(RolePermission, Permission.id == RolePermission.permission_id)
-            .filter(RolePermission.role_id == role.id)
+        # Rol y permisos en una sola consulta (una fila por permiso)
+        rows = (
+            self.db.query(Role, Permission)
+            .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+            .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+            .filter(Role.id == role_id)
             .all()
         )
+        if not rows:
+            return None
         
-        return RoleWithPermissions(role, permissions_query)
+        role = rows[0][0]
+        return RoleWithPermissions(role, [permission for _, permission in rows if permission is not None])
     
     def get_roles(
         self, 
@@ -134,29 +148,74 @@ class RoleService:
         Returns:
             Lista de roles con permisos cargados
         """
+        query = self._roles_query(company_id, search)
+        
+        roles = query.order_by(Role.name, Role.id).offset(skip).limit(limit).all()
+        
+        # Permisos de toda la página en una sola consulta
+        permissions_by_role = self._get_permissions_by_role([role.id for role in roles])
+        
+        return [RoleWithPermissions(role, permissions_by_role[role.id]) for role in roles]
+    
+    def get_roles_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        company_id: Optional[str] = None,
+        search: Optional[str] = None,
+        count: Optional[str] = None,
+        search_mode: str = "contains"
+    ) -> KeysetPage:
+        """
+        Obtener una página de roles por cursor, ordenada por (name, id).
+        Role no tiene created_at, así que la clave estable es el nombre.
+        Con search_mode="similar" devuelve los más parecidos al término, sin cursor.
+        
+        Args:
+            limit: Tamaño de página
+            cursor: Cursor devuelto por la página anterior
+            company_id: Filtrar por empresa
+            search: Término de búsqueda
+            count: None, "exact" o "estimated" para incluir el total
+            search_mode: contains (subcadena) o similar (similitud trigram)
+            
+        Returns:
+            Página con roles (con permisos), cursor siguiente y total opcional
+        """
+        query = self._roles_query(company_id, search, search_mode)
+        
+        if search and uses_similarity(self.db, search_mode):
+            page = ranked_page(query, self.SEARCH_COLUMNS, search, Role.id, limit)
+        else:
+            page = paginate_keyset(query, [Role.name, Role.id], limit, cursor)
+        
+        # Permisos de toda la página en una sola consulta
+        permissions_by_role = self._get_permissions_by_role([role.id for role in page.items])
+        page.items = [RoleWithPermissions(role, permissions_by_role[role.id]) for role in page.items]
+        page.total = count_total(
+            self.db, query, count, Role.__tablename__,
+            filtered=company_id is not None or bool(search)
+        )
+        
+        return page
+    
+    def _roles_query(
+        self,
+        company_id: Optional[str] = None,
+        search: Optional[str] = None,
+        search_mode: str = "contains"
+    ):
+        """Consulta de roles con los filtros del listado aplicados"""
         query = self.db.query(Role)
         
         # Aplicar filtros
         if company_id is not None:
-            query = query.filter(Role.company_id == company_id)
+            query = query.filter(Role.company_id == uuid.UUID(str(company_id)))
         
         if search:
-            query = query.filter(Role.name.ilike(f"%{search}%"))
-        
-        roles = query.offset(skip).limit(limit).all()
+            query = query.filter(search_filter(self.db, self.SEARCH_COLUMNS, search, search_mode))
         
-        # Para cada rol, cargar sus permisos
-        result = []
-        for role in roles:
-            permissions = (
-                self.db.query(Permission)
-                .join(RolePermission, Permission.id == RolePermission.permission_id)
-                .filter(RolePermission.role_id == role.id)
-                .all()
-            )
-            result.append(RoleWithPermissions(role, permissions))
-        
-        return result
+        return query
     
     def update_role(self, role_id: str, role_data: RoleUpdate) -> Optional[RoleWithPermissions]:
         """
@@ -196,31 +255,42 @@ class RoleService:
             if field != "permissions":  # Los permisos se manejan por separado
                 setattr(role, field, value)
         
-        # Actualizar permisos si se proporcionan
+        # Actualizar permisos si se proporcionan: solo se escribe la diferencia
+        permissions_changed = False
         if role_data.permissions is not None:
-            # Eliminar permisos existentes
-            self.db.query(RolePermission).filter(RolePermission.role_id == role_id).delete()
+            requested = self._get_permissions_with_assignment(role.id, role_data.permissions)
+            permissions = [permission for permission, _ in requested]
+            added = [permission.id for permission, assigned in requested if not assigned]
             
-            # Agregar nuevos permisos
-            for permission_id in role_data.permissions:
-                role_permission = RolePermission(
-                    role_id=role_id,
-                    permission_id=permission_id
+            # Quitar los que ya no están; un DELETE que solo toca esas filas
+            removed = self.db.execute(
+                delete(RolePermission).where(
+                    RolePermission.role_id == role.id,
+                    RolePermission.permission_id.not_in([permission.id for permission in permissions])
                 )
-                self.db.add(role_permission)
+            ).rowcount
+            
+            # Agregar los nuevos en una sola sentencia
+            insert_ignore_conflicts(
+                self.db,
+                RolePermission,
+                [{"role_id": role.id, "permission_id": permission_id} for permission_id in added],
+                index_elements=["role_id", "permission_id"]
+            )
+            permissions_changed = bool(added) or removed > 0
+        else:
+            permissions = self._get_permissions_by_role([role.id])[role.id]
         
+        # Respuesta armada antes del commit para no releer el rol ni sus permisos
+        result = self._snapshot(role, permissions)
+        company_id = role.company_id
         self.db.commit()
-        self.db.refresh(role)
         
-        # Cargar permisos del rol actualizado
-        permissions = (
-            self.db.query(Permission)
-            .join(RolePermission, Permission.id == RolePermission.permission_id)
-            .filter(RolePermission.role_id == role.id)
-            .all()
-        )
+        # Los permisos de los usuarios de la empresa dependen de este rol
+        if permissions_changed:
+            get_permission_cache().invalidate_company(company_id)
         
-        return RoleWithPermissions(role, permissions)
+        return result
     
     def delete_role(self, role_id: str) -> bool:
         """
@@ -240,9 +310,12 @@ class RoleService:
             
             # SQLAlchemy debería eliminar automáticamente las relaciones debido a cascade="all, delete-orphan"
             # y ondelete="CASCADE" en las claves foráneas
+            company_id = role.company_id
             self.db.delete(role)
             self.db.commit()
             
+            get_permission_cache().invalidate_company(company_id)
+            
             return True
             
         except Exception as e:
@@ -275,7 +348,7 @@ class RoleService:
             )
         
         # Verificar que el rol existe
-        role = self.get_role_by_id(role_id)
+        role = self.db.query(Role.id, Role.company_id).filter(Role.id == role_id).first()
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -305,6 +378,8 @@ class RoleService:
         self.db.commit()
         self.db.refresh(user_role)
         
+        get_permission_cache().invalidate_user(user_id, role.company_id)
+        
         return user_role
     
     def remove_role_from_user(self, user_id: str, role_id: str) -> bool:
@@ -331,8 +406,102 @@ class RoleService:
         self.db.delete(user_role)
         self.db.commit()
         
+        get_permission_cache().invalidate_user(user_id)
+        
         return True
     
+    def assign_roles_bulk(self, pairs: List[Tuple[Any, Any]], company_id: str) -> UserRoleBulkResult:
+        """
+        Asignar roles en lote dentro de una empresa.
+        Valida roles y membresías con una consulta cada uno e inserta todos los
+        pares en una sentencia; los pares ya asignados se ignoran.
+        
+        Args:
+            pairs: Pares (user_id, role_id) sin repetir
+            company_id: ID de la empresa del usuario autenticado
+            
+        Returns:
+            Cantidad de pares recibidos, asignados y sin cambios
+            
+        Raises:
+            HTTPException: Si algún rol no es de la empresa o algún usuario no es miembro
+        """
+        user_ids = {user_id for user_id, _ in pairs}
+        self._check_roles_in_company({role_id for _, role_id in pairs}, company_id)
+        self._check_members_of_company(user_ids, company_id)
+        
+        inserted = insert_ignore_conflicts(
+            self.db,
+            UserRole,
+            [{"user_id": user_id, "role_id": role_id} for user_id, role_id in pairs],
+            index_elements=["user_id", "role_id"]
+        )
+        self.db.commit()
+        
+        get_permission_cache().invalidate_users(user_ids, company_id)
+        
+        return UserRoleBulkResult(requested=len(pairs), affected=inserted, unchanged=len(pairs) - inserted)
+    
+    def revoke_roles_bulk(self, pairs: List[Tuple[Any, Any]], company_id: str) -> UserRoleBulkResult:
+        """
+        Revocar roles en lote dentro de una empresa con un solo DELETE
+        
+        Args:
+            pairs: Pares (user_id, role_id) sin repetir
+            company_id: ID de la empresa del usuario autenticado
+            
+        Returns:
+            Cantidad de pares recibidos, revocados y sin cambios
+            
+        Raises:
+            HTTPException: Si algún rol no es de la empresa
+        """
+        # Sin verificar membresía: los roles ya son de la empresa y un ex
+        # miembro debe poder perder los roles que conserva en ella
+        user_ids = {user_id for user_id, _ in pairs}
+        self._check_roles_in_company({role_id for _, role_id in pairs}, company_id)
+        
+        deleted = self.db.execute(
+            delete(UserRole).where(tuple_(UserRole.user_id, UserRole.role_id).in_(pairs))
+        ).rowcount
+        self.db.commit()
+        
+        get_permission_cache().invalidate_users(user_ids, company_id)
+        
+        return UserRoleBulkResult(requested=len(pairs), affected=deleted, unchanged=len(pairs) - deleted)
+    
+    def _check_roles_in_company(self, role_ids, company_id: str) -> None:
+        """Verificar con una consulta que todos los roles existen y son de la empresa"""
+        found = {
+            role_id for (role_id,) in (
+                self.db.query(Role.id)
+                .filter(Role.company_id == uuid.UUID(str(company_id)), Role.id.in_(role_ids))
+                .all()
+            )
+        }
+        missing = set(role_ids) - found
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Roles no encontrados en la empresa: {_format_ids(missing)}"
+            )
+    
+    def _check_members_of_company(self, user_ids, company_id: str) -> None:
+        """Verificar con una consulta que todos los usuarios son miembros de la empresa"""
+        members = {
+            user_id for (user_id,) in (
+                self.db.query(CompanyUser.user_id)
+                .filter(CompanyUser.company_id == uuid.UUID(str(company_id)), CompanyUser.user_id.in_(user_ids))
+                .all()
+            )
+        }
+        non_members = set(user_ids) - members
+        if non_members:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Usuarios que no pertenecen a la empresa: {_format_ids(non_members)}"
+            )
+    
     def get_user_roles(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Obtener roles de un usuario
@@ -344,7 +513,8 @@ class RoleService:
             Lista de roles del usuario
         """
         roles = (
-            self.db.query(UserRole)
+            self.db.query(UserRole.role_id, Role.name, Role.company_id)
+            .join(Role, Role.id == UserRole.role_id)
             .filter(UserRole.user_id == user_id)
             .all()
         )
@@ -354,8 +524,8 @@ class RoleService:
         return [
             {
                 "role_id": ur.role_id,
-                "role_name": ur.role.name,
-                "company_id": ur.role.company_id,
+                "role_name": ur.name,
+                "company_id": ur.company_id,
                 "assigned_at": datetime.utcnow()  # Usar timestamp actual ya que no hay created_at en UserRole
             }
             for ur in roles
@@ -380,6 +550,97 @@ class RoleService:
         
         return permissions
     
+    def _get_permissions_by_role(self, role_ids: List[Any]) -> Dict[Any, List[Permission]]:
+        """
+        Cargar los permisos de varios roles con una sola consulta
+        
+        Args:
+            role_ids: IDs de los roles
+            
+        Returns:
+            Diccionario role_id -> lista de permisos (vacía si no tiene)
+        """
+        permissions_by_role = defaultdict(list)
+        if not role_ids:
+            return permissions_by_role
+        
+        rows = (
+            self.db.query(RolePermission.role_id, Permission)
+            .join(Permission, Permission.id == RolePermission.permission_id)
+            .filter(RolePermission.role_id.in_(role_ids))
+            .all()
+        )
+        for role_id, permission in rows:
+            permissions_by_role[role_id].append(permission)
+        
+        return permissions_by_role
+    
+    def _get_permissions_by_ids(self, permission_ids: List[Any]) -> List[Permission]:
+        """
+        Cargar permisos por ID validando que existan todos
+        
+        Args:
+            permission_ids: IDs de permisos
+            
+        Returns:
+            Lista de permisos sin duplicados
+            
+        Raises:
+            HTTPException: Si algún permiso no existe
+        """
+        unique_ids = set(permission_ids)
+        if not unique_ids:
+            return []
+        
+        permissions = self.db.query(Permission).filter(Permission.id.in_(unique_ids)).all()
+        if len(permissions) != len(unique_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uno o más permisos no existen"
+            )
+        
+        return permissions
+    
+    def _get_permissions_with_assignment(self, role_id: Any, permission_ids: List[Any]) -> List[Tuple[Permission, bool]]:
+        """
+        Cargar los permisos pedidos indicando si el rol ya los tiene, en una consulta
+        
+        Args:
+            role_id: ID del rol
+            permission_ids: IDs de permisos pedidos
+            
+        Returns:
+            Lista de (permiso, ya_asignado) sin duplicados
+            
+        Raises:
+            HTTPException: Si algún permiso no existe
+        """
+        unique_ids = set(permission_ids)
+        if not unique_ids:
+            return []
+        
+        rows = (
+            self.db.query(Permission, RolePermission.role_id)
+            .outerjoin(
+                RolePermission,
+                and_(RolePermission.permission_id == Permission.id, RolePermission.role_id == role_id)
+            )
+            .filter(Permission.id.in_(unique_ids))
+            .all()
+        )
+        if len(rows) != len(unique_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uno o más permisos no existen"
+            )
+        
+        return [(permission, assigned_role_id is not None) for permission, assigned_role_id in rows]
+    
+    @staticmethod
+    def _snapshot(role: Role, permissions: List[Permission]) -> RoleWithPermissions:
+        """Copiar rol y permisos a objetos que no dependen de la sesión"""
+        return RoleWithPermissions(role, [PermissionRead.model_validate(permission) for permission in permissions])
+    
     def get_all_permissions(self) -> List[Permission]:
         """
         Obtener todos los permisos
@@ -394,34 +655,15 @@ class RoleService:
         """
         Obtener todas las secciones con permisos como diccionario
         """
-        seccions = self.db.query(Permission).all()
-            
-            # Convertir a diccionario usando el ID como clave
-            #   sections_dict = {permission.id: {
-                #    'id': permission.id,
-                #'name': permission.name
-            #  } for permission in seccions}
-
-
-        sections_dict = defaultdict(list)
-
-        for permission in seccions:
-            if ":" in permission.name:
-                category, action = permission.name.split(":", 1)
-            else:
-                category, action = permission.name, permission.name  # fallback
-
-            sections_dict[category].append({
-                "id": str(permission.id),
-                "name": action
-            })
-
-        # ordenar categorías y acciones dentro de cada categoría
-        organized = {
-            category: sorted(permissions, key=lambda x: x["name"])
-            for category, permissions in sorted(sections_dict.items())
-        }
-        return organized
-
+        sections, _ = self.get_permission_catalog()
+        return sections
+    
+    def get_permission_catalog(self) -> Tuple[dict, str]:
+        """
+        Obtener el catálogo de secciones con permisos y su ETag.
+        Se sirve desde memoria; ver PermissionCatalog.
         
-   
\ No newline at end of file
+        Returns:
+            Tupla (secciones, etag)
+        """
+        return get_permission_catalog().get(self.db)
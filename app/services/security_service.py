@@ -2,7 +2,9 @@
 Servicio de seguridad - Hash y verificación de contraseñas
 """
 
-from datetime import datetime, timedelta
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
@@ -11,6 +13,7 @@ from sqlalchemy import and_
 from app.core.config import get_settings
 from app.core.security import verify_password as core_verify_password, get_password_hash as core_get_password_hash
 from app.models.invalidated_token import InvalidatedToken
+from app.services.blacklist_cache import get_blacklist_cache
 
 # Obtener configuración
 settings = get_settings()
@@ -61,7 +64,7 @@ class SecurityService:
         Returns:
             Token JWT
         """
-        to_encode = data.copy()
+        to_encode = SecurityService._with_session_claims(data)
         
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
@@ -84,7 +87,7 @@ class SecurityService:
         Returns:
             Token JWT de refresco
         """
-        to_encode = data.copy()
+        to_encode = SecurityService._with_session_claims(data)
         expire = datetime.utcnow() + timedelta(days=settings.security.refresh_token_expire_days)
         to_encode.update({"exp": expire, "type": "refresh"})
         
@@ -92,6 +95,54 @@ class SecurityService:
         
         return encoded_jwt
     
+    @staticmethod
+    def _with_session_claims(data: dict) -> dict:
+        """
+        Copiar los datos del token agregando jti (id único del token), iat
+        (emisión, con milisegundos para compararla con sessions_revoked_before)
+        y sid (sesión compartida por el access y el refresh de un mismo login)
+        """
+        to_encode = data.copy()
+        to_encode["jti"] = uuid.uuid4().hex
+        to_encode["iat"] = round(time.time(), 3)
+        if not to_encode.get("sid"):
+            to_encode["sid"] = SecurityService.new_session_id()
+        return to_encode
+    
+    @staticmethod
+    def new_session_id() -> str:
+        """Generar el identificador de una sesión (claim sid)"""
+        return uuid.uuid4().hex
+    
+    @staticmethod
+    def session_revocation_key(sid: str) -> str:
+        """Clave en invalidated_tokens que revoca todos los tokens de una sesión"""
+        return SecurityService.hash_token(f"sid:{sid}")
+    
+    @staticmethod
+    def token_revocation_key(jti: str) -> str:
+        """Clave en invalidated_tokens que revoca un único token por su jti"""
+        return SecurityService.hash_token(f"jti:{jti}")
+    
+    @staticmethod
+    def issued_before(payload: dict, revoked_before: Optional[datetime]) -> bool:
+        """
+        Indicar si un token fue emitido antes de una revocación por usuario y empresa
+        
+        Args:
+            payload: Payload del token
+            revoked_before: CompanyUser.sessions_revoked_before
+            
+        Returns:
+            True si el token quedó revocado (los tokens sin iat son anteriores a todo)
+        """
+        if revoked_before is None:
+            return False
+        issued_at = payload.get("iat")
+        if issued_at is None:
+            return True
+        return float(issued_at) <= revoked_before.timestamp()
+    
     @staticmethod
     def hash_token(token: str) -> str:
         """
@@ -124,8 +175,8 @@ class SecurityService:
             if payload.get("type") != "access":
                 return None
             
-            # Verificar que el token no esté en la blacklist
-            if self._is_token_blacklisted(token):
+            # Verificar que ni el token ni su sesión estén revocados
+            if self._is_revoked(token, payload):
                 return None
             
             return payload
@@ -133,6 +184,29 @@ class SecurityService:
             print(f"Error en verify_access_token: {e}")
             return None
     
+    def _is_revoked(self, token: str, payload: dict) -> bool:
+        """
+        Verificar si un token de acceso o refresco está revocado.
+        Los tokens con sid y jti se buscan por su sesión y por su jti (dos
+        claves fijas); los emitidos antes de esos claims, por el hash del token.
+        
+        Args:
+            token: Token JWT
+            payload: Payload ya verificado del token
+            
+        Returns:
+            True si el token o su sesión están revocados
+        """
+        sid = payload.get("sid")
+        jti = payload.get("jti")
+        if not sid or not jti:
+            return self._is_token_blacklisted(token)
+        
+        return (
+            self._is_hash_blacklisted(self.session_revocation_key(sid))
+            or self._is_hash_blacklisted(self.token_revocation_key(jti))
+        )
+    
     def _is_token_blacklisted(self, token: str) -> bool:
         """
         Verificar si un token está en la blacklist
@@ -143,18 +217,46 @@ class SecurityService:
         Returns:
             True si el token está en la blacklist, False si no
         """
+        # Generar hash del token para buscar en la blacklist
+        return self._is_hash_blacklisted(self.hash_token(token))
+    
+    def _is_hash_blacklisted(self, token_hash: str) -> bool:
+        """
+        Verificar si una clave (hash de token, sesión o jti) está en la blacklist
+        
+        Args:
+            token_hash: Clave a buscar en invalidated_tokens.token_hash
+            
+        Returns:
+            True si está en la blacklist, False si no
+        """
         try:
-            # Generar hash del token para buscar en la blacklist
-            token_hash = self.hash_token(token)
+            # Consultar primero el filtro de Bloom y la caché en memoria del proceso;
+            # solo los posibles aciertos llegan a la base de datos
+            cache = get_blacklist_cache()
+            if cache is not None:
+                cache.refresh_if_stale(self.db)
+                cached = cache.lookup(token_hash)
+                if cached is not None:
+                    return cached
             
-            # Buscar el token en la tabla de tokens invalidados
+            # Buscar el token en la tabla de tokens invalidados. Un token expirado
+            # ya es rechazado al decodificarlo; filtrar por expires_at permite
+            # descartar las particiones vencidas de invalidated_tokens
             blacklisted_token = (
-                self.db.query(InvalidatedToken)
-                .filter(InvalidatedToken.token_hash == token_hash)
+                self.db.query(InvalidatedToken.id)
+                .filter(
+                    InvalidatedToken.token_hash == token_hash,
+                    InvalidatedToken.expires_at > datetime.now(timezone.utc)
+                )
                 .first()
             )
+            is_blacklisted = blacklisted_token is not None
+            
+            if cache is not None:
+                cache.record_database_result(token_hash, is_blacklisted)
             
-            return blacklisted_token is not None
+            return is_blacklisted
         except Exception:
             # Si hay algún error en la consulta, asumimos que el token no está blacklisted
             # para evitar bloquear usuarios por errores de base de datos
@@ -178,8 +280,8 @@ class SecurityService:
             if payload.get("type") != "refresh":
                 return None
             
-            # Verificar que el token no esté en la blacklist
-            if self._is_token_blacklisted(token):
+            # Verificar que ni el token ni su sesión estén revocados
+            if self._is_revoked(token, payload):
                 return None
             
             return payload
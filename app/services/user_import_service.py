@@ -0,0 +1,296 @@
+"""
+Servicio de importación masiva de usuarios desde CSV o NDJSON
+"""
+
+import codecs
+import csv
+import json
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.security import import_password_hasher, pwd_context
+from app.models.company_user import CompanyUser
+from app.models.role import Role
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.schemas.user import UserImportError, UserImportResult, UserImportRow
+
+# Content-Type aceptados por POST /users/import
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+# Columnas mínimas del encabezado CSV
+REQUIRED_CSV_COLUMNS = {"name", "email"}
+
+# (línea, datos de la fila o None, error de lectura o None)
+ImportRow = Tuple[int, Optional[Dict[str, str]], Optional[str]]
+
+
+def get_import_format(content_type: Optional[str]) -> str:
+    """
+    Obtener el formato de importación a partir del Content-Type
+
+    Args:
+        content_type: Header Content-Type del request
+
+    Returns:
+        "csv" o "ndjson"
+
+    Raises:
+        HTTPException: 415 si el tipo no es soportado
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type no soportado, use uno de: {', '.join(IMPORT_FORMATS)}"
+        )
+    return IMPORT_FORMATS[media_type]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Convertir el cuerpo del request, leído por partes, en líneas de texto
+    sin cargarlo completo en memoria
+
+    Args:
+        chunks: Partes del cuerpo (request.stream())
+
+    Returns:
+        Iterador asíncrono de líneas sin salto de línea
+
+    Raises:
+        HTTPException: Si el cuerpo no es UTF-8
+    """
+    # utf-8-sig descarta el BOM que agregan algunas planillas al exportar CSV
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo debe estar codificado en UTF-8"
+        )
+
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def read_import_batches(
+    chunks: AsyncIterator[bytes],
+    import_format: str,
+    batch_size: int
+) -> AsyncIterator[List[ImportRow]]:
+    """
+    Leer el cuerpo del request en lotes de filas.
+    En CSV la primera línea no vacía es el encabezado (name,email,password,role,...).
+
+    Args:
+        chunks: Partes del cuerpo (request.stream())
+        import_format: "csv" o "ndjson"
+        batch_size: Filas por lote
+
+    Returns:
+        Iterador asíncrono de lotes
+
+    Raises:
+        HTTPException: Si el encabezado CSV no tiene las columnas requeridas
+    """
+    header: Optional[List[str]] = None
+    batch: List[ImportRow] = []
+    line_number = 0
+
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+
+        if import_format == "csv" and header is None:
+            header = [column.strip().lower() for column in next(csv.reader([line]))]
+            missing = REQUIRED_CSV_COLUMNS - set(header)
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Faltan columnas en el encabezado CSV: {', '.join(sorted(missing))}"
+                )
+            continue
+
+        batch.append(_parse_line(line_number, line, import_format, header))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _parse_line(line_number: int, line: str, import_format: str, header: Optional[List[str]]) -> ImportRow:
+    """Convertir una línea en el diccionario de la fila o en un error de lectura"""
+    try:
+        if import_format == "ndjson":
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("se esperaba un objeto JSON")
+        else:
+            values = next(csv.reader([line]))
+            if len(values) != len(header):
+                raise ValueError(f"se esperaban {len(header)} columnas y hay {len(values)}")
+            # Celdas vacías equivalen a columnas ausentes
+            data = {column: value for column, value in zip(header, values) if value != ""}
+        return line_number, data, None
+    except (ValueError, csv.Error) as e:
+        return line_number, None, f"Fila mal formada: {e}"
+
+
+def _validation_message(error: ValidationError) -> str:
+    """Resumir los errores de validación de una fila"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'fila'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class UserImportService:
+    """Servicio para la importación masiva de usuarios en una compañía"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_batch(
+        self,
+        company_id: str,
+        rows: List[ImportRow],
+        default_role: Optional[str] = None
+    ) -> UserImportResult:
+        """
+        Importar un lote de filas en una transacción.
+
+        Resuelve roles y emails existentes con una consulta cada uno, hashea las
+        contraseñas en el pool bcrypt de importación e inserta app_user,
+        company_user y user_role con inserciones multi-fila. Un email ya
+        registrado se rechaza con el mismo error esté en esta compañía o en
+        otra: la importación no agrega cuentas existentes ni revela en qué
+        empresa están.
+
+        Args:
+            company_id: ID de la compañía destino
+            rows: Filas leídas con read_import_batches
+            default_role: Rol para las filas sin columna role
+
+        Returns:
+            Resultado del lote con el detalle de las filas rechazadas
+        """
+        result = UserImportResult(total=len(rows))
+        company_uuid = uuid.UUID(str(company_id))
+
+        # 1. Validar filas y descartar emails repetidos dentro del lote
+        accepted: List[Tuple[int, UserImportRow, str, str, str]] = []
+        seen_emails = set()
+        for line, data, error in rows:
+            if error:
+                self._reject(result, line, None, error)
+                continue
+            try:
+                row = UserImportRow.model_validate(data)
+            except ValidationError as e:
+                raw_email = data.get("email")
+                self._reject(result, line, raw_email if isinstance(raw_email, str) else None, _validation_message(e))
+                continue
+
+            email = row.email.lower()
+            role_name = (row.role or default_role or "").lower()
+            if not role_name:
+                self._reject(result, line, email, "La fila no indica rol y no se envió default_role")
+                continue
+            if email in seen_emails:
+                self._reject(result, line, email, "Email repetido en el archivo")
+                continue
+            seen_emails.add(email)
+            accepted.append((line, row, email, row.name.lower(), role_name))
+
+        if not accepted:
+            return result
+
+        # 2. Roles de la compañía y usuarios existentes, una consulta cada uno
+        role_ids = dict(
+            self.db.query(Role.name, Role.id)
+            .filter(
+                Role.company_id == company_uuid,
+                Role.name.in_({role_name for *_, role_name in accepted})
+            )
+            .all()
+        )
+        existing = {
+            email for (email,) in (
+                self.db.query(AppUser.email)
+                .filter(AppUser.email.in_(seen_emails))
+                .all()
+            )
+        }
+
+        to_create = []
+        for line, row, email, name, role_name in accepted:
+            role_id = role_ids.get(role_name)
+            if role_id is None:
+                self._reject(result, line, email, f"El rol '{role_name}' no existe en la compañía")
+            elif email in existing:
+                # Mismo error para miembros de esta empresa y cuentas de otras
+                self._reject(result, line, email, "El email ya está registrado")
+            else:
+                to_create.append((line, row, email, name, role_id))
+
+        # 3. Hashear en paralelo solo las contraseñas en texto plano
+        plain = [row.password for _, row, *_ in to_create if not row.hashed_password]
+        hashes = iter(import_password_hasher.map(pwd_context.hash, plain))
+
+        user_rows = []
+        company_user_rows = []
+        user_role_rows = []
+        for _, row, email, name, role_id in to_create:
+            user_id = uuid.uuid4()
+            user_rows.append({
+                "id": user_id,
+                "name": name,
+                "email": email,
+                "hashed_password": row.hashed_password or next(hashes),
+                "is_active": True,
+            })
+            company_user_rows.append({"user_id": user_id, "company_id": company_uuid, "is_active": True, "is_verified": False})
+            user_role_rows.append({"user_id": user_id, "role_id": role_id})
+
+        # 4. Inserciones multi-fila y un commit por lote
+        try:
+            if user_rows:
+                self.db.execute(insert(AppUser), user_rows)
+                self.db.execute(insert(CompanyUser), company_user_rows)
+                self.db.execute(insert(UserRole), user_role_rows)
+            self.db.commit()
+        except IntegrityError:
+            # Otro proceso registró alguno de los emails entre la lectura y el INSERT
+            self.db.rollback()
+            for line, _, email, _, _ in to_create:
+                self._reject(result, line, email, "Conflicto al insertar el lote; reintente estas filas")
+            return result
+
+        result.created = len(to_create)
+        return result
+
+    @staticmethod
+    def _reject(result: UserImportResult, line: int, email: Optional[str], detail: str) -> None:
+        result.failed += 1
+        result.errors.append(UserImportError(line=line, email=email, detail=detail))
@@ -2,9 +2,10 @@
 Servicio de usuarios - CRUD y lógica de negocio
 """
 
+import uuid
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_
 from fastapi import HTTPException, status
 
 from app.models.user import AppUser
@@ -14,12 +15,18 @@ from app.models.role import Role
 from app.models.company import Company
 from app.schemas.user import UserCreate, UserUpdate, UserRead, UserWithRoles
 from app.services.security_service import SecurityService
+from app.services.permission_cache import get_permission_cache
+from app.db.pagination import KeysetPage, count_total, paginate_keyset
+from app.db.search import ranked_page, search_filter, uses_similarity
 from sqlalchemy.dialects import postgresql
 
 
 class UserService:
     """Servicio para operaciones con usuarios"""
     
+    # Columnas del parámetro search (con índice trigram)
+    SEARCH_COLUMNS = (AppUser.name, AppUser.email)
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -206,7 +213,8 @@ class UserService:
         skip: int = 0, 
         limit: int = 100,
         search: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        company_id: Optional[str] = None
     ) -> List[AppUser]:
         """
         Obtener lista de usuarios con filtros
@@ -215,27 +223,104 @@ class UserService:
             skip: Número de registros a saltar
             limit: Número máximo de registros
             search: Término de búsqueda
-            is_active: Filtrar por estado activo
+            is_active: Filtrar por estado activo (de la membresía si hay company_id)
+            company_id: Limitar a los miembros de la empresa (None: toda la plataforma)
             
         Returns:
             Lista de usuarios
         """
-        query = self.db.query(AppUser)
+        query = self._users_query(search, is_active, company_id=company_id)
         
-        # Aplicar filtros
-        if search:
-            query = query.filter(
-                or_(
-                    AppUser.name.ilike(f"%{search}%"),
-                    AppUser.email.ilike(f"%{search}%")
-                )
+        #print(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        
+        if company_id is not None:
+            query = query.order_by(CompanyUser.created_at, CompanyUser.user_id)
+        else:
+            query = query.order_by(AppUser.created_at, AppUser.id)
+        
+        return query.offset(skip).limit(limit).all()
+    
+    def get_users_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        count: Optional[str] = None,
+        search_mode: str = "contains",
+        company_id: Optional[str] = None
+    ) -> KeysetPage:
+        """
+        Obtener una página de usuarios por cursor.
+        
+        Con company_id se listan los miembros de la empresa ordenados por fecha de
+        ingreso (company_user.created_at, user_id), sobre el índice
+        (company_id, is_active, created_at, user_id); sin él, toda la plataforma
+        por (created_at, id). Con search_mode="similar" devuelve los más
+        parecidos al término, sin cursor.
+        
+        Args:
+            limit: Tamaño de página
+            cursor: Cursor devuelto por la página anterior
+            search: Término de búsqueda
+            is_active: Filtrar por estado activo (de la membresía si hay company_id)
+            count: None, "exact" o "estimated" para incluir el total
+            search_mode: contains (subcadena) o similar (similitud trigram)
+            company_id: Limitar a los miembros de la empresa (None: toda la plataforma)
+            
+        Returns:
+            Página con usuarios, cursor siguiente y total opcional
+        """
+        query = self._users_query(search, is_active, search_mode, company_id)
+        
+        if search and uses_similarity(self.db, search_mode):
+            page = ranked_page(query, self.SEARCH_COLUMNS, search, AppUser.id, limit)
+        elif company_id is not None:
+            # La clave de orden es de company_user: se lee junto al usuario
+            page = paginate_keyset(
+                query.add_columns(CompanyUser.created_at),
+                [CompanyUser.created_at, CompanyUser.user_id],
+                limit,
+                cursor,
+                key_of=lambda row: (row[1], row[0].id)
             )
+            page.items = [row[0] for row in page.items]
+        else:
+            page = paginate_keyset(query, [AppUser.created_at, AppUser.id], limit, cursor)
         
-       
+        page.total = count_total(
+            self.db, query, count, AppUser.__tablename__,
+            filtered=bool(search) or is_active is not None or company_id is not None
+        )
         
-        #print(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        return page
+    
+    def _users_query(
+        self,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        search_mode: str = "contains",
+        company_id: Optional[str] = None
+    ):
+        """Consulta de usuarios con los filtros del listado aplicados"""
+        query = self.db.query(AppUser)
         
-        return query.offset(skip).limit(limit).all()
+        if company_id is not None:
+            # Solo los miembros de la empresa; el estado es el de la membresía
+            query = query.join(
+                CompanyUser,
+                and_(CompanyUser.user_id == AppUser.id, CompanyUser.company_id == uuid.UUID(str(company_id)))
+            )
+            if is_active is not None:
+                query = query.filter(CompanyUser.is_active == is_active)
+        elif is_active is not None:
+            query = query.filter(AppUser.is_active == is_active)
+        
+        # Aplicar filtros
+        if search:
+            query = query.filter(search_filter(self.db, self.SEARCH_COLUMNS, search, search_mode))
+        
+        return query
     
     def update_user(self, user_id: str, user_data: UserUpdate,company_id: str) -> Optional[AppUser]:
         """
@@ -306,6 +391,9 @@ class UserService:
         self.db.commit()
         self.db.refresh(user)
         
+        if user_data.role is not None:
+            get_permission_cache().invalidate_user(user_id, company_id)
+        
         return user
     
     def delete_user(self, user_id: str, company_id: str) -> bool:
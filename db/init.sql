@@ -4,6 +4,9 @@
 -- CREATE SCHEMA public AUTHORIZATION arhtur;
 
 COMMENT ON SCHEMA public IS 'standard public schema';
+
+-- Búsqueda por trigramas (índices gin_trgm_ops)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 -- public.alembic_version definition
 
 -- Drop table
@@ -32,8 +35,11 @@ CREATE TABLE public.app_user (
 	is_verified bool DEFAULT false NOT NULL,
 	CONSTRAINT app_user_pkey PRIMARY KEY (id)
 );
+CREATE INDEX ix_app_user_created_at_id ON public.app_user USING btree (created_at, id);
 CREATE INDEX ix_app_user_email ON public.app_user USING btree (email);
+CREATE INDEX ix_app_user_email_trgm ON public.app_user USING gin (email gin_trgm_ops);
 CREATE INDEX ix_app_user_id ON public.app_user USING btree (id);
+CREATE INDEX ix_app_user_name_trgm ON public.app_user USING gin (name gin_trgm_ops);
 
 
 -- public.company definition
@@ -49,8 +55,10 @@ CREATE TABLE public.company (
 	is_active bool DEFAULT true NOT NULL,
 	CONSTRAINT company_pkey PRIMARY KEY (id)
 );
+CREATE INDEX ix_company_created_at_id ON public.company USING btree (created_at, id);
 CREATE INDEX ix_company_id ON public.company USING btree (id);
 CREATE INDEX ix_company_name ON public.company USING btree (name);
+CREATE INDEX ix_company_name_trgm ON public.company USING gin (name gin_trgm_ops);
 
 
 -- public."permission" definition
@@ -81,20 +89,47 @@ CREATE TABLE public.company_user (
 	is_active bool DEFAULT true NOT NULL,
 	is_verified bool DEFAULT false NOT NULL,
 	created_at timestamptz DEFAULT CURRENT_TIMESTAMP NOT NULL,
+	sessions_revoked_before timestamptz NULL,
 	CONSTRAINT company_user_pkey PRIMARY KEY (company_id, user_id),
 	CONSTRAINT company_user_company_id_fkey FOREIGN KEY (company_id) REFERENCES public.company(id) ON DELETE CASCADE,
 	CONSTRAINT company_user_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.app_user(id) ON DELETE CASCADE
 );
 CREATE INDEX ix_company_user_company_id ON public.company_user USING btree (company_id);
+CREATE INDEX ix_company_user_company_id_is_active_created_at ON public.company_user USING btree (company_id, is_active, created_at, user_id);
 CREATE INDEX ix_company_user_user_id ON public.company_user USING btree (user_id);
 
 
+-- public.email_outbox definition
+
+-- Drop table
+
+-- DROP TABLE public.email_outbox;
+
+CREATE TABLE public.email_outbox (
+	id uuid NOT NULL,
+	created_at timestamptz DEFAULT now() NOT NULL,
+	to_email text NOT NULL,
+	subject text NOT NULL,
+	html_content text NULL,
+	status varchar(20) NOT NULL,
+	attempts int4 NOT NULL,
+	next_attempt_at timestamptz DEFAULT now() NOT NULL,
+	last_error text NULL,
+	sent_at timestamptz NULL,
+	CONSTRAINT pk_email_outbox PRIMARY KEY (id)
+);
+CREATE INDEX ix_email_outbox_id ON public.email_outbox USING btree (id);
+CREATE INDEX ix_email_outbox_status_next_attempt_at ON public.email_outbox USING btree (status, next_attempt_at);
+
+
 -- public.invalidated_tokens definition
 
 -- Drop table
 
 -- DROP TABLE public.invalidated_tokens;
 
+-- Particionada por rango de expires_at: la aplicación crea las particiones
+-- diarias por adelantado (CleanupService.maintain_partitions) y purga las vencidas
 CREATE TABLE public.invalidated_tokens (
 	id uuid DEFAULT gen_random_uuid() NOT NULL,
 	token_hash varchar(255) NOT NULL,
@@ -103,15 +138,19 @@ CREATE TABLE public.invalidated_tokens (
 	invalidated_at timestamptz DEFAULT now() NOT NULL,
 	expires_at timestamptz NOT NULL,
 	token_type varchar(20) NOT NULL,
-	CONSTRAINT pk_invalidated_tokens PRIMARY KEY (id),
+	CONSTRAINT pk_invalidated_tokens PRIMARY KEY (id, expires_at),
 	CONSTRAINT fk_invalidated_tokens_company_id_company FOREIGN KEY (company_id) REFERENCES public.company(id),
 	CONSTRAINT fk_invalidated_tokens_user_id_app_user FOREIGN KEY (user_id) REFERENCES public.app_user(id)
-);
+) PARTITION BY RANGE (expires_at);
 CREATE INDEX ix_invalidated_tokens_company_id ON public.invalidated_tokens USING btree (company_id);
 CREATE INDEX ix_invalidated_tokens_expires_at ON public.invalidated_tokens USING btree (expires_at);
-CREATE UNIQUE INDEX ix_invalidated_tokens_token_hash ON public.invalidated_tokens USING btree (token_hash);
+CREATE INDEX ix_invalidated_tokens_invalidated_at ON public.invalidated_tokens USING btree (invalidated_at);
+CREATE UNIQUE INDEX ix_invalidated_tokens_token_hash ON public.invalidated_tokens USING btree (token_hash, expires_at);
 CREATE INDEX ix_invalidated_tokens_user_id ON public.invalidated_tokens USING btree (user_id);
 
+-- Recibe las filas fuera de los rangos creados
+CREATE TABLE public.invalidated_tokens_default PARTITION OF public.invalidated_tokens DEFAULT;
+
 
 -- public."role" definition
 
@@ -127,8 +166,11 @@ CREATE TABLE public."role" (
 	CONSTRAINT role_company_id_fkey FOREIGN KEY (company_id) REFERENCES public.company(id) ON DELETE CASCADE
 );
 CREATE INDEX ix_role_company_id ON public.role USING btree (company_id);
+CREATE INDEX ix_role_company_id_name_id ON public.role USING btree (company_id, name, id);
 CREATE INDEX ix_role_id ON public.role USING btree (id);
+CREATE INDEX ix_role_id_company_id ON public.role USING btree (id, company_id);
 CREATE INDEX ix_role_name ON public.role USING btree (name);
+CREATE INDEX ix_role_name_trgm ON public.role USING gin (name gin_trgm_ops);
 
 
 -- public.role_permission definition
@@ -15,6 +15,18 @@ from app.db.session import get_db
 from app.services.cleanup_service import CleanupService
 
 
+def print_progress(batches: int, deleted: int):
+    """Mostrar el avance de la limpieza tras cada lote"""
+    print(f"   … lote {batches}: {deleted} tokens eliminados", flush=True)
+
+
+def print_result(result: dict, label: str):
+    """Mostrar el resultado de una limpieza por lotes"""
+    print(f"   ✅ {result['deleted']} {label} en {result['batches']} lotes ({result['elapsed_seconds']:.1f} s)")
+    if not result["completed"]:
+        print("   ⚠️ La limpieza no terminó; vuelva a ejecutar para continuar")
+
+
 def main():
     """Función principal del script"""
     parser = argparse.ArgumentParser(description="Limpieza de tokens expirados")
@@ -39,6 +51,25 @@ def main():
         action="store_true", 
         help="Ejecutar todas las operaciones de limpieza"
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        metavar="N",
+        help="Tokens eliminados por lote (por defecto CLEANUP_BATCH_SIZE)"
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Tiempo máximo de cada limpieza en segundos (por defecto sin límite)"
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        metavar="SECONDS",
+        help="Pausa entre lotes (por defecto CLEANUP_BATCH_PAUSE_SECONDS)"
+    )
     
     args = parser.parse_args()
     
@@ -64,22 +95,31 @@ def main():
                 print(f"   Tokens activos: {stats['active_tokens']}")
                 print(f"   Tokens de acceso: {stats['access_tokens']}")
                 print(f"   Tokens de refresco: {stats['refresh_tokens']}")
+                print(f"   Tokens de reset de contraseña: {stats['password_reset_tokens']}")
+                print(f"   Sesiones revocadas: {stats['session_tokens']}")
                 print(f"   Última actualización: {stats['last_updated']}")
             else:
                 print("   ❌ No se pudieron obtener estadísticas")
         
+        batch_options = {
+            "batch_size": args.batch_size,
+            "time_budget_seconds": args.time_budget,
+            "pause_seconds": args.pause,
+            "progress": print_progress,
+        }
+        
         # Limpiar tokens expirados
         if args.cleanup_expired or args.all:
             print("\n🧹 Limpiando tokens expirados...")
-            count = cleanup_service.cleanup_expired_tokens()
-            print(f"   ✅ {count} tokens expirados eliminados")
+            result = cleanup_service.cleanup_expired_tokens(**batch_options)
+            print_result(result, "tokens expirados eliminados")
         
         # Limpiar tokens antiguos
         if args.cleanup_old or args.all:
             days = args.cleanup_old or 30
             print(f"\n🧹 Limpiando tokens más antiguos que {days} días...")
-            count = cleanup_service.cleanup_old_tokens(days)
-            print(f"   ✅ {count} tokens antiguos eliminados")
+            result = cleanup_service.cleanup_old_tokens(days, **batch_options)
+            print_result(result, "tokens antiguos eliminados")
         
         print("\n🎉 Operación completada")
         
@@ -69,6 +69,7 @@ def insert_permissions():
                 print(f"✅ Permiso '{perm_data['name']}' insertado")
         
         db.commit()
+        # La API detecta los permisos nuevos en su siguiente lectura del catálogo
         print(f"\n🎉 Se insertaron {len(inserted_permissions)} permisos correctamente")
         
         # Mostrar todos los permisos
@@ -0,0 +1 @@
+# Performance tests package 
\ No newline at end of file
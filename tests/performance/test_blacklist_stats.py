@@ -0,0 +1,75 @@
+"""
+Estadísticas de la blacklist: una sola consulta agregada sin importar los tipos de token.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.invalidated_token import InvalidatedToken
+from app.models.user import AppUser
+from app.services.cleanup_service import CleanupService
+from tests.utils.query_counter import count_queries
+
+
+def _create_tokens(db: Session):
+    """Tokens de acceso y refresco en dos empresas y tokens de reset sin empresa"""
+    user = AppUser(name="stats", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    companies = [Company(name=f"stats-{uuid.uuid4().hex[:8]}") for _ in range(2)]
+    db.add_all([user, *companies])
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+
+    def token(token_type, company, expired):
+        return InvalidatedToken(
+            id=uuid.uuid4(),
+            token_hash=uuid.uuid4().hex,
+            user_id=user.id,
+            company_id=company.id if company else None,
+            expires_at=now + timedelta(hours=-1 if expired else 1),
+            token_type=token_type,
+        )
+
+    db.add_all(
+        [token("access", companies[0], expired) for expired in (True, True, False)]
+        + [token("refresh", companies[1], expired) for expired in (True, False)]
+        + [token("password_reset", None, False)]
+    )
+    db.flush()
+    return companies
+
+
+@pytest.mark.auth
+def test_blacklist_stats_use_one_query(db_session, db_engine):
+    """Totales, expirados y activos por tipo salen de una sola consulta"""
+    _create_tokens(db_session)
+    cleanup_service = CleanupService(db_session)
+
+    with count_queries(db_engine) as statements:
+        stats = cleanup_service.get_blacklist_stats()
+
+    assert len(statements) == 1
+    assert stats["total_tokens"] == 6
+    assert stats["expired_tokens"] == 3
+    assert stats["active_tokens"] == 3
+    assert stats["access_tokens"] == 3
+    assert stats["refresh_tokens"] == 2
+    assert stats["password_reset_tokens"] == 1
+    assert stats["by_type"]["access"] == {"total": 3, "expired": 2, "active": 1}
+
+
+@pytest.mark.auth
+def test_blacklist_stats_by_company(db_session):
+    """El desglose por empresa separa los tokens de reset (sin empresa)"""
+    companies = _create_tokens(db_session)
+
+    stats = CleanupService(db_session).get_blacklist_stats(by_company=True)
+
+    by_company = {company["company_id"]: company for company in stats["companies"]}
+    assert by_company[str(companies[0].id)]["total"] == 3
+    assert by_company[str(companies[1].id)]["by_type"]["refresh"] == {"total": 2, "expired": 1, "active": 1}
+    assert by_company[None]["by_type"] == {"password_reset": {"total": 1, "expired": 0, "active": 1}}
@@ -0,0 +1,117 @@
+"""
+Limpieza de la blacklist por lotes: un DELETE por lote, sin cargar filas en el ORM.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.invalidated_token import InvalidatedToken
+from app.models.user import AppUser
+from app.services.cleanup_service import CleanupService
+from app.services.maintenance_scheduler import MaintenanceJob, MaintenanceScheduler
+from tests.utils.query_counter import count_queries
+
+EXPIRED = 25
+ACTIVE = 5
+BATCH_SIZE = 10
+
+
+def _create_tokens(db: Session):
+    """Crear EXPIRED tokens expirados y ACTIVE vigentes de un usuario"""
+    user = AppUser(name="cleanup", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        InvalidatedToken(
+            id=uuid.uuid4(),
+            token_hash=uuid.uuid4().hex,
+            user_id=user.id,
+            expires_at=now + timedelta(hours=1 if index < ACTIVE else -index),
+        )
+        for index in range(EXPIRED + ACTIVE)
+    ])
+    db.flush()
+
+
+def _deletes(statements):
+    return [statement for statement in statements if statement.lstrip().upper().startswith("DELETE")]
+
+
+@pytest.mark.auth
+def test_cleanup_expired_tokens_deletes_in_batches(db_session, db_engine):
+    """Los expirados se eliminan en lotes de BATCH_SIZE con un DELETE por lote"""
+    _create_tokens(db_session)
+    cleanup_service = CleanupService(db_session)
+    progress = []
+
+    with count_queries(db_engine) as statements:
+        result = cleanup_service.cleanup_expired_tokens(
+            batch_size=BATCH_SIZE,
+            time_budget_seconds=0,
+            pause_seconds=0,
+            progress=lambda batches, deleted: progress.append((batches, deleted))
+        )
+
+    assert result["deleted"] == EXPIRED
+    assert result["batches"] == 3
+    assert result["completed"] is True
+    assert progress == [(1, 10), (2, 20), (3, 25)]
+    assert len(_deletes(statements)) == 3
+    assert db_session.query(InvalidatedToken).count() == ACTIVE
+
+
+@pytest.mark.auth
+def test_cleanup_stops_when_time_budget_is_exhausted(db_session):
+    """Al agotarse el tiempo se detiene entre lotes y reporta que no terminó"""
+    _create_tokens(db_session)
+    cleanup_service = CleanupService(db_session)
+
+    result = cleanup_service.cleanup_expired_tokens(batch_size=BATCH_SIZE, time_budget_seconds=1e-9, pause_seconds=0)
+
+    assert result["deleted"] == BATCH_SIZE
+    assert result["completed"] is False
+    assert db_session.query(InvalidatedToken).count() == EXPIRED + ACTIVE - BATCH_SIZE
+
+
+@pytest.mark.auth
+def test_database_error_is_not_reported_as_partial_cleanup(db_session, monkeypatch):
+    """
+    Un error a mitad de la limpieza se propaga tras el rollback: el endpoint
+    responde 500 y el programador lo cuenta como fallo, no como limpieza parcial.
+    """
+    _create_tokens(db_session)
+    cleanup_service = CleanupService(db_session)
+    execute = db_session.execute
+    calls = []
+
+    def failing_execute(statement, *args, **kwargs):
+        calls.append(statement)
+        if len(calls) == 2:
+            raise OperationalError("DELETE", {}, Exception("conexión perdida"))
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", failing_execute)
+
+    with pytest.raises(OperationalError):
+        cleanup_service.cleanup_expired_tokens(batch_size=BATCH_SIZE, time_budget_seconds=0, pause_seconds=0)
+
+    # La tarea usa el servicio con la sesión que falla; el programador abre y cierra otra
+    calls.clear()
+    job = MaintenanceJob("cleanup_expired_tokens", 60, lambda db: cleanup_service.cleanup_expired_tokens(
+        batch_size=BATCH_SIZE, time_budget_seconds=0, pause_seconds=0
+    )["deleted"])
+    scheduler = MaintenanceScheduler([job], session_factory=lambda: Session(bind=db_session.connection()), lock_engine=None)
+    scheduler.run_job(job)
+    assert job.failures == 1
+    assert "conexión perdida" in job.last_error
+
+    # Sin el fallo, la siguiente ejecución elimina lo que quedó
+    monkeypatch.setattr(db_session, "execute", execute)
+    remaining = cleanup_service.cleanup_expired_tokens(batch_size=BATCH_SIZE, time_budget_seconds=0, pause_seconds=0)
+    assert remaining["completed"] is True
@@ -0,0 +1,115 @@
+"""
+Benchmark del login: consultas y latencia de AuthService.login.
+El número de consultas no debe crecer con los roles del usuario.
+"""
+
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.schemas.auth import LoginRequest
+from app.services.auth_service import AuthService
+from app.services.security_service import SecurityService
+from tests.utils.query_counter import count_queries
+
+PASSWORD = "BenchPassword1"
+PERMISSIONS_PER_ROLE = 4
+MAX_LOGIN_QUERIES = 2
+REPETITIONS = 10
+
+
+def _create_login_fixture(db: Session, role_count: int):
+    """Crear empresa, usuario activo con role_count roles y un rol en otra empresa"""
+    company = Company(name=f"login-{uuid.uuid4().hex[:8]}")
+    other_company = Company(name=f"login-other-{uuid.uuid4().hex[:8]}")
+    user = AppUser(
+        name="login",
+        email=f"{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password=get_password_hash(PASSWORD)
+    )
+    db.add_all([company, other_company, user])
+    db.flush()
+    db.add(CompanyUser(user_id=user.id, company_id=company.id, is_active=True))
+    db.add(CompanyUser(user_id=user.id, company_id=other_company.id, is_active=True))
+
+    expected = set()
+    for index in range(role_count):
+        role = Role(name=f"role-{index}", company_id=company.id)
+        permissions = [
+            Permission(name=f"login{uuid.uuid4().hex[:6]}:p{offset}") for offset in range(PERMISSIONS_PER_ROLE)
+        ]
+        db.add_all([role, *permissions])
+        db.flush()
+        db.add(UserRole(user_id=user.id, role_id=role.id))
+        for permission in permissions:
+            db.add(RolePermission(role_id=role.id, permission_id=permission.id))
+            expected.add(permission.name)
+
+    foreign_role = Role(name="foreign", company_id=other_company.id)
+    foreign_permission = Permission(name=f"foreign{uuid.uuid4().hex[:6]}:read")
+    db.add_all([foreign_role, foreign_permission])
+    db.flush()
+    db.add(UserRole(user_id=user.id, role_id=foreign_role.id))
+    db.add(RolePermission(role_id=foreign_role.id, permission_id=foreign_permission.id))
+    db.flush()
+
+    return user, company, expected
+
+
+@pytest.mark.slow
+@pytest.mark.auth
+@pytest.mark.parametrize("role_count", [0, 1, 10, 50])
+def test_login_query_count_is_bounded(db_session, db_engine, role_count):
+    """El login usa como máximo MAX_LOGIN_QUERIES consultas sin importar el número de roles"""
+    user, company, expected_permissions = _create_login_fixture(db_session, role_count)
+    auth_service = AuthService(db_session)
+    login_data = LoginRequest(email=user.email, password=PASSWORD, company_name=company.name)
+
+    with count_queries(db_engine) as statements:
+        token = auth_service.login(login_data)
+    assert len(statements) <= MAX_LOGIN_QUERIES
+
+    payload = SecurityService.verify_token(token.access_token)
+    assert payload["company_id"] == str(company.id)
+    assert payload["company_name"] == company.name
+    assert set(payload["permissions"]) == expected_permissions
+    assert len(payload["permissions"]) == len(expected_permissions)
+
+    # bcrypt domina la latencia; se reporta para comparar entre cambios
+    start = time.perf_counter()
+    for _ in range(REPETITIONS):
+        auth_service.login(login_data)
+    login_ms = (time.perf_counter() - start) * 1000 / REPETITIONS
+
+    print(f"\nroles={role_count:>3} | login: {len(statements)} queries, {login_ms:.3f} ms")
+
+
+@pytest.mark.auth
+def test_login_rejects_wrong_password_and_inactive_membership(db_session):
+    """Credenciales incorrectas o membresía inactiva responden 401"""
+    user, company, _ = _create_login_fixture(db_session, 1)
+    auth_service = AuthService(db_session)
+
+    with pytest.raises(HTTPException) as exc_info:
+        auth_service.login(LoginRequest(email=user.email, password="Wrong1234", company_name=company.name))
+    assert exc_info.value.status_code == 401
+
+    db_session.query(CompanyUser).filter(
+        CompanyUser.user_id == user.id, CompanyUser.company_id == company.id
+    ).update({"is_active": False})
+    db_session.flush()
+
+    with pytest.raises(HTTPException) as exc_info:
+        auth_service.login(LoginRequest(email=user.email, password=PASSWORD, company_name=company.name))
+    assert exc_info.value.status_code == 401
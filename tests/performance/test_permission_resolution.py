@@ -0,0 +1,106 @@
+"""
+Micro-benchmark de AuthService.get_user_permissions.
+Mide consultas y latencia para usuarios con 1, 10 y 50 roles en una empresa.
+"""
+
+import time
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services.auth_service import AuthService
+from tests.utils.query_counter import count_queries
+
+PERMISSIONS_PER_ROLE = 5
+PERMISSION_POOL_SIZE = 40
+REPETITIONS = 20
+
+
+def _legacy_get_user_permissions(db: Session, user_id, company_id) -> set:
+    """Implementación anterior (N+1): una consulta de permisos por rol"""
+    user_roles = (
+        db.query(UserRole)
+        .join(Role, UserRole.role_id == Role.id)
+        .filter(UserRole.user_id == user_id)
+        .filter(Role.company_id == company_id)
+        .all()
+    )
+    permissions = set()
+    for user_role in user_roles:
+        role_permissions = (
+            db.query(Permission)
+            .join(RolePermission, Permission.id == RolePermission.permission_id)
+            .filter(RolePermission.role_id == user_role.role_id)
+            .all()
+        )
+        permissions.update(permission.name for permission in role_permissions)
+    return permissions
+
+
+def _create_user_with_roles(db: Session, role_count: int):
+    """Crear empresa, usuario y role_count roles con permisos solapados"""
+    company = Company(name=f"bench-{uuid.uuid4().hex[:8]}")
+    other_company = Company(name=f"bench-other-{uuid.uuid4().hex[:8]}")
+    user = AppUser(name="bench", email=f"{uuid.uuid4().hex[:8]}@bench.test", hashed_password="x")
+    permissions = [Permission(name=f"bench{uuid.uuid4().hex[:6]}:p{i}") for i in range(PERMISSION_POOL_SIZE)]
+    db.add_all([company, other_company, user, *permissions])
+    db.flush()
+
+    for index in range(role_count):
+        role = Role(name=f"role-{index}", company_id=company.id)
+        db.add(role)
+        db.flush()
+        db.add(UserRole(user_id=user.id, role_id=role.id))
+        for offset in range(PERMISSIONS_PER_ROLE):
+            permission = permissions[(index * 3 + offset) % PERMISSION_POOL_SIZE]
+            db.add(RolePermission(role_id=role.id, permission_id=permission.id))
+
+    # Rol en otra empresa: no debe aparecer en los permisos resultantes
+    foreign_role = Role(name="foreign", company_id=other_company.id)
+    db.add(foreign_role)
+    db.flush()
+    db.add(UserRole(user_id=user.id, role_id=foreign_role.id))
+    db.add(RolePermission(role_id=foreign_role.id, permission_id=permissions[-1].id))
+    db.flush()
+
+    return user, company
+
+
+@pytest.mark.slow
+@pytest.mark.auth
+@pytest.mark.parametrize("role_count", [1, 10, 50])
+def test_get_user_permissions_single_query(db_session, db_engine, role_count):
+    """La resolución de permisos usa una sola consulta sin importar el número de roles"""
+    user, company = _create_user_with_roles(db_session, role_count)
+    auth_service = AuthService(db_session)
+
+    with count_queries(db_engine) as statements:
+        permissions = auth_service.get_user_permissions(user.id, company.id)
+    assert len(statements) == 1
+
+    with count_queries(db_engine) as legacy_statements:
+        legacy_permissions = _legacy_get_user_permissions(db_session, user.id, company.id)
+    assert set(permissions) == legacy_permissions
+    assert len(permissions) == len(set(permissions))
+
+    start = time.perf_counter()
+    for _ in range(REPETITIONS):
+        auth_service.get_user_permissions(user.id, company.id)
+    single_query_ms = (time.perf_counter() - start) * 1000 / REPETITIONS
+
+    start = time.perf_counter()
+    for _ in range(REPETITIONS):
+        _legacy_get_user_permissions(db_session, user.id, company.id)
+    legacy_ms = (time.perf_counter() - start) * 1000 / REPETITIONS
+
+    print(
+        f"\nroles={role_count:>3} | consulta única: 1 query, {single_query_ms:.3f} ms"
+        f" | N+1: {len(legacy_statements)} queries, {legacy_ms:.3f} ms"
+    )
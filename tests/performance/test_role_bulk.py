@@ -0,0 +1,181 @@
+"""
+Asignación y revocación de roles en lote: validación por conjuntos, un
+INSERT ... ON CONFLICT DO NOTHING, un DELETE por tuplas (user_id, role_id)
+e invalidación de los permisos cacheados.
+"""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.bulk import insert_ignore_conflicts
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.role import Role
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services.permission_cache import get_permission_cache
+from app.services.role_service import MAX_IDS_IN_ERROR, RoleService
+from tests.utils.query_counter import count_queries
+
+USER_COUNT = 20
+
+
+def _data_statements(statements):
+    """Descartar las sentencias de control de transacción del fixture (SAVEPOINT)"""
+    return [
+        statement for statement in statements
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK"))
+    ]
+
+
+@pytest.fixture
+def permission_cache():
+    cache = get_permission_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def _company(db: Session, user_count: int = USER_COUNT):
+    """Empresa con dos roles y user_count miembros"""
+    company = Company(name=f"bulk-{uuid.uuid4().hex[:8]}")
+    users = [
+        AppUser(name=f"bulk{index}", email=f"bulk{index}-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+        for index in range(user_count)
+    ]
+    db.add_all([company, *users])
+    db.flush()
+    roles = [Role(name=name, company_id=company.id) for name in ("editor", "viewer")]
+    db.add_all([*roles, *(CompanyUser(user_id=user.id, company_id=company.id, is_active=True) for user in users)])
+    db.flush()
+    return company, roles, users
+
+
+def _assigned(db: Session):
+    return set(db.query(UserRole.user_id, UserRole.role_id).all())
+
+
+@pytest.mark.role
+def test_assign_bulk_validates_and_inserts_with_constant_queries(db_session, db_engine, permission_cache):
+    """Una consulta para roles, una para membresías y un INSERT, sin importar la cantidad de pares"""
+    company, (editor, viewer), users = _company(db_session)
+    db_session.add(UserRole(user_id=users[0].id, role_id=editor.id))
+    db_session.flush()
+    pairs = [(user.id, role.id) for user in users for role in (editor, viewer)]
+    permission_cache.set(users[0].id, company.id, ["stale"])
+
+    with count_queries(db_engine) as statements:
+        result = RoleService(db_session).assign_roles_bulk(pairs, str(company.id))
+
+    data = _data_statements(statements)
+    assert len(data) == 3
+    assert "ON CONFLICT" in data[-1].upper()
+    assert (result.requested, result.affected, result.unchanged) == (len(pairs), len(pairs) - 1, 1)
+    assert _assigned(db_session) == set(pairs)
+    assert permission_cache.get(users[0].id, company.id) is None
+
+
+@pytest.mark.role
+def test_revoke_bulk_deletes_only_the_given_pairs(db_session, db_engine, permission_cache):
+    """El DELETE compara tuplas: no revoca el producto cruzado de usuarios y roles"""
+    company, (editor, viewer), users = _company(db_session, user_count=2)
+    first, second = users
+    db_session.add_all([UserRole(user_id=user.id, role_id=role.id) for user in users for role in (editor, viewer)])
+    db_session.flush()
+    permission_cache.set(first.id, company.id, ["stale"])
+    permission_cache.set(second.id, company.id, ["stale"])
+
+    with count_queries(db_engine) as statements:
+        result = RoleService(db_session).revoke_roles_bulk(
+            [(first.id, editor.id), (second.id, viewer.id)],
+            str(company.id)
+        )
+
+    data = _data_statements(statements)
+    assert len(data) == 2
+    assert data[-1].lstrip().upper().startswith("DELETE")
+    assert (result.requested, result.affected, result.unchanged) == (2, 2, 0)
+    assert _assigned(db_session) == {(first.id, viewer.id), (second.id, editor.id)}
+    assert permission_cache.get(first.id, company.id) is None
+    assert permission_cache.get(second.id, company.id) is None
+
+
+@pytest.mark.role
+@pytest.mark.parametrize("operation", ["assign_roles_bulk", "revoke_roles_bulk"])
+def test_bulk_rejects_roles_of_other_companies(db_session, operation):
+    """Un rol de otra empresa rechaza el lote completo"""
+    company, (editor, _), users = _company(db_session, user_count=1)
+    other_company, (other_role, _), _ = _company(db_session, user_count=0)
+    db_session.add(UserRole(user_id=users[0].id, role_id=other_role.id))
+    db_session.flush()
+    before = _assigned(db_session)
+
+    with pytest.raises(HTTPException) as error:
+        getattr(RoleService(db_session), operation)(
+            [(users[0].id, editor.id), (users[0].id, other_role.id)], str(company.id)
+        )
+
+    assert error.value.status_code == 404
+    assert str(other_role.id) in error.value.detail
+    assert _assigned(db_session) == before
+
+
+@pytest.mark.role
+def test_assign_bulk_rejects_users_outside_the_company(db_session):
+    """Un usuario que no es miembro rechaza el lote completo"""
+    company, (editor, _), users = _company(db_session, user_count=1)
+    _, _, (outsider,) = _company(db_session, user_count=1)
+    before = _assigned(db_session)
+
+    with pytest.raises(HTTPException) as error:
+        RoleService(db_session).assign_roles_bulk(
+            [(users[0].id, editor.id), (outsider.id, editor.id)], str(company.id)
+        )
+
+    assert error.value.status_code == 400
+    assert str(outsider.id) in error.value.detail
+    assert _assigned(db_session) == before
+
+
+@pytest.mark.role
+def test_revoke_bulk_removes_roles_of_former_members(db_session):
+    """Los roles de la empresa se revocan aunque el usuario ya no sea miembro"""
+    company, (editor, _), (former,) = _company(db_session, user_count=1)
+    db_session.add(UserRole(user_id=former.id, role_id=editor.id))
+    db_session.query(CompanyUser).filter(CompanyUser.user_id == former.id).delete()
+    db_session.flush()
+
+    result = RoleService(db_session).revoke_roles_bulk([(former.id, editor.id)], str(company.id))
+
+    assert result.affected == 1
+    assert _assigned(db_session) == set()
+
+
+@pytest.mark.role
+def test_error_lists_a_bounded_number_of_ids(db_session):
+    """Con miles de IDs rechazados, el detalle solo lista los primeros"""
+    company, (editor, _), _ = _company(db_session, user_count=0)
+    outsiders = [uuid.uuid4() for _ in range(MAX_IDS_IN_ERROR + 5)]
+
+    with pytest.raises(HTTPException) as error:
+        RoleService(db_session).assign_roles_bulk([(user_id, editor.id) for user_id in outsiders], str(company.id))
+
+    listed = sorted(map(str, outsiders))
+    assert listed[MAX_IDS_IN_ERROR - 1] in error.value.detail
+    assert listed[MAX_IDS_IN_ERROR] not in error.value.detail
+    assert error.value.detail.endswith("y 5 más")
+
+
+@pytest.mark.unit
+def test_insert_ignore_conflicts_rejects_unsupported_dialects():
+    """Fuera de PostgreSQL y SQLite se falla en vez de usar INSERT IGNORE"""
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
+
+    with pytest.raises(NotImplementedError):
+        insert_ignore_conflicts(db, UserRole, [{"user_id": uuid.uuid4(), "role_id": uuid.uuid4()}], ["user_id", "role_id"])
+
+    assert insert_ignore_conflicts(db, UserRole, [], ["user_id", "role_id"]) == 0
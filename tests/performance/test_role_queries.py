@@ -0,0 +1,147 @@
+"""
+Regresión de consultas en las lecturas de RoleService.
+Una página de roles cuesta dos consultas sin importar cuántos roles tenga.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.schemas.role import RoleCreate, RoleRead, RoleUpdate
+from app.services.role_service import RoleService
+from tests.utils.query_counter import count_queries
+
+ROLE_COUNT = 100
+PERMISSIONS_PER_ROLE = 3
+PERMISSION_POOL_SIZE = 12
+
+
+def _data_statements(statements):
+    """Descartar las sentencias de control de transacción del fixture (SAVEPOINT)"""
+    return [
+        statement for statement in statements
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK"))
+    ]
+
+
+def _create_roles(db: Session, role_count: int):
+    """Crear una empresa con role_count roles y PERMISSIONS_PER_ROLE permisos cada uno"""
+    company = Company(name=f"roles-{uuid.uuid4().hex[:8]}")
+    permissions = [Permission(name=f"roles{uuid.uuid4().hex[:6]}:p{i}") for i in range(PERMISSION_POOL_SIZE)]
+    db.add_all([company, *permissions])
+    db.flush()
+
+    roles = []
+    for index in range(role_count):
+        role = Role(name=f"role-{index:03d}", company_id=company.id)
+        db.add(role)
+        db.flush()
+        for offset in range(PERMISSIONS_PER_ROLE):
+            permission = permissions[(index + offset) % PERMISSION_POOL_SIZE]
+            db.add(RolePermission(role_id=role.id, permission_id=permission.id))
+        roles.append(role)
+
+    # Rol sin permisos: debe listarse con una lista vacía
+    empty_role = Role(name="zz-empty", company_id=company.id)
+    db.add(empty_role)
+    db.flush()
+
+    return company, roles, permissions
+
+
+@pytest.mark.role
+def test_get_roles_page_uses_two_queries(db_session, db_engine):
+    """Una página de 100 roles cuesta dos consultas, no 101"""
+    company, roles, _ = _create_roles(db_session, ROLE_COUNT)
+    role_service = RoleService(db_session)
+
+    with count_queries(db_engine) as statements:
+        page = role_service.get_roles(skip=0, limit=ROLE_COUNT + 1, company_id=company.id)
+        serialized = [RoleRead.model_validate(role, from_attributes=True) for role in page]
+
+    assert len(_data_statements(statements)) == 2
+    assert len(serialized) == ROLE_COUNT + 1
+    by_name = {role.name: role for role in serialized}
+    assert len(by_name["role-000"].permissions) == PERMISSIONS_PER_ROLE
+    assert by_name["zz-empty"].permissions == []
+
+
+@pytest.mark.role
+def test_get_role_by_id_uses_one_query(db_session, db_engine):
+    """Obtener un rol con sus permisos es una sola consulta"""
+    _, roles, _ = _create_roles(db_session, 1)
+    role_service = RoleService(db_session)
+
+    with count_queries(db_engine) as statements:
+        role = role_service.get_role_by_id(roles[0].id)
+        serialized = RoleRead.model_validate(role, from_attributes=True)
+
+    assert len(_data_statements(statements)) == 1
+    assert len(serialized.permissions) == PERMISSIONS_PER_ROLE
+    assert role_service.get_role_by_id(uuid.uuid4()) is None
+
+
+@pytest.mark.role
+def test_create_and_update_role_do_not_reload(db_session, db_engine):
+    """Crear y actualizar un rol no vuelve a leer el rol ni sus permisos"""
+    company, _, permissions = _create_roles(db_session, 0)
+    role_service = RoleService(db_session)
+    permission_ids = [permission.id for permission in permissions[:5]]
+
+    with count_queries(db_engine) as statements:
+        created = role_service.create_role(
+            RoleCreate(name="Nuevo", company_id=company.id, permissions=permission_ids)
+        )
+        serialized = RoleRead.model_validate(created, from_attributes=True)
+
+    # existencia del nombre, INSERT role, SELECT permisos, INSERT role_permission
+    assert len(_data_statements(statements)) <= 4
+    assert {permission.id for permission in serialized.permissions} == set(permission_ids)
+
+    new_ids = [permission.id for permission in permissions[3:8]]
+    with count_queries(db_engine) as statements:
+        updated = role_service.update_role(created.id, RoleUpdate(permissions=new_ids))
+        serialized = RoleRead.model_validate(updated, from_attributes=True)
+
+    # SELECT role, SELECT permisos, DELETE, INSERT
+    assert len(_data_statements(statements)) <= 4
+    assert {permission.id for permission in serialized.permissions} == set(new_ids)
+
+
+
+def _inserts(statements):
+    return [statement for statement in statements if statement.lstrip().upper().startswith("INSERT")]
+
+
+@pytest.mark.role
+def test_update_role_writes_only_the_diff(db_session, db_engine):
+    """update_role escribe solo la diferencia con los permisos actuales"""
+    company, _, permissions = _create_roles(db_session, 0)
+    role_service = RoleService(db_session)
+    all_ids = [permission.id for permission in permissions]
+    created = role_service.create_role(RoleCreate(name="Admin", company_id=company.id, permissions=all_ids))
+
+    # Misma lista: ningún INSERT
+    with count_queries(db_engine) as statements:
+        role_service.update_role(created.id, RoleUpdate(permissions=all_ids))
+    assert _inserts(statements) == []
+
+    # Quitar uno: solo el DELETE
+    with count_queries(db_engine) as statements:
+        updated = role_service.update_role(created.id, RoleUpdate(permissions=all_ids[1:]))
+    assert _inserts(statements) == []
+    assert {permission.id for permission in updated.permissions} == set(all_ids[1:])
+
+    # Volver a agregarlo: un único INSERT
+    with count_queries(db_engine) as statements:
+        updated = role_service.update_role(created.id, RoleUpdate(permissions=all_ids))
+    assert len(_inserts(statements)) == 1
+    assert len(_data_statements(statements)) <= 4
+
+    stored = db_session.query(RolePermission).filter(RolePermission.role_id == created.id).count()
+    assert stored == len(all_ids)
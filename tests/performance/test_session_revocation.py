@@ -0,0 +1,75 @@
+"""
+Revocación por sesión (sid) y por usuario y empresa (sessions_revoked_before).
+Verificar un token revocado cuesta una búsqueda por clave fija, sin importar
+cuántos tokens emitió la sesión.
+"""
+
+import time
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.user import AppUser
+from app.services.auth_service import AuthService
+from app.services.security_service import SecurityService
+from tests.utils.query_counter import count_queries
+
+REFRESHES = 5
+
+
+def _create_member(db: Session):
+    """Usuario activo en una empresa"""
+    company = Company(name=f"session-{uuid.uuid4().hex[:8]}")
+    user = AppUser(name="session", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add_all([company, user])
+    db.flush()
+    db.add(CompanyUser(user_id=user.id, company_id=company.id, is_active=True))
+    db.flush()
+    return user, str(company.id)
+
+
+@pytest.mark.auth
+def test_logout_revokes_whole_session(db_session, db_engine):
+    """Un logout revoca con una fila los tokens renovados y sus access tokens"""
+    user, company_id = _create_member(db_session)
+    auth_service = AuthService(db_session)
+    security_service = SecurityService(db_session)
+
+    tokens = [auth_service.create_tokens(user, company_id, "session", [])]
+    for _ in range(REFRESHES):
+        tokens.append(auth_service.refresh_token(tokens[-1].refresh_token))
+
+    sids = {security_service.verify_access_token(token.access_token)["sid"] for token in tokens}
+    assert len(sids) == 1
+
+    assert auth_service.logout(tokens[-1].refresh_token) is True
+
+    with count_queries(db_engine) as statements:
+        assert all(security_service.verify_access_token(token.access_token) is None for token in tokens)
+    # A lo sumo las claves de sesión y de jti de cada token verificado
+    assert len(statements) <= 2 * len(tokens)
+    assert security_service.verify_refresh_token(tokens[0].refresh_token) is None
+
+
+@pytest.mark.auth
+def test_logout_all_revokes_tokens_issued_before(db_session):
+    """logout-all revoca los tokens ya emitidos pero no los de un login posterior"""
+    user, company_id = _create_member(db_session)
+    auth_service = AuthService(db_session)
+    security_service = SecurityService(db_session)
+
+    before = auth_service.create_tokens(user, company_id, "session", [])
+    assert auth_service.logout_all(str(user.id), company_id) == 1
+    # iat tiene precisión de milisegundos
+    time.sleep(0.01)
+    after = auth_service.create_tokens(user, company_id, "session", [])
+
+    _, company_user = auth_service.get_active_membership(str(user.id), company_id)
+    before_payload = security_service.verify_access_token(before.access_token)
+    after_payload = security_service.verify_access_token(after.access_token)
+
+    assert SecurityService.issued_before(before_payload, company_user.sessions_revoked_before)
+    assert not SecurityService.issued_before(after_payload, company_user.sessions_revoked_before)
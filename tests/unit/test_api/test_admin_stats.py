@@ -0,0 +1,80 @@
+"""
+Desglose por empresa de /admin/blacklist/stats: expone todas las empresas,
+así que solo se entrega con el permiso system:admin.
+"""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.main import app
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services.auth_service import AuthService
+from app.services.permission_cache import get_permission_cache
+
+
+@pytest.fixture
+def api_client(db_session):
+    """Cliente HTTP sobre la sesión del test, sin el lifespan de la aplicación"""
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    get_permission_cache().clear()
+    yield TestClient(app)
+    get_permission_cache().clear()
+    app.dependency_overrides.pop(get_db, None)
+
+
+def _member_token(db: Session, permission_names):
+    """Token de un miembro activo de una empresa nueva con los permisos indicados"""
+    company = Company(name=f"stats-{uuid.uuid4().hex[:8]}")
+    user = AppUser(name="stats", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add_all([company, user])
+    db.flush()
+
+    role = Role(name="stats", company_id=company.id)
+    db.add_all([role, CompanyUser(user_id=user.id, company_id=company.id, is_active=True)])
+    db.flush()
+    db.add(UserRole(user_id=user.id, role_id=role.id))
+    for name in permission_names:
+        permission = db.query(Permission).filter(Permission.name == name).first() or Permission(name=name)
+        db.add(permission)
+        db.flush()
+        db.add(RolePermission(role_id=role.id, permission_id=permission.id))
+    db.flush()
+
+    return AuthService(db).create_tokens(user, str(company.id)).access_token
+
+
+@pytest.mark.auth
+def test_company_breakdown_requires_system_admin(db_session, api_client):
+    """Sin system:admin el desglose devuelve 403; las cifras globales siguen disponibles"""
+    headers = {"Authorization": f"Bearer {_member_token(db_session, ['user:read'])}"}
+
+    response = api_client.get("/api/v1/admin/blacklist/stats", params={"by_company": True}, headers=headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Permiso requerido: system:admin"
+
+    response = api_client.get("/api/v1/admin/blacklist/stats", headers=headers)
+    assert response.status_code == 200
+    assert response.json().get("companies") is None
+
+
+@pytest.mark.auth
+def test_company_breakdown_for_system_admin(db_session, api_client):
+    """Con system:admin se entrega el desglose de todas las empresas"""
+    headers = {"Authorization": f"Bearer {_member_token(db_session, ['system:admin'])}"}
+
+    response = api_client.get("/api/v1/admin/blacklist/stats", params={"by_company": True}, headers=headers)
+    assert response.status_code == 200
+    assert isinstance(response.json()["companies"], list)
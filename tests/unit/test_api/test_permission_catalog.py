@@ -0,0 +1,100 @@
+"""
+Catálogo de permisos por sección: ETag, respuesta 304 con If-None-Match y
+detección de permisos agregados por otro proceso.
+"""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.main import app
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services.auth_service import AuthService
+from app.services.permission_catalog import get_permission_catalog
+
+CATALOG_URL = "/api/v1/roles/all_sections_with_permissions"
+
+
+@pytest.fixture
+def api_client(db_session):
+    """Cliente HTTP sobre la sesión del test, con el catálogo del proceso vacío"""
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    get_permission_catalog().invalidate()
+    yield TestClient(app)
+    get_permission_catalog().invalidate()
+    app.dependency_overrides.pop(get_db, None)
+
+
+def _reader_headers(db: Session) -> dict:
+    """Authorization de un usuario con role:read en su empresa"""
+    company = Company(name=f"catalog-{uuid.uuid4().hex[:8]}")
+    user = AppUser(name="catalog", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    permission = Permission(name="role:read")
+    db.add_all([company, user, permission])
+    db.flush()
+    role = Role(name="reader", company_id=company.id)
+    db.add_all([role, CompanyUser(user_id=user.id, company_id=company.id, is_active=True)])
+    db.flush()
+    db.add_all([
+        RolePermission(role_id=role.id, permission_id=permission.id),
+        UserRole(user_id=user.id, role_id=role.id),
+    ])
+    db.flush()
+
+    token = AuthService(db).create_tokens(user, str(company.id))
+    return {"Authorization": f"Bearer {token.access_token}"}
+
+
+@pytest.mark.role
+def test_matching_etag_returns_304(db_session, api_client):
+    """If-None-Match con el ETag vigente (fuerte, débil o en lista) responde 304 sin cuerpo"""
+    headers = _reader_headers(db_session)
+
+    response = api_client.get(CATALOG_URL, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert [item["name"] for item in response.json()["data"]["role"]] == ["read"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"otro", {etag}', "*"):
+        cached = api_client.get(CATALOG_URL, headers={**headers, "If-None-Match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+
+@pytest.mark.role
+def test_stale_etag_returns_catalog(db_session, api_client):
+    """Un ETag distinto recibe el catálogo completo"""
+    headers = _reader_headers(db_session)
+
+    response = api_client.get(CATALOG_URL, headers={**headers, "If-None-Match": '"desactualizado"'})
+
+    assert response.status_code == 200
+    assert "role" in response.json()["data"]
+
+
+@pytest.mark.role
+def test_permission_added_elsewhere_changes_etag(db_session, api_client):
+    """Un permiso insertado fuera de la API (p. ej. por un script) cambia el ETag sin esperar el TTL"""
+    headers = _reader_headers(db_session)
+    etag = api_client.get(CATALOG_URL, headers=headers).headers["ETag"]
+
+    db_session.add(Permission(name="report:export"))
+    db_session.flush()
+
+    response = api_client.get(CATALOG_URL, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [item["name"] for item in response.json()["data"]["report"]] == ["export"]
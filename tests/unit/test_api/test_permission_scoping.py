@@ -0,0 +1,80 @@
+"""
+Permisos limitados a la empresa del token: un rol con user:read en otra
+empresa no concede acceso, sin importar PERMISSION_MODE.
+"""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.deps import settings as deps_settings
+from app.db.session import get_db
+from app.main import app
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services.auth_service import AuthService
+from app.services.permission_cache import get_permission_cache
+
+
+@pytest.fixture
+def api_client(db_session):
+    """Cliente HTTP sobre la sesión del test, sin el lifespan de la aplicación"""
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    get_permission_cache().clear()
+    yield TestClient(app)
+    get_permission_cache().clear()
+    app.dependency_overrides.pop(get_db, None)
+
+
+def _member_of_two_companies(db: Session):
+    """Usuario activo en A y en B, con user:read solo en B"""
+    company_a = Company(name=f"tenant-a-{uuid.uuid4().hex[:8]}")
+    company_b = Company(name=f"tenant-b-{uuid.uuid4().hex[:8]}")
+    user = AppUser(name="tenant", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    permission = Permission(name="user:read")
+    db.add_all([company_a, company_b, user, permission])
+    db.flush()
+
+    role_b = Role(name="reader", company_id=company_b.id)
+    db.add_all([
+        role_b,
+        CompanyUser(user_id=user.id, company_id=company_a.id, is_active=True),
+        CompanyUser(user_id=user.id, company_id=company_b.id, is_active=True),
+    ])
+    db.flush()
+    db.add_all([
+        RolePermission(role_id=role_b.id, permission_id=permission.id),
+        UserRole(user_id=user.id, role_id=role_b.id),
+    ])
+    db.flush()
+    return user, company_a, company_b
+
+
+@pytest.mark.auth
+@pytest.mark.role
+@pytest.mark.parametrize("permission_mode", ["database", "token", "cache"])
+def test_role_in_other_company_does_not_grant_permission(db_session, api_client, monkeypatch, permission_mode):
+    """Con un token de A, el user:read que el usuario tiene en B no abre GET /users/"""
+    monkeypatch.setattr(deps_settings.security, "permission_mode", permission_mode)
+    user, company_a, company_b = _member_of_two_companies(db_session)
+    auth_service = AuthService(db_session)
+
+    token_a = auth_service.create_tokens(user, str(company_a.id))
+    token_b = auth_service.create_tokens(user, str(company_b.id))
+
+    response = api_client.get("/api/v1/users/", headers={"Authorization": f"Bearer {token_a.access_token}"})
+    assert response.status_code == 403
+
+    # Control: el mismo usuario sí lee usuarios con el token de B
+    response = api_client.get("/api/v1/users/", headers={"Authorization": f"Bearer {token_b.access_token}"})
+    assert response.status_code == 200
@@ -0,0 +1,147 @@
+"""
+Fachadas async de los servicios sobre una AsyncSession (aiosqlite): las
+llamadas normales van por run_sync y las de threaded_methods usan una
+Session propia en el threadpool.
+"""
+
+import asyncio
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.role import Role
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services import async_services
+from app.services.async_services import AsyncAuthService, AsyncServiceFacade
+
+pytest.importorskip("aiosqlite")
+
+
+class ProbeService:
+    """Servicio mínimo que reporta en qué hilo se ejecutó"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def count_users(self):
+        return threading.get_ident(), self.db.query(AppUser).count()
+
+    def count_users_in_thread(self):
+        return threading.get_ident(), self.db.query(AppUser).count()
+
+    def _internal(self):
+        return None
+
+
+class AsyncProbeService(AsyncServiceFacade):
+    service_class = ProbeService
+    threaded_methods = frozenset({"count_users_in_thread"})
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """El mismo archivo SQLite visto por un engine síncrono y uno aiosqlite"""
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    # threaded_methods abren su Session sobre el engine síncrono de la aplicación
+    monkeypatch.setattr(async_services, "engine", sync_engine)
+
+    yield sessionmaker(bind=sync_engine, expire_on_commit=False), async_sessionmaker(async_engine, expire_on_commit=False)
+
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+
+def _seed(SyncSession):
+    """Usuario con un rol en su empresa A y otro en la empresa B"""
+    with SyncSession() as db:
+        company_a = Company(name=f"async-a-{uuid.uuid4().hex[:8]}")
+        company_b = Company(name=f"async-b-{uuid.uuid4().hex[:8]}")
+        user = AppUser(name="async", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+        db.add_all([company_a, company_b, user])
+        db.flush()
+        role_a = Role(name="role-a", company_id=company_a.id)
+        role_b = Role(name="role-b", company_id=company_b.id)
+        db.add_all([
+            role_a,
+            role_b,
+            CompanyUser(user_id=user.id, company_id=company_a.id, is_active=True),
+            CompanyUser(user_id=user.id, company_id=company_b.id, is_active=True),
+        ])
+        db.flush()
+        db.add_all([UserRole(user_id=user.id, role_id=role_a.id), UserRole(user_id=user.id, role_id=role_b.id)])
+        db.commit()
+        return user, company_a
+
+
+@pytest.mark.unit
+def test_facade_methods_run_through_run_sync(databases):
+    """Un método normal corre con run_sync en el hilo del event loop"""
+    SyncSession, AsyncSessionLocal = databases
+    _seed(SyncSession)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            assert isinstance(db, AsyncSession)
+            return threading.get_ident(), await AsyncProbeService(db).count_users()
+
+    loop_thread, (call_thread, users) = asyncio.run(scenario())
+
+    assert users == 1
+    assert call_thread == loop_thread
+
+
+@pytest.mark.unit
+def test_threaded_methods_use_own_session_in_threadpool(databases):
+    """Un método de threaded_methods corre fuera del event loop con una Session síncrona propia"""
+    SyncSession, AsyncSessionLocal = databases
+    _seed(SyncSession)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            return threading.get_ident(), await AsyncProbeService(db).count_users_in_thread()
+
+    loop_thread, (call_thread, users) = asyncio.run(scenario())
+
+    assert users == 1
+    assert call_thread != loop_thread
+
+
+@pytest.mark.unit
+def test_private_methods_are_not_exposed():
+    """Solo los métodos públicos del servicio se exponen como corutinas"""
+    with pytest.raises(AttributeError):
+        AsyncProbeService(None)._internal
+    with pytest.raises(AttributeError):
+        AsyncProbeService(None).missing
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_profile_lists_only_roles_of_token_company(databases):
+    """/auth/me por la fachada async: solo los roles de la empresa del token"""
+    SyncSession, AsyncSessionLocal = databases
+    user, company_a = _seed(SyncSession)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            membership = await auth_service.get_active_membership(str(user.id), str(company_a.id))
+            profile = await auth_service.get_user_profile(user, str(company_a.id))
+            return membership, profile
+
+    membership, profile = asyncio.run(scenario())
+
+    assert membership is not None
+    assert profile["company_id"] == str(company_a.id)
+    assert profile["roles"] == ["role-a"]
@@ -0,0 +1,104 @@
+"""
+Caché en memoria de la blacklist: precarga, refresco incremental y desalojo.
+Un fallo de búsqueda solo es concluyente mientras la caché está completa.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.invalidated_token import InvalidatedToken
+from app.models.user import AppUser
+from app.services.blacklist_cache import TokenBlacklistCache
+
+
+def _revoke(db: Session, token_hash: str, invalidated_at: datetime = None) -> None:
+    """Registrar una revocación vigente directamente en la base de datos"""
+    now = datetime.now(timezone.utc)
+    user = AppUser(name="blacklist", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add(InvalidatedToken(
+        id=uuid.uuid4(),
+        token_hash=token_hash,
+        user_id=user.id,
+        invalidated_at=invalidated_at or now,
+        expires_at=now + timedelta(hours=1),
+        token_type="access",
+    ))
+    db.flush()
+
+
+def _cache(**kwargs) -> TokenBlacklistCache:
+    options = {"max_size": 100, "refresh_seconds": 60, "use_filter": False}
+    options.update(kwargs)
+    return TokenBlacklistCache(**options)
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_lookup_before_warm_falls_back_to_database():
+    """Sin precarga la caché no puede afirmar que un token no está revocado"""
+    assert _cache().lookup("desconocido") is None
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_miss_after_warm_is_conclusive(db_session):
+    """Tras la precarga, un hash ausente no está revocado y uno presente sí"""
+    _revoke(db_session, "revocado")
+    cache = _cache()
+
+    assert cache.warm(db_session) == 1
+
+    assert cache.lookup("revocado") is True
+    assert cache.lookup("desconocido") is False
+    assert cache.stats()["complete"] is True
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_revocation_from_another_process_arrives_on_refresh(db_session):
+    """Una revocación escrita por otro proceso se ve tras el siguiente refresco"""
+    _revoke(db_session, "inicial", invalidated_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+    cache = _cache()
+    cache.warm(db_session)
+
+    _revoke(db_session, "remoto")
+    assert cache.lookup("remoto") is False
+
+    # El margen de solapamiento vuelve a leer las revocaciones recientes
+    assert cache.refresh(db_session) >= 1
+    assert cache.lookup("remoto") is True
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_eviction_marks_cache_incomplete(db_session):
+    """Al desalojar una revocación vigente los fallos vuelven a ir a la base de datos"""
+    _revoke(db_session, "inicial")
+    cache = _cache(max_size=2)
+    cache.warm(db_session)
+
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    cache.add("local-1", expires_at)
+    assert cache.stats()["complete"] is True
+
+    cache.add("local-2", expires_at + timedelta(minutes=1))
+
+    stats = cache.stats()
+    assert stats["complete"] is False
+    assert stats["size"] == 2
+    assert cache.lookup("desconocido") is None
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_expired_revocations_are_not_cached():
+    """Un token ya expirado no ocupa espacio en la caché"""
+    cache = _cache()
+    cache.add("expirado", datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,162 @@
+"""
+Usuarios de una empresa: roles agregados en SQL por miembro, paginación por
+fecha de ingreso, filtro por estado de la membresía y export NDJSON/CSV.
+"""
+
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.main import app
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services import company_service as company_service_module
+from app.services.auth_service import AuthService
+from app.services.company_service import CompanyService, iter_company_users_export
+from app.services.permission_cache import get_permission_cache
+
+
+def _members(db: Session):
+    """
+    Empresa con tres miembros: ana (admin y editor), beto (sin roles) y caro
+    (membresía inactiva, viewer). ana tiene además un rol en otra empresa.
+    """
+    company = Company(name=f"members-{uuid.uuid4().hex[:8]}")
+    other_company = Company(name=f"other-{uuid.uuid4().hex[:8]}")
+    users = {
+        name: AppUser(name=name, email=f"{name}-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+        for name in ("ana", "beto", "caro")
+    }
+    db.add_all([company, other_company, *users.values()])
+    db.flush()
+
+    roles = {name: Role(name=name, company_id=company.id) for name in ("admin", "editor", "viewer")}
+    foreign_role = Role(name="ajeno", company_id=other_company.id)
+    joined = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db.add_all([
+        *roles.values(),
+        foreign_role,
+        CompanyUser(user_id=users["ana"].id, company_id=company.id, is_active=True, created_at=joined),
+        CompanyUser(user_id=users["beto"].id, company_id=company.id, is_active=True, created_at=joined + timedelta(days=1)),
+        CompanyUser(user_id=users["caro"].id, company_id=company.id, is_active=False, created_at=joined + timedelta(days=2)),
+        CompanyUser(user_id=users["ana"].id, company_id=other_company.id, is_active=True, created_at=joined),
+    ])
+    db.flush()
+    db.add_all([
+        UserRole(user_id=users["ana"].id, role_id=roles["admin"].id),
+        UserRole(user_id=users["ana"].id, role_id=roles["editor"].id),
+        UserRole(user_id=users["ana"].id, role_id=foreign_role.id),
+        UserRole(user_id=users["caro"].id, role_id=roles["viewer"].id),
+    ])
+    db.flush()
+    return company, users
+
+
+@pytest.mark.company
+def test_roles_are_aggregated_per_member(db_session):
+    """Una fila por miembro con solo los roles de la empresa; sin roles, lista vacía"""
+    company, users = _members(db_session)
+
+    rows = CompanyService(db_session).get_company_users(str(company.id))
+
+    assert [row["user_id"] for row in rows] == [users["ana"].id, users["beto"].id, users["caro"].id]
+    assert sorted(rows[0]["roles"]) == ["admin", "editor"]
+    assert rows[1]["roles"] == []
+    assert rows[2]["roles"] == ["viewer"]
+
+
+@pytest.mark.company
+def test_pages_follow_join_order(db_session):
+    company, users = _members(db_session)
+    company_service = CompanyService(db_session)
+
+    first = company_service.get_company_users_page(str(company.id), limit=2)
+    second = company_service.get_company_users_page(str(company.id), limit=2, cursor=first.next_cursor)
+
+    assert [row["user_id"] for row in first.items] == [users["ana"].id, users["beto"].id]
+    assert [row["user_id"] for row in second.items] == [users["caro"].id]
+    assert second.next_cursor is None
+
+
+@pytest.mark.company
+def test_is_active_filters_the_membership(db_session):
+    company, users = _members(db_session)
+    company_service = CompanyService(db_session)
+
+    active = company_service.get_company_users_page(str(company.id), is_active=True)
+    inactive = company_service.get_company_users_page(str(company.id), is_active=False)
+
+    assert [row["user_id"] for row in active.items] == [users["ana"].id, users["beto"].id]
+    assert [row["user_id"] for row in inactive.items] == [users["caro"].id]
+
+
+@pytest.fixture
+def export_session(db_session, monkeypatch):
+    """El export abre su propia sesión: se la apunta a la conexión del test"""
+    monkeypatch.setattr(company_service_module, "SessionLocal", lambda: Session(bind=db_session.connection()))
+
+
+@pytest.mark.company
+def test_ndjson_export_has_one_member_per_line(db_session, export_session):
+    company, users = _members(db_session)
+
+    lines = list(iter_company_users_export(str(company.id), "ndjson"))
+
+    assert all(line.endswith("\n") for line in lines)
+    records = [json.loads(line) for line in lines]
+    assert [record["user_id"] for record in records] == [str(user.id) for user in users.values()]
+    assert sorted(records[0]["roles"]) == ["admin", "editor"]
+    assert records[2]["is_active"] is False
+    assert records[0]["user_email"] == users["ana"].email
+
+
+@pytest.mark.company
+def test_csv_export_via_endpoint(db_session, export_session):
+    """GET /companies/{id}/users/export?format=csv: encabezado, una fila por miembro, roles con |"""
+    company, users = _members(db_session)
+    permission = Permission(name="company:read")
+    reader_role = Role(name="reader", company_id=company.id)
+    db_session.add_all([permission, reader_role])
+    db_session.flush()
+    db_session.add_all([
+        RolePermission(role_id=reader_role.id, permission_id=permission.id),
+        UserRole(user_id=users["beto"].id, role_id=reader_role.id),
+    ])
+    db_session.flush()
+    token = AuthService(db_session).create_tokens(users["beto"], str(company.id))
+
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    get_permission_cache().clear()
+    try:
+        response = TestClient(app).get(
+            f"/api/v1/companies/{company.id}/users/export",
+            params={"format": "csv"},
+            headers={"Authorization": f"Bearer {token.access_token}"}
+        )
+    finally:
+        get_permission_cache().clear()
+        app.dependency_overrides.pop(get_db, None)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert f"company_{company.id}_users.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["user_id"] for row in rows] == [str(user.id) for user in users.values()]
+    assert sorted(rows[0]["roles"].split("|")) == ["admin", "editor"]
+    assert rows[1]["roles"] == "reader"
+    assert rows[2]["is_active"] == "False"
@@ -0,0 +1,184 @@
+"""
+Dispatcher de email contra un servidor SMTP local (aiosmtpd).
+Los envíos reutilizan la conexión del pool y los fallos se reintentan.
+"""
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+from app.services.email_dispatcher import EmailDispatcher, EmailOutboxStore, OutboxMessage
+from app.services.email_service import EmailService, SmtpConnectionPool
+
+
+class RecordingHandler:
+    """Guarda los mensajes recibidos y la conexión SMTP de cada uno"""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 Message accepted for delivery"
+
+
+class MemoryOutbox(EmailOutboxStore):
+    """email_outbox en memoria con los mismos estados que la tabla"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, message, lease_seconds):
+        message.id = len(self.rows) + 1
+        self.rows[message.id] = {
+            "message": message, "status": "pending", "attempts": 0,
+            "next_attempt_at": time.monotonic() + lease_seconds,
+        }
+
+    def claim_due(self, limit, lease_seconds):
+        now = time.monotonic()
+        due = [
+            row for row in self.rows.values()
+            if row["status"] == "pending" and row["next_attempt_at"] <= now
+        ][:limit]
+        for row in due:
+            row["next_attempt_at"] = now + lease_seconds
+        return [
+            OutboxMessage(row["message"].to_email, row["message"].subject, row["message"].html_content,
+                          id=row["message"].id, attempts=row["attempts"])
+            for row in due
+        ]
+
+    def mark_sent(self, message):
+        self.rows[message.id].update(status="sent", attempts=message.attempts)
+
+    def mark_retry(self, message, error, delay_seconds):
+        self.rows[message.id].update(attempts=message.attempts, next_attempt_at=time.monotonic() + delay_seconds)
+
+    def mark_failed(self, message, error):
+        self.rows[message.id].update(status="failed", attempts=message.attempts)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    """Servidor SMTP local y un pool de conexiones hacia él"""
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    pool = SmtpConnectionPool(
+        server="127.0.0.1", port=controller.port, use_tls=False, username=None, password=None,
+        timeout=5, max_size=2, idle_seconds=60
+    )
+    yield handler, pool
+    pool.close()
+    controller.stop()
+
+
+def _transport(pool: SmtpConnectionPool):
+    email_service = EmailService()
+
+    def send(message: OutboxMessage) -> None:
+        pool.send(email_service._create_message(message.to_email, message.subject, message.html_content))
+
+    return send
+
+
+async def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timeout esperando al dispatcher"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.unit
+def test_dispatcher_delivers_reusing_one_connection(smtp_server):
+    """Varios emails se entregan por una única conexión SMTP"""
+    handler, pool = smtp_server
+    dispatcher = EmailDispatcher(transport=_transport(pool), workers=1)
+
+    async def scenario():
+        await dispatcher.start()
+        for index in range(3):
+            dispatcher.enqueue(f"user{index}@example.com", f"Asunto {index}", "<p>hola</p>")
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+
+    assert sorted(envelope.rcpt_tos[0] for envelope in handler.messages) == [
+        "user0@example.com", "user1@example.com", "user2@example.com"
+    ]
+    assert len(handler.sessions) == 1
+    assert dispatcher.stats["sent"] == 3
+
+
+@pytest.mark.unit
+def test_dispatcher_retries_failed_delivery_from_outbox(smtp_server):
+    """Un envío fallido queda pendiente en el outbox y se entrega en el reintento"""
+    handler, pool = smtp_server
+    outbox = MemoryOutbox()
+    send = _transport(pool)
+    calls = []
+
+    def flaky_transport(message):
+        calls.append(message.attempts)
+        if len(calls) == 1:
+            raise ConnectionRefusedError("servidor no disponible")
+        send(message)
+
+    dispatcher = EmailDispatcher(
+        transport=flaky_transport, store=outbox, workers=1,
+        retry_base_seconds=0.05, poll_seconds=0.02
+    )
+
+    async def scenario():
+        await dispatcher.start()
+        dispatcher.enqueue("retry@example.com", "Reintento", "<p>hola</p>")
+        await _wait_for(lambda: outbox.rows[1]["status"] == "sent")
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+
+    assert calls == [1, 2]
+    assert outbox.rows[1]["attempts"] == 2
+    assert [envelope.rcpt_tos for envelope in handler.messages] == [["retry@example.com"]]
+
+
+@pytest.mark.unit
+def test_dispatcher_resumes_pending_and_gives_up_after_max_attempts():
+    """Los pendientes del outbox se retoman al iniciar y se descartan al agotar los intentos"""
+    outbox = MemoryOutbox()
+    # Pendiente de una ejecución anterior, con el lease ya vencido
+    outbox.add(OutboxMessage("pending@example.com", "Pendiente", "<p>hola</p>"), lease_seconds=0)
+
+    def failing_transport(message):
+        raise ConnectionRefusedError("servidor no disponible")
+
+    dispatcher = EmailDispatcher(
+        transport=failing_transport, store=outbox, workers=1,
+        max_attempts=3, retry_base_seconds=0.01, poll_seconds=0.02
+    )
+
+    async def scenario():
+        await dispatcher.start()
+        await _wait_for(lambda: outbox.rows[1]["status"] == "failed")
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+
+    assert outbox.rows[1]["attempts"] == 3
+    assert dispatcher.stats["failed"] == 1
+    assert dispatcher.retry_delay(1) == 0.01
+    assert dispatcher.retry_delay(3) == 0.04
@@ -0,0 +1,98 @@
+"""
+Cola persistente email_outbox: el HTML (con enlaces de reset o
+verificación) se borra al enviarse o fallar, y la limpieza programada
+elimina los emails terminados antiguos.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.email_outbox import EmailOutbox
+from app.services.cleanup_service import CleanupService
+from app.services.email_dispatcher import OutboxMessage, SqlEmailOutbox
+from app.services.maintenance_scheduler import get_maintenance_scheduler
+
+RESET_LINK = '<a href="https://example.com/token-validate?token=secreto">Restablecer</a>'
+
+
+@pytest.fixture
+def outbox(db_session):
+    """SqlEmailOutbox con sesiones sobre la conexión del test"""
+    return SqlEmailOutbox(session_factory=lambda: Session(bind=db_session.connection()))
+
+
+def _stored(db_session, outbox, to_email="ana@example.com"):
+    message = OutboxMessage(to_email, "Restablecer contraseña", RESET_LINK)
+    outbox.add(message, lease_seconds=60)
+    return message
+
+
+@pytest.mark.unit
+def test_sent_email_drops_its_content(db_session, outbox):
+    message = _stored(db_session, outbox)
+    row = db_session.get(EmailOutbox, message.id)
+    assert row.html_content == RESET_LINK
+
+    message.attempts = 1
+    outbox.mark_sent(message)
+    db_session.refresh(row)
+
+    assert (row.status, row.html_content) == ("sent", None)
+    assert row.sent_at is not None
+
+
+@pytest.mark.unit
+def test_retry_keeps_content_and_failure_drops_it(db_session, outbox):
+    """Mientras quedan reintentos el HTML se conserva; al agotarlos se borra"""
+    message = _stored(db_session, outbox)
+    row = db_session.get(EmailOutbox, message.id)
+
+    message.attempts = 1
+    outbox.mark_retry(message, "timeout", delay_seconds=5)
+    db_session.refresh(row)
+    assert (row.status, row.html_content) == ("pending", RESET_LINK)
+
+    message.attempts = 5
+    outbox.mark_failed(message, "timeout")
+    db_session.refresh(row)
+    assert (row.status, row.html_content, row.last_error) == ("failed", None, "timeout")
+
+
+@pytest.mark.unit
+def test_cleanup_removes_old_finished_emails(db_session):
+    """Se eliminan los enviados y fallidos antiguos; pendientes y recientes quedan"""
+    old = datetime.now(timezone.utc) - timedelta(days=8)
+    rows = {
+        (status, age): EmailOutbox(
+            to_email=f"{status}-{age}@example.com",
+            subject="Verificar email",
+            html_content=RESET_LINK if status == "pending" else None,
+            status=status,
+            attempts=1,
+            created_at=old if age == "old" else datetime.now(timezone.utc),
+        )
+        for status in ("pending", "sent", "failed")
+        for age in ("old", "new")
+    }
+    db_session.add_all(rows.values())
+    db_session.flush()
+
+    result = CleanupService(db_session).cleanup_email_outbox(days_old=7)
+
+    assert result == {"deleted": 2}
+    remaining = {(row.status, row.to_email.split("-")[1].split("@")[0]) for row in db_session.query(EmailOutbox).all()}
+    assert remaining == {("pending", "old"), ("pending", "new"), ("sent", "new"), ("failed", "new")}
+
+
+@pytest.mark.unit
+def test_outbox_cleanup_is_scheduled():
+    get_maintenance_scheduler.cache_clear()
+    try:
+        jobs = get_maintenance_scheduler().stats()["jobs"]
+    finally:
+        get_maintenance_scheduler.cache_clear()
+
+    assert "cleanup_email_outbox" in jobs
+    assert jobs["cleanup_email_outbox"]["exclusive"] is True
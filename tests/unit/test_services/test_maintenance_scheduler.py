@@ -0,0 +1,96 @@
+"""
+Programador de mantenimiento: ejecución de tareas y estadísticas por tarea.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.maintenance_scheduler import MaintenanceJob, MaintenanceScheduler
+
+
+class FakeSession:
+    """Sesión mínima: el programador solo hace rollback y close"""
+
+    def __init__(self):
+        self.closed = False
+        self.rolled_back = False
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+def _scheduler(*jobs):
+    sessions = []
+
+    def session_factory():
+        session = FakeSession()
+        sessions.append(session)
+        return session
+
+    return MaintenanceScheduler(list(jobs), session_factory=session_factory, lock_engine=None), sessions
+
+
+@pytest.mark.unit
+def test_run_job_records_rows_and_duration():
+    """Una ejecución registra filas eliminadas, duración y cierra su sesión"""
+    job = MaintenanceJob("cleanup", 60, lambda db: 42)
+    scheduler, sessions = _scheduler(job)
+
+    assert scheduler.run_job(job) is True
+
+    stats = scheduler.stats()["jobs"]["cleanup"]
+    assert stats["runs"] == 1
+    assert stats["last_rows"] == 42
+    assert stats["last_duration_seconds"] >= 0
+    assert stats["last_error"] is None
+    assert sessions[0].closed
+
+
+@pytest.mark.unit
+def test_run_job_records_failures():
+    """Un error se registra en la tarea sin propagarse"""
+    def failing(db):
+        raise RuntimeError("sin conexión")
+
+    job = MaintenanceJob("cleanup", 60, failing)
+    scheduler, sessions = _scheduler(job)
+
+    scheduler.run_job(job)
+
+    stats = job.stats()
+    assert stats["failures"] == 1
+    assert stats["last_error"] == "sin conexión"
+    assert sessions[0].rolled_back and sessions[0].closed
+
+
+@pytest.mark.unit
+def test_scheduler_runs_on_start_and_on_interval():
+    """Las tareas run_on_start corren al iniciar y todas se repiten en su intervalo"""
+    calls = {"startup": 0, "periodic": 0}
+
+    def counter(name):
+        def run(db):
+            calls[name] += 1
+            return 0
+        return run
+
+    scheduler, _ = _scheduler(
+        MaintenanceJob("startup", 60, counter("startup"), run_on_start=True),
+        MaintenanceJob("periodic", 0.01, counter("periodic")),
+    )
+
+    async def scenario():
+        await scheduler.start()
+        assert calls == {"startup": 1, "periodic": 0}
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+    assert calls["startup"] == 1
+    assert calls["periodic"] >= 2
+    assert scheduler.running is False
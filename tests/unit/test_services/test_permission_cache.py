@@ -0,0 +1,143 @@
+"""
+Caché de permisos por (usuario, empresa): TTL, límite de tamaño e
+invalidación al cambiar roles o asignaciones.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.role import Role
+from app.models.user import AppUser
+from app.schemas.user import UserUpdate
+from app.services import permission_cache as permission_cache_module
+from app.services.permission_cache import PermissionCache, get_permission_cache
+from app.services.role_service import RoleService
+from app.services.user_service import UserService
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Reloj monotónico controlado por el test"""
+    now = {"value": 1000.0}
+    monkeypatch.setattr(permission_cache_module.time, "monotonic", lambda: now["value"])
+    return now
+
+
+@pytest.fixture
+def permission_cache():
+    """Caché del proceso vacía antes y después de cada test"""
+    cache = get_permission_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.mark.unit
+@pytest.mark.role
+def test_entries_expire_after_ttl(clock):
+    """Una entrada se sirve hasta su TTL y después obliga a resolver de nuevo"""
+    cache = PermissionCache(ttl_seconds=30, max_size=10)
+    cache.set("user", "company", ["user:read"])
+
+    clock["value"] += 29
+    assert cache.get("user", "company") == ["user:read"]
+
+    clock["value"] += 1
+    assert cache.get("user", "company") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.role
+def test_invalidation_scopes():
+    """Invalidar por usuario y empresa, por usuario o por empresa"""
+    cache = PermissionCache(ttl_seconds=60, max_size=10)
+    for user in ("u1", "u2"):
+        for company in ("c1", "c2"):
+            cache.set(user, company, [f"{user}:{company}"])
+
+    cache.invalidate_user("u1", "c1")
+    assert cache.get("u1", "c1") is None
+    assert cache.get("u1", "c2") == ["u1:c2"]
+
+    cache.invalidate_user("u1")
+    assert cache.get("u1", "c2") is None
+
+    cache.invalidate_company("c2")
+    assert cache.get("u2", "c2") is None
+    assert cache.get("u2", "c1") == ["u2:c1"]
+
+
+@pytest.mark.unit
+@pytest.mark.role
+def test_max_size_evicts_oldest_entries():
+    cache = PermissionCache(ttl_seconds=60, max_size=2)
+    for index in range(3):
+        cache.set(f"u{index}", "c", [])
+
+    assert cache.stats()["size"] == 2
+    assert cache.get("u0", "c") is None
+    assert cache.get("u2", "c") == []
+
+
+def _member_with_role(db: Session):
+    """Usuario miembro de una empresa y un rol de esa empresa"""
+    company = Company(name=f"cache-{uuid.uuid4().hex[:8]}")
+    user = AppUser(name="cache", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add_all([company, user])
+    db.flush()
+    role = Role(name="cache-role", company_id=company.id)
+    db.add_all([role, CompanyUser(user_id=user.id, company_id=company.id, is_active=True)])
+    db.flush()
+    return user, company, role
+
+
+@pytest.mark.role
+def test_role_assignment_changes_invalidate_the_user(db_session, permission_cache):
+    """Asignar o quitar un rol descarta los permisos cacheados del usuario"""
+    user, company, role = _member_with_role(db_session)
+    role_service = RoleService(db_session)
+
+    permission_cache.set(user.id, company.id, [])
+    role_service.assign_role_to_user(user.id, role.id)
+    assert permission_cache.get(user.id, company.id) is None
+
+    permission_cache.set(user.id, company.id, ["stale"])
+    assert role_service.remove_role_from_user(user.id, role.id) is True
+    assert permission_cache.get(user.id, company.id) is None
+
+
+@pytest.mark.role
+def test_role_deletion_invalidates_the_company(db_session, permission_cache):
+    """Eliminar un rol descarta los permisos cacheados de toda la empresa"""
+    user, company, role = _member_with_role(db_session)
+    other_user = uuid.uuid4()
+    other_company = uuid.uuid4()
+
+    permission_cache.set(user.id, company.id, ["stale"])
+    permission_cache.set(other_user, company.id, ["stale"])
+    permission_cache.set(user.id, other_company, ["kept"])
+
+    assert RoleService(db_session).delete_role(role.id) is True
+
+    assert permission_cache.get(user.id, company.id) is None
+    assert permission_cache.get(other_user, company.id) is None
+    assert permission_cache.get(user.id, other_company) == ["kept"]
+
+
+@pytest.mark.role
+@pytest.mark.user
+def test_user_role_update_invalidates_the_user(db_session, permission_cache):
+    """Cambiar el rol de un usuario en una empresa descarta sus permisos cacheados ahí"""
+    user, company, role = _member_with_role(db_session)
+    permission_cache.set(user.id, company.id, ["stale"])
+
+    updated = UserService(db_session).update_user(user.id, UserUpdate(role=role.name), company.id)
+
+    assert updated is not None
+    assert permission_cache.get(user.id, company.id) is None
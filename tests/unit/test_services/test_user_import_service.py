@@ -0,0 +1,174 @@
+"""
+Importación masiva de usuarios: lectura por lotes con número de línea,
+validación por fila, roles de la compañía, contraseñas ya hasheadas y
+rechazo de emails ya registrados.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.security import pwd_context, verify_password
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.role import Role
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services.user_import_service import UserImportService, read_import_batches
+
+
+def _read(body: str, import_format: str, batch_size: int = 100):
+    """Lotes leídos de un cuerpo entregado en partes pequeñas"""
+    async def chunks():
+        data = body.encode("utf-8")
+        for start in range(0, len(data), 7):
+            yield data[start:start + 7]
+
+    async def collect():
+        return [batch async for batch in read_import_batches(chunks(), import_format, batch_size)]
+
+    return asyncio.run(collect())
+
+
+def _company_with_roles(db: Session, *role_names: str):
+    company = Company(name=f"import-{uuid.uuid4().hex[:8]}")
+    db.add(company)
+    db.flush()
+    roles = {name: Role(name=name, company_id=company.id) for name in role_names}
+    db.add_all(roles.values())
+    db.flush()
+    return company, roles
+
+
+def _errors(result):
+    return {error.line: error.detail for error in result.errors}
+
+
+@pytest.mark.unit
+@pytest.mark.user
+def test_csv_rows_keep_their_line_numbers():
+    """Las líneas vacías cuentan; las filas mal formadas llegan como error con su línea"""
+    body = (
+        "name,email,password\r\n"
+        "Ana,ana@example.com,secret1\r\n"
+        "\r\n"
+        "Beto,beto@example.com\r\n"
+        "Caro,caro@example.com,secret3"
+    )
+
+    batches = _read(body, "csv", batch_size=2)
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    rows = [row for batch in batches for row in batch]
+    assert rows[0] == (2, {"name": "Ana", "email": "ana@example.com", "password": "secret1"}, None)
+    assert rows[1][0] == 4 and rows[1][1] is None and "columnas" in rows[1][2]
+    assert rows[2][0] == 5 and rows[2][2] is None
+
+
+@pytest.mark.unit
+@pytest.mark.user
+def test_ndjson_rows_keep_their_line_numbers():
+    body = '{"name": "Ana", "email": "ana@example.com"}\n[1, 2]\n{no es json\n'
+
+    rows = _read(body, "ndjson")[0]
+
+    assert [line for line, *_ in rows] == [1, 2, 3]
+    assert rows[0][2] is None
+    assert rows[1][1] is None and rows[1][2].startswith("Fila mal formada")
+    assert rows[2][1] is None and rows[2][2].startswith("Fila mal formada")
+
+
+@pytest.mark.unit
+@pytest.mark.user
+def test_csv_header_without_required_columns_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        _read("name,password\nAna,secret1\n", "csv")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.user
+def test_invalid_rows_are_reported_and_valid_rows_imported(db_session):
+    """Filas mal formadas, inválidas, repetidas o con rol desconocido no detienen el lote"""
+    company, roles = _company_with_roles(db_session, "member")
+    rows = _read(
+        "name,email,password,role\n"
+        "Ana,Ana@Example.com,secret1,member\n"
+        "Beto,beto@example.com\n"
+        "Caro,no-es-email,secret3,member\n"
+        "Ana Bis,ana@example.com,secret4,member\n"
+        "Dani,dani@example.com,secret5,auditor\n"
+        "Eli,eli@example.com,secret6,\n",
+        "csv"
+    )[0]
+
+    result = UserImportService(db_session).import_batch(str(company.id), rows)
+
+    assert (result.total, result.created, result.failed) == (6, 1, 5)
+    errors = _errors(result)
+    assert errors[3].startswith("Fila mal formada")
+    assert errors[4].startswith("email")
+    assert errors[5] == "Email repetido en el archivo"
+    assert errors[6] == "El rol 'auditor' no existe en la compañía"
+    assert errors[7] == "La fila no indica rol y no se envió default_role"
+
+    user = db_session.query(AppUser).filter(AppUser.email == "ana@example.com").one()
+    assert verify_password("secret1", user.hashed_password)
+    assert db_session.query(UserRole).filter(UserRole.user_id == user.id).one().role_id == roles["member"].id
+
+
+@pytest.mark.user
+def test_default_role_and_hashed_password(db_session):
+    """Sin columna role se usa default_role; hashed_password se guarda tal cual"""
+    company, _ = _company_with_roles(db_session, "member")
+    hashed = pwd_context.hash("migrado1")
+    rows = [
+        (1, {"name": "Ana", "email": "ana@example.com", "hashed_password": hashed}, None),
+        (2, {"name": "Beto", "email": "beto@example.com", "hashed_password": "md5:abc"}, None),
+        (3, {"name": "Caro", "email": "caro@example.com"}, None),
+    ]
+
+    result = UserImportService(db_session).import_batch(str(company.id), rows, default_role="Member")
+
+    assert (result.created, result.failed) == (1, 2)
+    assert _errors(result)[2].startswith("hashed_password")
+    assert "password" in _errors(result)[3]
+    user = db_session.query(AppUser).filter(AppUser.email == "ana@example.com").one()
+    assert user.hashed_password == hashed
+
+
+@pytest.mark.user
+def test_existing_accounts_are_rejected_without_revealing_their_company(db_session):
+    """
+    Un email registrado en otra compañía se rechaza con el mismo error que
+    un miembro actual, sin agregarlo a la compañía ni tocar su contraseña.
+    """
+    company, _ = _company_with_roles(db_session, "member")
+    other_company, _ = _company_with_roles(db_session)
+    elsewhere = AppUser(name="ana", email="ana@example.com", hashed_password=pwd_context.hash("original"))
+    member = AppUser(name="beto", email="beto@example.com", hashed_password="x")
+    db_session.add_all([elsewhere, member])
+    db_session.flush()
+    db_session.add_all([
+        CompanyUser(user_id=elsewhere.id, company_id=other_company.id, is_active=True),
+        CompanyUser(user_id=member.id, company_id=company.id, is_active=True),
+    ])
+    db_session.flush()
+    rows = [
+        (1, {"name": "Ana", "email": "ana@example.com", "password": "reemplazo", "role": "member"}, None),
+        (2, {"name": "Beto", "email": "beto@example.com", "password": "secret2", "role": "member"}, None),
+        (3, {"name": "Caro", "email": "caro@example.com", "password": "secret3", "role": "member"}, None),
+    ]
+
+    result = UserImportService(db_session).import_batch(str(company.id), rows)
+
+    assert (result.created, result.failed) == (1, 2)
+    assert _errors(result) == {1: "El email ya está registrado", 2: "El email ya está registrado"}
+
+    db_session.refresh(elsewhere)
+    assert verify_password("original", elsewhere.hashed_password)
+    assert db_session.query(CompanyUser).filter(CompanyUser.company_id == company.id).count() == 2
+    assert db_session.query(CompanyUser).filter(CompanyUser.user_id == elsewhere.id).count() == 1
+    assert db_session.query(UserRole).filter(UserRole.user_id == elsewhere.id).count() == 0
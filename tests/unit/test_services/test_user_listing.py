@@ -0,0 +1,130 @@
+"""
+Listado de usuarios por empresa: solo miembros de la empresa del token y
+filtro is_active sobre la membresía, no sobre la cuenta.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.main import app
+from app.models.company import Company
+from app.models.company_user import CompanyUser
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.user import AppUser
+from app.models.user_role import UserRole
+from app.services.auth_service import AuthService
+from app.services.permission_cache import get_permission_cache
+from app.services.user_service import UserService
+
+
+def _user(db: Session, name: str) -> AppUser:
+    user = AppUser(name=name, email=f"{name}-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _two_tenants(db: Session):
+    """
+    Empresa A con un miembro activo, uno con la membresía inactiva y un
+    lector; empresa B con un usuario que no pertenece a A.
+    """
+    company_a = Company(name=f"list-a-{uuid.uuid4().hex[:8]}")
+    company_b = Company(name=f"list-b-{uuid.uuid4().hex[:8]}")
+    db.add_all([company_a, company_b])
+    db.flush()
+
+    reader, active, inactive, outsider = (_user(db, name) for name in ("reader", "active", "inactive", "outsider"))
+    joined = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db.add_all([
+        CompanyUser(user_id=reader.id, company_id=company_a.id, is_active=True, created_at=joined),
+        CompanyUser(user_id=active.id, company_id=company_a.id, is_active=True, created_at=joined + timedelta(days=1)),
+        CompanyUser(user_id=inactive.id, company_id=company_a.id, is_active=False, created_at=joined + timedelta(days=2)),
+        CompanyUser(user_id=outsider.id, company_id=company_b.id, is_active=True, created_at=joined),
+    ])
+    db.flush()
+    return company_a, company_b, {"reader": reader, "active": active, "inactive": inactive, "outsider": outsider}
+
+
+@pytest.mark.user
+def test_listing_contains_only_company_members(db_session):
+    """Los usuarios de otra empresa no aparecen, aunque la cuenta esté activa"""
+    company_a, company_b, users = _two_tenants(db_session)
+    user_service = UserService(db_session)
+
+    page = user_service.get_users_page(limit=10, count="exact", company_id=str(company_a.id))
+
+    assert [user.id for user in page.items] == [users["reader"].id, users["active"].id, users["inactive"].id]
+    assert page.total == 3
+    assert [user.id for user in user_service.get_users(company_id=str(company_b.id))] == [users["outsider"].id]
+
+
+@pytest.mark.user
+def test_is_active_filters_the_membership(db_session):
+    """is_active se aplica a company_user: una cuenta activa con la membresía inactiva queda fuera"""
+    company_a, _, users = _two_tenants(db_session)
+    user_service = UserService(db_session)
+
+    active = user_service.get_users_page(limit=10, is_active=True, company_id=str(company_a.id))
+    inactive = user_service.get_users_page(limit=10, is_active=False, company_id=str(company_a.id))
+
+    assert users["inactive"].is_active is True
+    assert [user.id for user in active.items] == [users["reader"].id, users["active"].id]
+    assert [user.id for user in inactive.items] == [users["inactive"].id]
+    assert [user.id for user in user_service.get_users(is_active=False, company_id=str(company_a.id))] == [users["inactive"].id]
+
+
+@pytest.mark.user
+def test_members_are_paged_in_join_order(db_session):
+    """El cursor sigue (company_user.created_at, user_id) sin repetir miembros"""
+    company_a, _, users = _two_tenants(db_session)
+    user_service = UserService(db_session)
+
+    first = user_service.get_users_page(limit=2, company_id=str(company_a.id))
+    second = user_service.get_users_page(limit=2, cursor=first.next_cursor, company_id=str(company_a.id))
+
+    assert [user.id for user in first.items] == [users["reader"].id, users["active"].id]
+    assert [user.id for user in second.items] == [users["inactive"].id]
+    assert second.next_cursor is None
+
+
+@pytest.mark.user
+@pytest.mark.auth
+def test_endpoint_lists_the_token_company(db_session):
+    """GET /users/ con un token de A devuelve solo los miembros de A"""
+    company_a, _, users = _two_tenants(db_session)
+    permission = Permission(name="user:read")
+    role = Role(name="reader", company_id=company_a.id)
+    db_session.add_all([permission, role])
+    db_session.flush()
+    db_session.add_all([
+        RolePermission(role_id=role.id, permission_id=permission.id),
+        UserRole(user_id=users["reader"].id, role_id=role.id),
+    ])
+    db_session.flush()
+    token = AuthService(db_session).create_tokens(users["reader"], str(company_a.id))
+
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    get_permission_cache().clear()
+    try:
+        response = TestClient(app).get(
+            "/api/v1/users/",
+            params={"is_active": True},
+            headers={"Authorization": f"Bearer {token.access_token}"}
+        )
+    finally:
+        get_permission_cache().clear()
+        app.dependency_overrides.pop(get_db, None)
+
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()["users"]] == [str(users["reader"].id), str(users["active"].id)]
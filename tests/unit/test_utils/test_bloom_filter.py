@@ -0,0 +1,97 @@
+"""
+Filtro de Bloom de la blacklist: sin falsos negativos, tasa de falsos
+positivos acotada y reconstrucción que descarta revocaciones eliminadas.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.bloom_filter import BloomFilter
+from app.models.invalidated_token import InvalidatedToken
+from app.models.user import AppUser
+from app.services.blacklist_cache import TokenBlacklistCache
+
+CAPACITY = 2000
+ERROR_RATE = 0.01
+PROBES = 20000
+
+
+@pytest.mark.unit
+def test_filter_has_no_false_negatives():
+    """Todo elemento agregado se reporta como posible miembro"""
+    bloom = BloomFilter(capacity=CAPACITY, error_rate=ERROR_RATE)
+    items = [uuid.uuid4().hex for _ in range(CAPACITY)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert bloom.count == CAPACITY
+
+
+@pytest.mark.unit
+def test_false_positive_rate_stays_near_target():
+    """Con la capacidad completa la tasa observada no se aleja de la configurada"""
+    bloom = BloomFilter(capacity=CAPACITY, error_rate=ERROR_RATE)
+    for _ in range(CAPACITY):
+        bloom.add(uuid.uuid4().hex)
+
+    false_positives = sum(bloom.contains(uuid.uuid4().hex) for _ in range(PROBES))
+
+    assert false_positives / PROBES < 2 * ERROR_RATE
+    assert bloom.estimated_false_positive_rate() < 2 * ERROR_RATE
+
+
+@pytest.mark.unit
+def test_invalid_error_rate_is_rejected():
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=10, error_rate=1.5)
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_filter_only_cache_sends_possible_hits_to_database(db_session):
+    """Sin conjunto de hashes, un posible acierto del filtro se confirma en la BD"""
+    cache = TokenBlacklistCache(max_size=100, refresh_seconds=60, store_hashes=False, filter_capacity=100)
+    cache.warm(db_session)
+    cache.add("revocado", datetime.now(timezone.utc) + timedelta(hours=1))
+
+    assert cache.lookup("desconocido") is False
+    assert cache.lookup("revocado") is None
+
+    cache.record_database_result("revocado", False)
+    stats = cache.filter_stats()
+    assert stats["negatives"] == 1
+    assert stats["possible_hits"] == 1
+    assert stats["false_positives"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_rebuild_drops_deleted_revocations(db_session):
+    """Reconstruir el filtro desde la tabla descarta los tokens ya eliminados"""
+    user = AppUser(name="bloom", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    row = InvalidatedToken(
+        id=uuid.uuid4(),
+        token_hash="revocado",
+        user_id=user.id,
+        invalidated_at=datetime.now(timezone.utc),
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        token_type="access",
+    )
+    db_session.add(row)
+    db_session.flush()
+
+    cache = TokenBlacklistCache(max_size=100, refresh_seconds=60, store_hashes=False, filter_capacity=100)
+    cache.warm(db_session)
+    assert cache.lookup("revocado") is None
+
+    db_session.delete(row)
+    db_session.flush()
+    assert cache.warm(db_session) == 0
+
+    assert cache.lookup("revocado") is False
+    assert cache.filter_stats()["items"] == 0
@@ -0,0 +1,92 @@
+"""
+Paginación por cursor: codificación del cursor y desempate por id cuando
+la primera columna de orden se repite.
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.db.pagination import decode_cursor, encode_cursor, paginate_keyset
+from app.models.company import Company
+from app.models.role import Role
+from app.services.role_service import RoleService
+
+
+def _all_pages(fetch, limit):
+    """Recorrer todas las páginas siguiendo next_cursor"""
+    items, cursor, pages = [], None, 0
+    while True:
+        page = fetch(limit, cursor)
+        items.extend(page.items)
+        pages += 1
+        if page.next_cursor is None:
+            return items, pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.unit
+def test_cursor_round_trip_restores_column_types():
+    """datetime y UUID vuelven con su tipo; el cursor es base64 url-safe sin relleno"""
+    created_at = datetime(2026, 10, 17, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    company_id = uuid.uuid4()
+
+    cursor = encode_cursor([created_at, company_id])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, [Company.created_at, Company.id]) == [created_at, company_id]
+    assert decode_cursor(encode_cursor(["admin", company_id]), [Role.name, Role.id]) == ["admin", company_id]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("cursor", [
+    "no-es-base64!",
+    encode_cursor(["solo-un-valor"]),
+    encode_cursor(["2026-10-17T12:00:00", "no-es-uuid"]),
+    encode_cursor(["fecha-invalida", str(uuid.uuid4())]),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, [Company.created_at, Company.id])
+    assert error.value.status_code == 400
+
+
+@pytest.mark.company
+def test_companies_with_same_created_at_are_paged_by_id(db_session):
+    """Empresas con el mismo created_at: cada una aparece una sola vez, ordenadas por id"""
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    companies = [Company(name=f"tie-{index}", created_at=created_at) for index in range(5)]
+    db_session.add_all(companies)
+    db_session.flush()
+
+    query = db_session.query(Company)
+    items, pages = _all_pages(
+        lambda limit, cursor: paginate_keyset(query, [Company.created_at, Company.id], limit, cursor),
+        limit=2
+    )
+
+    assert pages == 3
+    assert [company.id for company in items] == sorted(company.id for company in companies)
+
+
+@pytest.mark.role
+def test_roles_with_same_name_are_paged_by_id(db_session):
+    """Roles homónimos en una empresa: el desempate por id no repite ni omite roles"""
+    company = Company(name=f"roles-{uuid.uuid4().hex[:8]}")
+    db_session.add(company)
+    db_session.flush()
+    roles = [Role(name="admin", company_id=company.id) for _ in range(3)] + [Role(name="viewer", company_id=company.id)]
+    db_session.add_all(roles)
+    db_session.flush()
+
+    role_service = RoleService(db_session)
+    items, _ = _all_pages(
+        lambda limit, cursor: role_service.get_roles_page(limit=limit, cursor=cursor, company_id=str(company.id)),
+        limit=1
+    )
+
+    admin_ids = sorted(role.id for role in roles if role.name == "admin")
+    assert [item.name for item in items] == ["admin", "admin", "admin", "viewer"]
+    assert [item.id for item in items[:3]] == admin_ids
@@ -0,0 +1,121 @@
+"""
+Particiones de invalidated_tokens: rango y nombre de cada periodo, lectura
+de los límites que devuelve pg_get_expr y revocaciones concurrentes sobre
+la unicidad de (token_hash, expires_at).
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db.partitions import _BOUND_PATTERN, _parse_bound, partition_bounds, partition_name
+from app.models.invalidated_token import InvalidatedToken
+from app.models.user import AppUser
+from app.services.auth_service import AuthService, settings
+
+UTC = timezone.utc
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("moment, interval, expected", [
+    (datetime(2026, 10, 17, 15, 30, tzinfo=UTC), "day", (datetime(2026, 10, 17, tzinfo=UTC), datetime(2026, 10, 18, tzinfo=UTC))),
+    (datetime(2026, 10, 17, 0, 0, tzinfo=UTC), "day", (datetime(2026, 10, 17, tzinfo=UTC), datetime(2026, 10, 18, tzinfo=UTC))),
+    (datetime(2026, 12, 31, 23, 59, tzinfo=UTC), "day", (datetime(2026, 12, 31, tzinfo=UTC), datetime(2027, 1, 1, tzinfo=UTC))),
+    # 2026-10-17 es sábado: la semana empieza el lunes 12
+    (datetime(2026, 10, 17, 15, 30, tzinfo=UTC), "week", (datetime(2026, 10, 12, tzinfo=UTC), datetime(2026, 10, 19, tzinfo=UTC))),
+    (datetime(2026, 10, 12, 0, 0, tzinfo=UTC), "week", (datetime(2026, 10, 12, tzinfo=UTC), datetime(2026, 10, 19, tzinfo=UTC))),
+])
+def test_partition_bounds(moment, interval, expected):
+    assert partition_bounds(moment, interval) == expected
+
+
+@pytest.mark.unit
+def test_partition_bounds_use_utc():
+    """Una fecha en otra zona cae en la partición de su día UTC"""
+    moment = datetime(2026, 10, 17, 22, 0, tzinfo=timezone(timedelta(hours=-3)))
+
+    start, end = partition_bounds(moment, "day")
+
+    assert start == datetime(2026, 10, 18, tzinfo=UTC)
+    assert end == datetime(2026, 10, 19, tzinfo=UTC)
+
+
+@pytest.mark.unit
+def test_consecutive_periods_have_distinct_names():
+    start, end = partition_bounds(datetime(2026, 10, 17, tzinfo=UTC), "week")
+
+    assert partition_name(start) == "invalidated_tokens_p20261012"
+    assert partition_name(end) == "invalidated_tokens_p20261019"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("bound, expected_start, expected_end", [
+    (
+        "FOR VALUES FROM ('2026-10-17 00:00:00+00') TO ('2026-10-18 00:00:00+00')",
+        datetime(2026, 10, 17, tzinfo=UTC),
+        datetime(2026, 10, 18, tzinfo=UTC),
+    ),
+    (
+        "FOR VALUES FROM ('2026-10-16 21:00:00-03') TO ('2026-10-17 21:00:00-03')",
+        datetime(2026, 10, 17, tzinfo=UTC),
+        datetime(2026, 10, 18, tzinfo=UTC),
+    ),
+    (
+        "FOR VALUES FROM ('2026-10-12 00:00:00') TO ('2026-10-19 00:00:00')",
+        datetime(2026, 10, 12, tzinfo=UTC),
+        datetime(2026, 10, 19, tzinfo=UTC),
+    ),
+])
+def test_bounds_from_pg_get_expr(bound, expected_start, expected_end):
+    """Los límites de pg_get_expr se leen como datetime con zona; sin zona se asume UTC"""
+    match = _BOUND_PATTERN.search(bound)
+
+    assert match is not None
+    assert _parse_bound(match.group(1)) == expected_start
+    assert _parse_bound(match.group(2)) == expected_end
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("bound", ["DEFAULT", "FOR VALUES IN ('a')", ""])
+def test_non_range_bounds_are_ignored(bound):
+    assert _BOUND_PATTERN.search(bound) is None
+
+
+@pytest.mark.auth
+def test_concurrent_revocations_of_a_key_keep_one_row(db_session):
+    """
+    Dos revocaciones de la misma clave con su expiración fija (la de una
+    sesión se redondea al día) chocan en (token_hash, expires_at) y no
+    duplican la fila, aunque ninguna vea la del otro antes de insertar.
+    """
+    user = AppUser(name="partition", email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    auth_service = AuthService(db_session)
+    token_expires_at = datetime.now(UTC) + timedelta(minutes=15)
+
+    def revocations():
+        return [
+            InvalidatedToken(token_hash="sesion", user_id=user.id, token_type="session",
+                             expires_at=auth_service._session_revocation_expiry()),
+            InvalidatedToken(token_hash="jti", user_id=user.id, token_type="access", expires_at=token_expires_at),
+        ]
+
+    assert auth_service._add_revocations(revocations()) == 2
+    assert auth_service._add_revocations(revocations()) == 0
+    db_session.flush()
+
+    assert db_session.query(InvalidatedToken).count() == 2
+
+
+@pytest.mark.unit
+def test_session_revocation_expiry_is_a_day_boundary():
+    """La fila de una sesión dura al menos REFRESH_TOKEN_EXPIRE_DAYS y termina a medianoche UTC"""
+    expires_at = AuthService._session_revocation_expiry()
+    minimum = datetime.now(UTC) + timedelta(days=settings.security.refresh_token_expire_days)
+
+    assert expires_at > minimum
+    assert expires_at - minimum <= timedelta(days=1)
+    assert (expires_at.hour, expires_at.minute, expires_at.second, expires_at.microsecond) == (0, 0, 0, 0)
+    assert expires_at.tzinfo == UTC
@@ -0,0 +1,86 @@
+"""
+Pool acotado de bcrypt: con workers + queue_size operaciones en curso
+responde 503 con Retry-After, y cada operación libera su lugar al terminar,
+también si falla.
+"""
+
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.security import PasswordHasherPool
+
+WAIT_SECONDS = 5
+
+
+@pytest.fixture
+def pool():
+    hasher = PasswordHasherPool(workers=1, queue_size=1, retry_after_seconds=7)
+    yield hasher
+    hasher.shutdown()
+
+
+def _fill(pool: PasswordHasherPool):
+    """Ocupar el hilo y la cola con operaciones que esperan a release"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(WAIT_SECONDS)
+        return "listo"
+
+    futures = [pool.submit(blocked) for _ in range(pool.workers + pool.queue_size)]
+    assert started.wait(WAIT_SECONDS)
+    return release, futures
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_full_pool_rejects_with_retry_after(pool):
+    release, futures = _fill(pool)
+
+    with pytest.raises(HTTPException) as error:
+        pool.submit(str, "rechazado")
+
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "7"}
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["in_flight"] == 2
+
+    release.set()
+    assert [future.result(WAIT_SECONDS) for future in futures] == ["listo", "listo"]
+    assert pool.run(str, "después") == "después"
+    assert pool.stats()["in_flight"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_failed_operations_free_their_slot(pool):
+    """Una operación que lanza también devuelve su lugar"""
+    def failing():
+        raise ValueError("hash inválido")
+
+    for _ in range(pool.workers + pool.queue_size + 1):
+        with pytest.raises(ValueError):
+            pool.run(failing)
+
+    assert pool.stats() == {"workers": 1, "queue_size": 1, "in_flight": 0, "rejected": 0}
+    assert pool.run(str, "ok") == "ok"
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+def test_blocking_submit_waits_for_a_slot(pool):
+    """map (importaciones) espera un lugar en vez de responder 503"""
+    release, futures = _fill(pool)
+    results = []
+    waiter = threading.Thread(target=lambda: results.extend(pool.map(str.upper, ["a", "b"])))
+    waiter.start()
+
+    release.set()
+    waiter.join(WAIT_SECONDS)
+
+    assert results == ["A", "B"]
+    assert pool.stats()["rejected"] == 0
@@ -0,0 +1,32 @@
+"""
+Utilidades para contar las consultas SQL emitidas durante una prueba
+"""
+
+from contextlib import contextmanager
+from typing import Generator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Generator[List[str], None, None]:
+    """
+    Registrar las sentencias SQL ejecutadas sobre un engine.
+    
+    Args:
+        engine: Engine de SQLAlchemy a observar
+        
+    Yields:
+        Lista que se va llenando con las sentencias ejecutadas
+    """
+    statements: List[str] = []
+    
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)